@@ -1,3 +1,122 @@
+// Binary story bundle written by tools/storyJsonGenerator.py (see tools/story_bundle.py).
+// Scenes are decoded one at a time straight from the ArrayBuffer.
+class StoryBundle {
+    static VERSION = 1;
+    static NONE = 0xFFFFFFFF;
+    static SCENE_SIZE = 16;
+    static ENTRY_SIZE = 40;
+    static CHOICE_SIZE = 12;
+
+    constructor(buffer) {
+        this.view = new DataView(buffer);
+        this.bytes = new Uint8Array(buffer);
+        const magic = String.fromCharCode(...this.bytes.subarray(0, 4));
+        if (magic !== 'CYOA') {
+            throw new Error(`Not a story bundle: ${magic}`);
+        }
+        const version = this.view.getUint16(4, true);
+        if (version !== StoryBundle.VERSION) {
+            throw new Error(`Unsupported story bundle version ${version}`);
+        }
+        this.flags = this.view.getUint16(6, true);
+        [
+            this.sceneCount, this.entryCount, this.choiceCount, this.stringCount,
+            this.scenesOffset, this.entriesOffset, this.choicesOffset, this.stringsOffset
+        ] = Array.from({ length: 8 }, (_, i) => this.view.getUint32(8 + i * 4, true));
+        this.stringData = this.stringsOffset + 4 * (this.stringCount + 1);
+        this.decoder = new TextDecoder();
+        this.strings = new Map();
+        this.sceneIndex = new Map();
+        for (let i = 0; i < this.sceneCount; i++) {
+            const at = this.scenesOffset + i * StoryBundle.SCENE_SIZE;
+            this.sceneIndex.set(this.string(this.view.getUint32(at, true)), i);
+        }
+    }
+
+    get hasCharacterRefs() {
+        return (this.flags & 1) !== 0;
+    }
+
+    string(ref) {
+        if (ref === StoryBundle.NONE) {
+            return undefined;
+        }
+        let value = this.strings.get(ref);
+        if (value === undefined) {
+            const at = this.stringsOffset + ref * 4;
+            const start = this.stringData + this.view.getUint32(at, true);
+            const end = this.stringData + this.view.getUint32(at + 4, true);
+            value = this.decoder.decode(this.bytes.subarray(start, end));
+            this.strings.set(ref, value);
+        }
+        return value;
+    }
+
+    choices(first, count) {
+        const records = [];
+        for (let i = first; i < first + count; i++) {
+            const at = this.choicesOffset + i * StoryBundle.CHOICE_SIZE;
+            records.push([this.view.getInt32(at, true), this.view.getInt32(at + 4, true), this.string(this.view.getUint32(at + 8, true))]);
+        }
+        return records;
+    }
+
+    entry(index) {
+        const at = this.entriesOffset + index * StoryBundle.ENTRY_SIZE;
+        const field = offset => this.view.getUint32(at + offset, true);
+        const flags = field(20);
+        const firstChoice = field(24);
+        const choiceCount = this.view.getUint16(at + 28, true);
+        const diceCount = this.view.getUint16(at + 30, true);
+        const entry = {};
+        [['name', 0], ['text', 4], ['portrait', 8], ['character', 12]].forEach(([key, offset]) => {
+            const value = this.string(field(offset));
+            if (value !== undefined) {
+                entry[key] = value;
+            }
+        });
+        if (flags & 1) {
+            entry.modifiers = {};
+            const dialogueClass = this.string(field(16));
+            if (dialogueClass !== undefined) {
+                entry.modifiers.class = dialogueClass;
+            }
+            if (flags & 2) {
+                entry.modifiers.hidden = true;
+            }
+        }
+        if (flags & 4) {
+            entry.choices = this.choices(firstChoice, choiceCount).map(([text, , next]) => ({ text: this.string(text), next }));
+        }
+        if (flags & 8) {
+            entry['dice-choices'] = {
+                'dice-min': flags & 32 ? null : this.view.getInt32(at + 32, true),
+                'dice-max': flags & 64 ? null : this.view.getInt32(at + 36, true),
+                choices: this.choices(firstChoice + choiceCount, diceCount).map(([min, max, next]) => ({ 'dice-min': min, 'dice-max': max, next }))
+            };
+        }
+        return entry;
+    }
+
+    scene(sceneId) {
+        const index = this.sceneIndex.get(sceneId);
+        if (index === undefined) {
+            return undefined;
+        }
+        const at = this.scenesOffset + index * StoryBundle.SCENE_SIZE;
+        const firstEntry = this.view.getUint32(at + 4, true);
+        const entryCount = this.view.getUint32(at + 8, true);
+        const scene = {
+            scene: sceneId,
+            dialogue: Array.from({ length: entryCount }, (_, i) => this.entry(firstEntry + i))
+        };
+        if (this.view.getUint32(at + 12, true) & 1) {
+            scene.final = true;
+        }
+        return scene;
+    }
+}
+
 // Generic CYOA Story Engine
 class CYOAStory {
     constructor() {
@@ -16,6 +135,9 @@ class CYOAStory {
 
         this.currentScene = this.storyConfig?.startScene;
         this.storyData = null;
+        this.storyBundle = null;
+        this.sceneCache = new Map();
+        this.characterRegistry = null;
         this.choiceHistory = [];
         this.currentDialogueIndex = 0;
         this.currentSceneDialogueIndex = 0;
@@ -35,6 +157,8 @@ class CYOAStory {
         }
         const cfg = {
             storyFile: el.dataset.storyFile,
+            storyBundle: el.dataset.storyBundle,
+            charactersFile: el.dataset.charactersFile,
             startScene: el.dataset.startScene,
             endSections: el.dataset.endSections + ',end-of-prologue,quest-section'
         };
@@ -54,12 +178,15 @@ class CYOAStory {
 
     async loadStoryData() {
         try {
-            // Load story data from the configured JSON file
-            const response = await fetch(this.storyConfig.storyFile);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+            if (!(await this.loadStoryBundle())) {
+                // Load story data from the configured JSON file
+                const response = await fetch(this.storyConfig.storyFile);
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                this.storyData = await response.json();
             }
-            this.storyData = await response.json();
+            await this.resolveCharacters();
         } catch (error) {
             console.error('Error loading story data:', error);
             // Show error message to user
@@ -67,6 +194,72 @@ class CYOAStory {
         }
     }
 
+    async loadStoryBundle() {
+        // The binary bundle, when the page names one, replaces the JSON file
+        if (!this.storyConfig.storyBundle || typeof TextDecoder === 'undefined') {
+            return false;
+        }
+        try {
+            const response = await fetch(this.storyConfig.storyBundle);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            this.storyBundle = new StoryBundle(await response.arrayBuffer());
+            return true;
+        } catch (error) {
+            console.warn('Error loading story bundle, falling back to JSON:', error);
+            return false;
+        }
+    }
+
+    getScene(sceneId) {
+        if (!this.storyBundle) {
+            return this.storyData.scenes.find(s => s.scene === sceneId);
+        }
+        // Bundle scenes are decoded on first use
+        if (!this.sceneCache.has(sceneId)) {
+            const scene = this.storyBundle.scene(sceneId);
+            if (scene) {
+                this.applyCharacters(scene.dialogue);
+            }
+            this.sceneCache.set(sceneId, scene);
+        }
+        return this.sceneCache.get(sceneId);
+    }
+
+    async resolveCharacters() {
+        // Entries may reference the shared registry by key instead of inlining portraits
+        const entries = this.storyBundle ? [] : this.storyData.scenes.flatMap(scene => scene.dialogue || []);
+        const hasReferences = this.storyBundle ? this.storyBundle.hasCharacterRefs : entries.some(entry => entry.character);
+        if (!this.storyConfig.charactersFile || !hasReferences) {
+            return;
+        }
+        try {
+            const response = await fetch(this.storyConfig.charactersFile);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const registry = await response.json();
+            this.characterRegistry = registry.characters || {};
+            this.applyCharacters(entries);
+        } catch (error) {
+            // Portraits are decorative; keep the story playable without them
+            console.warn('Error loading character registry:', error);
+        }
+    }
+
+    applyCharacters(entries) {
+        if (!this.characterRegistry) {
+            return;
+        }
+        entries.forEach(entry => {
+            const character = entry.character && this.characterRegistry[entry.character];
+            if (character && !entry.portrait) {
+                entry.portrait = character.portrait;
+            }
+        });
+    }
+
     showErrorMessage() {
         if (this.dialogueStage) {
             this.dialogueStage.innerHTML = `
@@ -119,7 +312,7 @@ class CYOAStory {
     }
 
     displayScene(sceneId) {
-        const scene = this.storyData.scenes.find(s => s.scene === sceneId);
+        const scene = this.getScene(sceneId);
         if (!scene) {
             console.error('Scene not found:', sceneId);
             return;
@@ -179,7 +372,7 @@ class CYOAStory {
         
         this.isRevealing = true;
         
-        const scene = this.storyData.scenes.find(s => s.scene === this.currentScene);
+        const scene = this.getScene(this.currentScene);
         if (!scene) return;
 
         if (this.currentSceneDialogueIndex < scene.dialogue.length - 1) {
@@ -309,8 +502,8 @@ class CYOAStory {
                 const portrait = document.createElement('div');
                 portrait.className = 'character-portrait';
                 
-                // Add character portrait image
-                portrait.innerHTML = `<img src="${entry.portrait}" alt="${entry.name}" onerror="this.style.display='none'">`;
+                // Add character portrait image (start-scene portraits are preloaded by the page)
+                portrait.innerHTML = `<img src="${entry.portrait}" alt="${entry.name}" decoding="async" width="120" height="120" onerror="this.style.display='none'">`;
                 
                 // Apply hidden modifier if specified
                 if (entry.modifiers?.hidden === true) {
@@ -676,7 +869,7 @@ class CYOAStory {
     
     showAllContent() {
         // Show all dialogue elements in the current scene
-        const scene = this.storyData.scenes.find(s => s.scene === this.currentScene);
+        const scene = this.getScene(this.currentScene);
         if (scene) {
             const dialogueElements = this.dialogueStage.children;
             const startIndex = dialogueElements.length - scene.dialogue.length;
@@ -4,7 +4,8 @@
 
 document.addEventListener('DOMContentLoaded', function() {
   // Get all dialogue containers
-  const dialogueContainers = document.querySelectorAll('.dialogue-container, .dialogue-container-right, .dialogue-simple');
+  const dialogueSelector = '.dialogue-container, .dialogue-container-right, .dialogue-simple';
+  const dialogueContainers = Array.from(document.querySelectorAll(dialogueSelector));
   let currentDialogueIndex = 0;
   let endSectionsRevealed = false; // Flag to track if end sections have been revealed
   
@@ -13,6 +14,18 @@ document.addEventListener('DOMContentLoaded', function() {
   const questSections = document.querySelectorAll('#quest-section'); // Get all elements with ID "quest-section"
   const endOfChapter = document.getElementById('end-of-prologue');
   
+  // Hide a dialogue until it is revealed
+  function hideDialogue(container) {
+    container.style.opacity = '0';
+    container.style.transform = 'translateY(20px)';
+    container.style.position = 'absolute';
+    container.style.top = '0';
+    container.style.left = '0';
+    container.style.right = '0';
+    container.style.pointerEvents = 'none';
+    container.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
+  }
+
   // Hide all dialogues except the first one
   dialogueContainers.forEach((container, index) => {
     if (index === 0) {
@@ -24,14 +37,7 @@ document.addEventListener('DOMContentLoaded', function() {
       container.style.marginBottom = '1rem';
     } else {
       // Hide all other dialogues
-      container.style.opacity = '0';
-      container.style.transform = 'translateY(20px)';
-      container.style.position = 'absolute';
-      container.style.top = '0';
-      container.style.left = '0';
-      container.style.right = '0';
-      container.style.pointerEvents = 'none';
-      container.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
+      hideDialogue(container);
     }
   });
   
@@ -41,9 +47,81 @@ document.addEventListener('DOMContentLoaded', function() {
     dialogueStage.style.position = 'relative';
     dialogueStage.style.minHeight = '300px';
   }
+
+  // =============================================================
+  // Segmented stories: later dialogue is fetched as fragments
+  // =============================================================
+
+  const segmentBase = dialogueStage?.dataset.segmentBase || '';
+  const segmentCount = parseInt(dialogueStage?.dataset.segmentCount || '0', 10) || 0;
+  const segmentRequests = {};
+  let nextSegment = 1;
+  let segmentLoading = null;
+
+  function fetchSegment(index) {
+    if (!segmentRequests[index]) {
+      segmentRequests[index] = fetch(`${segmentBase}${index}.html`).then(response => {
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        return response.text();
+      });
+      // Allow a retry on the next click if this request fails
+      segmentRequests[index].catch(() => { delete segmentRequests[index]; });
+    }
+    return segmentRequests[index];
+  }
+
+  // Append the next segment's dialogue (hidden) to the stage
+  function loadNextSegment() {
+    if (nextSegment > segmentCount) return Promise.resolve(false);
+    if (segmentLoading) return segmentLoading;
+
+    const index = nextSegment;
+    segmentLoading = fetchSegment(index)
+      .then(html => {
+        const wrapper = document.createElement('div');
+        wrapper.innerHTML = html;
+        Array.from(wrapper.children).forEach(node => {
+          dialogueStage.appendChild(node);
+          if (node.matches(dialogueSelector)) {
+            hideDialogue(node);
+            dialogueContainers.push(node);
+          }
+        });
+        nextSegment = index + 1;
+        return true;
+      })
+      .catch(error => {
+        console.error('Error loading dialogue segment:', error);
+        return false;
+      })
+      .finally(() => { segmentLoading = null; });
+    return segmentLoading;
+  }
+
+  async function loadAllSegments() {
+    while (nextSegment <= segmentCount) {
+      if (!(await loadNextSegment())) return;
+    }
+  }
+
+  // Warm the next segment before the reader reaches it
+  function prefetchSegment() {
+    if (nextSegment <= segmentCount && dialogueContainers.length - currentDialogueIndex <= 5) {
+      fetchSegment(nextSegment).catch(() => {});
+    }
+  }
   
   // Function to show next dialogue
-  function showNextDialogue() {
+  async function showNextDialogue() {
+    if (currentDialogueIndex >= dialogueContainers.length - 1 && nextSegment <= segmentCount) {
+      const waitingAt = currentDialogueIndex;
+      // Keep the end sections hidden until the remaining dialogue has arrived
+      if (!(await loadNextSegment())) return;
+      // Clicks during the load share one request; only the first one advances
+      if (currentDialogueIndex !== waitingAt) return;
+    }
+    prefetchSegment();
+
     if (currentDialogueIndex < dialogueContainers.length - 1) {
       // Show next dialogue (keep previous ones visible)
       currentDialogueIndex++;
@@ -115,7 +193,9 @@ document.addEventListener('DOMContentLoaded', function() {
   }
   
   // Function to skip to the end and show quest section
-  function skipToEnd() {
+  async function skipToEnd() {
+    await loadAllSegments();
+
     // Show all dialogues
     dialogueContainers.forEach(container => {
       container.style.opacity = '1';
@@ -173,7 +253,11 @@ document.addEventListener('DOMContentLoaded', function() {
   
   // Skip button functionality
   if (skipButton) {
-    skipButton.addEventListener('click', function() {
+    skipButton.addEventListener('click', async function() {
+      // Set flag to disable further clicks while remaining segments load
+      endSectionsRevealed = true;
+      await loadAllSegments();
+
       // Show all dialogues at once
       dialogueContainers.forEach(container => {
         container.style.opacity = '1';
@@ -313,3 +397,19 @@ style.textContent = `
   }
 `;
 document.head.appendChild(style);
+
+// =============================================================
+// Offline support - register the story service worker and ask it to
+// precache this chapter and its neighbours (see /sw.js)
+// =============================================================
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('../sw.js', { scope: '../' })
+      .then(() => navigator.serviceWorker.ready)
+      .then((registration) => {
+        const page = decodeURIComponent(location.pathname.split('/').pop() || '');
+        registration.active?.postMessage({ type: 'prefetch', page });
+      })
+      .catch((error) => console.warn('Story service worker registration failed:', error));
+  });
+}
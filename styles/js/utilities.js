@@ -181,9 +181,24 @@ charadex.tools = {
   // Will replace the entire div
   loadIncludedFiles() {
     const applyBasePath = charadex.tools.applyBasePath.bind(charadex.tools);
+
+    // Includes inlined at build time (tools/prerender_includes.py) are already
+    // in the page; only announce them
+    $("[data-include]").each(function () {
+      const root = this;
+      const source = root.dataset.include;
+      root.removeAttribute('data-include');
+      applyBasePath(document);
+      document.dispatchEvent(new CustomEvent('charadex:includeLoaded', {
+        detail: { source, dataset: { source }, nodes: [root], root }
+      }));
+    });
+
     $(".load-html").each(function () {
       const placeholder = this;
       const datasetCopy = { ...placeholder.dataset };
+      // Placeholder already filled with content: nothing to fetch
+      if (placeholder.childElementCount) return;
       $.get(placeholder.dataset.source)
         .done(function (data) {
           const wrapper = document.createElement('div');
@@ -649,6 +664,51 @@ charadex.manageData = {
 
 
 
+/* ==================================================================== */
+/* Quest Catalog
+/* ====================================================================  /
+
+  Rewards granted by each story, from prompts/quest-catalog.json
+  (built by tools/quest_catalog.py). Items are keyed with scrub().
+
+======================================================================= */
+charadex.questCatalog = {
+
+  url: 'prompts/quest-catalog.json',
+  request: null,
+
+  // Fetch the catalog once per page
+  load() {
+    if (!this.request) {
+      this.request = fetch(charadex.tools.resolveRelativeUrl(this.url))
+        .then(response => response.ok ? response.json() : null)
+        .catch(() => null);
+    }
+    return this.request;
+  },
+
+  // [{ story, quantity, quests }] for every story granting the item
+  async storiesForReward(itemName) {
+    const catalog = await this.load();
+    const entry = catalog?.items?.[charadex.tools.scrub(itemName)];
+    if (!entry) return [];
+    return Object.entries(entry.stories).map(([story, quantity]) => ({
+      story,
+      quantity,
+      quests: catalog.stories[story]?.quests || []
+    }));
+  },
+
+  // Quests (with parsed rewards) of one story page, e.g. 'slimeHunt.html'
+  async questsForStory(story) {
+    const catalog = await this.load();
+    return catalog?.stories?.[story]?.quests || [];
+  }
+
+}
+
+
+
 /* ==================================================================== */
 /* Import Sheet
 /* ====================================================================  /
@@ -0,0 +1,151 @@
+// =============================================================
+// Story Service Worker - precaches story pages from
+// prompts/precache-manifest.json (see tools/update_prompt_index.py)
+// =============================================================
+
+const CACHE_NAME = 'charadex-stories-v1';
+const MANIFEST_URL = new URL('prompts/precache-manifest.json', self.registration.scope).href;
+// Every manifest entry lives under one of these (tools/update_prompt_index.py);
+// other requests go straight to the network without waiting for the manifest
+const PRECACHE_DIRS = ['prompts/', 'styles/', 'includes/', 'assets/'];
+
+let manifestPromise = null;
+let currentManifest = null;
+
+// Fetch the manifest fresh; fall back to the last copy when offline
+function loadManifest(refresh = false) {
+  if (!manifestPromise || refresh) {
+    manifestPromise = fetch(MANIFEST_URL, { cache: 'no-cache' })
+      .then(async (response) => {
+        if (!response.ok) throw new Error(`Manifest fetch failed (${response.status})`);
+        const cache = await caches.open(CACHE_NAME);
+        await cache.put(MANIFEST_URL, response.clone());
+        return response.json();
+      })
+      .catch(async () => {
+        const cached = await caches.match(MANIFEST_URL);
+        return cached ? cached.json() : null;
+      })
+      .then((manifest) => {
+        if (manifest) currentManifest = manifest;
+        return manifest;
+      });
+  }
+  return manifestPromise;
+}
+
+// Manifest for serving requests: whatever copy is at hand, refreshed in the background
+async function servingManifest(event) {
+  if (currentManifest) return currentManifest;
+  const cached = await caches.match(MANIFEST_URL);
+  if (!cached) return loadManifest();
+  event.waitUntil(loadManifest());
+  return currentManifest || cached.json();
+}
+
+function mayBePrecached(url) {
+  if (!url.startsWith(self.registration.scope)) return false;
+  const path = url.slice(self.registration.scope.length);
+  return PRECACHE_DIRS.some((dir) => path.startsWith(dir));
+}
+
+// Cache key carries the content hash so a changed file is never served stale
+function versionedKey(manifest, url) {
+  const path = url.startsWith(self.registration.scope) ? url.slice(self.registration.scope.length) : null;
+  const hash = path && manifest?.hashes?.[path.split('?')[0]];
+  return hash ? `${self.registration.scope}${path}?v=${hash}` : null;
+}
+
+// Manifest hashes are the first hex digits of the file's SHA-256
+async function matchesHash(response, hash) {
+  const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', await response.arrayBuffer()));
+  const hex = Array.from(digest, (byte) => byte.toString(16).padStart(2, '0')).join('');
+  return hex.startsWith(hash);
+}
+
+// Revalidate past the HTTP cache (GitHub Pages allows 10 minutes) so an old
+// body is never stored under the new hash; a mismatch is served but not kept
+async function fetchVersioned(url, key) {
+  const response = await fetch(url, { cache: 'no-cache' });
+  if (response.ok && await matchesHash(response.clone(), new URL(key).searchParams.get('v'))) {
+    const cache = await caches.open(CACHE_NAME);
+    await cache.put(key, response.clone());
+  }
+  return response;
+}
+
+async function precache(manifest, paths) {
+  const cache = await caches.open(CACHE_NAME);
+  await Promise.all(paths.map(async (path) => {
+    const url = new URL(path, self.registration.scope).href;
+    const key = versionedKey(manifest, url);
+    if (!key || await cache.match(key)) return;
+    try {
+      await fetchVersioned(url, key);
+    } catch (error) {
+      // Best effort: a missing file is fetched normally later
+    }
+  }));
+}
+
+// Current page, its chapter neighbours and everything they load
+function pageGroup(manifest, pageName) {
+  const names = [pageName, ...(manifest.pages[pageName]?.neighbours || [])];
+  return names.flatMap((name) => {
+    const page = manifest.pages[name];
+    return page ? [page.url, ...page.assets] : [];
+  });
+}
+
+async function pruneCache(manifest) {
+  const cache = await caches.open(CACHE_NAME);
+  const keys = await cache.keys();
+  await Promise.all(keys.map((request) => {
+    const url = new URL(request.url);
+    const version = url.searchParams.get('v');
+    const path = url.href.slice(self.registration.scope.length).split('?')[0];
+    if (version && manifest.hashes[path] !== version) return cache.delete(request);
+    return null;
+  }));
+}
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const manifest = await loadManifest(true);
+    if (manifest) await precache(manifest, manifest.shared);
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const manifest = await loadManifest();
+    if (manifest) await pruneCache(manifest);
+    await self.clients.claim();
+  })());
+});
+
+// Pages post { type: 'prefetch', page: 'Act2-Chapter6.html' } once loaded
+self.addEventListener('message', (event) => {
+  if (event.data?.type !== 'prefetch') return;
+  event.waitUntil((async () => {
+    const manifest = await loadManifest(true);
+    if (!manifest) return;
+    await precache(manifest, [...manifest.shared, ...pageGroup(manifest, event.data.page)]);
+    await pruneCache(manifest);
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  if (event.request.method !== 'GET' || !mayBePrecached(event.request.url)) return;
+  event.respondWith((async () => {
+    const manifest = await servingManifest(event);
+    const key = versionedKey(manifest, event.request.url);
+    if (!key) return fetch(event.request);
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(key);
+    if (cached) return cached;
+    // By URL: a navigation request cannot be re-issued with other cache options
+    return fetchVersioned(event.request.url, key);
+  })());
+});
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# tools/build_indexes.py
+"""
+Build inverted filter/search indexes from the sheet snapshots in `data/`.
+
+For every indexed page this writes `data/indexes/<page>.json`:
+
+    {"version": 1, "page": "masterlist", "key": "design",
+     "ids": ["PUF-0001", ...],                # row id -> row key (null = removed)
+     "facets": {"species": {"puffling": [0, 3, ...]}, "trait": {...}, ...},
+     "tokens": {"alpha": [0], "puf0001": [0], ...}}
+
+Row ids are stable integers: a row keeps its id across rebuilds and new rows get
+the next free one, so every posting list stays sorted and the client can filter
+by intersecting id lists. Facet values and search tokens use the same scrub
+normalization as `charadex.tools.scrub`.
+
+`data/indexes/owners.json` maps each scrubbed owner name to the masterlist ids
+they own and the items ids they hold in their inventory.
+
+Rebuilds are incremental: a per-row digest of the indexed terms is kept under
+`data/indexes/.state/`, and only rows whose terms changed are re-posted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sys
+from bisect import bisect_left
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[build_indexes] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+SNAPSHOT_DIR = ROOT / "data"
+INDEX_VERSION = 1
+
+# Page -> row key column, facet fields and free-text search fields.
+# A facet spec of (column, True) splits comma-separated values (e.g. traits).
+INDEX_SPECS = {
+    "masterlist": {
+        "key": "design",
+        "facets": {
+            "species": ("species", False),
+            "rarity": ("rarity", False),
+            "type": ("type", False),
+            "designtype": ("designtype", False),
+            "status": ("status", False),
+            "owner": ("owner", False),
+            "trait": ("traits", True),
+        },
+        "search": ["design", "name", "owner", "designer", "artist"],
+    },
+    "items": {
+        "key": "id",
+        "facets": {
+            "type": ("type", False),
+            "rarity": ("rarity", False),
+            "collectibletype": ("collectibletype", False),
+        },
+        "search": ["item", "rarity"],
+    },
+    "traits": {
+        "key": "id",
+        "facets": {
+            "type": ("type", False),
+            "rarity": ("rarity", False),
+        },
+        "search": ["trait", "rarity"],
+    },
+}
+
+VARIANT_SUFFIX = re.compile(r"\s*\(([st])\)\s*$", re.I)
+
+
+def scrub(value) -> str:
+    """Python twin of charadex.tools.scrub for strings."""
+    return re.sub(r"[^a-z0-9]", "", str(value if value is not None else "").lower())
+
+
+def tokenize(value) -> list[str]:
+    """Search tokens for a field: each word plus the fully scrubbed value."""
+    text = str(value if value is not None else "").lower()
+    tokens = [tok for tok in re.split(r"[^a-z0-9]+", text) if tok]
+    whole = scrub(text)
+    if whole and whole not in tokens:
+        tokens.append(whole)
+    return tokens
+
+
+def load_json(path: Path, default=None):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+
+def snapshot_records(snapshot: dict) -> list[dict]:
+    columns = snapshot["columns"]
+    return [dict(zip(columns, row)) for row in snapshot["rows"]]
+
+
+# ---------------------- Terms ----------------------
+def row_terms(row: dict, spec: dict) -> list[str]:
+    """Flatten a row into facet ("f:<facet>:<value>") and token ("t:<tok>") terms."""
+    terms = []
+    for facet, (column, multi) in spec["facets"].items():
+        raw = row.get(column, "")
+        values = str(raw).split(",") if multi else [raw]
+        for value in values:
+            scrubbed = scrub(value)
+            if scrubbed:
+                terms.append(f"f:{facet}:{scrubbed}")
+    for column in spec["search"]:
+        terms.extend(f"t:{tok}" for tok in tokenize(row.get(column, "")))
+    return sorted(set(terms))
+
+
+def terms_digest(terms: list[str]) -> str:
+    return hashlib.sha1("\n".join(terms).encode("utf-8")).hexdigest()[:12]
+
+
+def _postings_for(index: dict, term: str, create: bool):
+    kind, _, rest = term.partition(":")
+    if kind == "f":
+        facet, _, value = rest.partition(":")
+        bucket = index["facets"].setdefault(facet, {}) if create else index["facets"].get(facet)
+        key = value
+    else:
+        bucket = index["tokens"]
+        key = rest
+    if bucket is None:
+        return None, None, None
+    if create:
+        return bucket, key, bucket.setdefault(key, [])
+    return bucket, key, bucket.get(key)
+
+
+def _add_posting(index: dict, term: str, row_id: int) -> None:
+    _bucket, _key, postings = _postings_for(index, term, create=True)
+    if not postings or postings[-1] < row_id:
+        postings.append(row_id)  # fast path: full builds assign ids in order
+        return
+    pos = bisect_left(postings, row_id)
+    if pos == len(postings) or postings[pos] != row_id:
+        postings.insert(pos, row_id)
+
+
+def _remove_posting(index: dict, term: str, row_id: int) -> None:
+    bucket, key, postings = _postings_for(index, term, create=False)
+    if not postings:
+        return
+    pos = bisect_left(postings, row_id)
+    if pos < len(postings) and postings[pos] == row_id:
+        del postings[pos]
+    if not postings:
+        del bucket[key]
+
+
+# ---------------------- Build ----------------------
+def empty_index(page: str, spec: dict) -> dict:
+    return {
+        "version": INDEX_VERSION,
+        "page": page,
+        "key": spec["key"],
+        "ids": [],
+        "facets": {},
+        "tokens": {},
+    }
+
+
+def update_index(index: dict, state: dict, records: list[dict], spec: dict):
+    """Bring index/state in line with records; return (changed, removed) counts.
+
+    `state` maps row key -> {"id", "digest", "terms"} from the previous build.
+    Starting from an empty index and state performs a full build.
+    """
+    key_column = spec["key"]
+    seen = set()
+    changed = 0
+    for row in records:
+        key = str(row.get(key_column, "") or "")
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        terms = row_terms(row, spec)
+        digest = terms_digest(terms)
+        previous = state.get(key)
+        if previous and previous["digest"] == digest:
+            continue
+        if previous:
+            row_id = previous["id"]
+            for term in previous["terms"]:
+                _remove_posting(index, term, row_id)
+        else:
+            row_id = len(index["ids"])
+            index["ids"].append(key)
+        for term in terms:
+            _add_posting(index, term, row_id)
+        state[key] = {"id": row_id, "digest": digest, "terms": terms}
+        changed += 1
+
+    removed = 0
+    for key in [k for k in state if k not in seen]:
+        previous = state.pop(key)
+        for term in previous["terms"]:
+            _remove_posting(index, term, previous["id"])
+        index["ids"][previous["id"]] = None
+        removed += 1
+    return changed, removed
+
+
+def build_page_index(page: str, snapshot: dict, index_dir: Path, full: bool = False) -> dict:
+    spec = INDEX_SPECS[page]
+    index_path = index_dir / f"{page}.json"
+    state_path = index_dir / ".state" / f"{page}.json"
+
+    index = None if full else load_json(index_path)
+    state = None if full else load_json(state_path)
+    if (
+        not index or state is None
+        or index.get("version") != INDEX_VERSION
+        or index.get("key") != spec["key"]
+    ):
+        index, state = empty_index(page, spec), {}
+
+    changed, removed = update_index(index, state, snapshot_records(snapshot), spec)
+    index["source_hash"] = snapshot.get("hash")
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(
+        json.dumps(index, ensure_ascii=False, separators=(",", ":"), sort_keys=True),
+        encoding="utf-8",
+    )
+    state_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+    log(f"{page}: re-indexed {changed} row(s), removed {removed}, {len(index['ids'])} id(s) total")
+    return index
+
+
+def item_lookup(items_index: dict, items_snapshot: dict) -> dict:
+    """Map scrubbed item ids/names to their row id in the items index."""
+    ids = {key: row_id for row_id, key in enumerate(items_index["ids"]) if key is not None}
+    lookup = {}
+    for row in snapshot_records(items_snapshot):
+        row_id = ids.get(str(row.get("id", "") or ""))
+        if row_id is None:
+            continue
+        for candidate in (row.get("id"), row.get("item")):
+            scrubbed = scrub(candidate)
+            if scrubbed:
+                lookup.setdefault(scrubbed, row_id)
+    return lookup
+
+
+def build_owner_index(masterlist_index, items_index, items_snapshot, inventory_snapshot) -> dict:
+    owners = {}
+    if masterlist_index:
+        for owner, postings in masterlist_index["facets"].get("owner", {}).items():
+            owners.setdefault(owner, {})["pufflings"] = list(postings)
+    if items_index and items_snapshot and inventory_snapshot:
+        lookup = item_lookup(items_index, items_snapshot)
+        for row in snapshot_records(inventory_snapshot):
+            owner = scrub(row.get("username"))
+            if not owner:
+                continue
+            held = set()
+            for column, qty in row.items():
+                if column == "username" or qty in ("", None, 0, "0", False):
+                    continue
+                row_id = lookup.get(scrub(VARIANT_SUFFIX.sub("", column)))
+                if row_id is not None:
+                    held.add(row_id)
+            if held:
+                owners.setdefault(owner, {})["items"] = sorted(held)
+    return {"version": INDEX_VERSION, "owners": dict(sorted(owners.items()))}
+
+
+def build_all(snapshot_dir: Path = SNAPSHOT_DIR, full: bool = False) -> dict:
+    index_dir = snapshot_dir / "indexes"
+    snapshots = {
+        page: load_json(snapshot_dir / f"{page}.json")
+        for page in (*INDEX_SPECS, "inventory")
+    }
+    indexes = {}
+    for page in INDEX_SPECS:
+        if snapshots[page] is None:
+            log(f"Skipping {page}: no snapshot in {snapshot_dir}")
+            continue
+        indexes[page] = build_page_index(page, snapshots[page], index_dir, full=full)
+
+    owners = build_owner_index(
+        indexes.get("masterlist"), indexes.get("items"),
+        snapshots.get("items"), snapshots.get("inventory"),
+    )
+    index_dir.mkdir(parents=True, exist_ok=True)
+    (index_dir / "owners.json").write_text(
+        json.dumps(owners, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+    log(f"Wrote owner index for {len(owners['owners'])} owner(s)")
+    return indexes
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--full"]
+    snapshot_dir = Path(args[0]) if args else SNAPSHOT_DIR
+    log(f"Starting index build from {snapshot_dir}")
+    build_all(snapshot_dir, full="--full" in sys.argv[1:])
+    log(f"Completed index build -> {snapshot_dir / 'indexes'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# tools/build_inventories.py
+"""
+Build prejoined per-user inventory shards from the inventory, items and
+collectibles sheets.
+
+This does offline what `charadex.manageData.inventoryFix` does in the browser:
+every inventory column (`apple`, `apple(s)`, `apple(t)`, ... once the sheet
+headers are normalized the way charadex.importSheet does) is matched to an item
+once, using the same id/name scrub rules, and soulbound/tradeable variants are
+resolved up front. Output goes to `data/inventories/`:
+
+    index.json        {"version": 1, "users": {"Alice": "alice.json", ...}}
+    <user>.json       {"version": 1, "username": "Alice",
+                       "profile": {...non-item columns...},
+                       "entries": [{"item": "apple", "quantity": "2",
+                                    "column": "apple(s)", "variant": "s",
+                                    "label": "Apple (Soulbound)"}, ...],
+                       "items": {"apple": {...item row...}, ...}}
+
+Each shard carries only the items that user holds, so an inventory page needs
+one small fetch and no joins.
+
+Reads the snapshots written by `export_sheets.py` (default `data/`), or raw
+sheet files via `--fake DIR` (same layout as `export_sheets.py --fake`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import re
+import shutil
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[build_inventories] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = Path(__file__).resolve().parent
+SNAPSHOT_DIR = ROOT / "data"
+OUTPUT_SUBDIR = "inventories"
+SHARD_VERSION = 1
+
+VARIANT_SUFFIX = re.compile(r"\s*\(([st])\)\s*$", re.I)
+VARIANT_LABELS = {"s": "Soulbound", "t": "Tradeable"}
+
+
+def load_module(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+EXPORT_MODULE = load_module(TOOLS_DIR / "export_sheets.py", "export_sheets")
+
+
+def scrub(value) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(value if value is not None else "").lower())
+
+
+def create_key(value) -> str:
+    """Python twin of charadex.tools.createKey."""
+    return str(value if value is not None else "").lower().replace(" ", "")
+
+
+# ---------------------- Loading ----------------------
+def load_from_snapshots(snapshot_dir: Path) -> dict:
+    data = {}
+    for page in ("inventory", "items", "collectibles"):
+        path = snapshot_dir / f"{page}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Missing {page} snapshot: {path}")
+        snapshot = json.loads(path.read_text(encoding="utf-8"))
+        data[page] = EXPORT_MODULE.snapshot_records(snapshot)
+    return data
+
+
+def load_from_fake(folder: Path) -> dict:
+    _sheet_id, sheet_pages = EXPORT_MODULE.read_sheet_config()
+    source = EXPORT_MODULE.FakeSheetSource(folder)
+    return {
+        page: EXPORT_MODULE.rows_to_records(source.fetch(sheet_pages[page]))
+        for page in ("inventory", "items", "collectibles")
+    }
+
+
+# ---------------------- Matching ----------------------
+class ItemResolver:
+    """Resolves inventory column labels to items with dictionary lookups.
+
+    Matches what inventoryFix's `items.find` returns: the first item, in sheet
+    order, whose lowercase id, scrubbed id, scrubbed name or createKey name
+    equals the label's. Each table keeps the first item per key, so the
+    earliest of the four candidates is that item.
+    """
+
+    def __init__(self, items: list[dict], collectibles: list[dict]):
+        self.items = list(items)
+        # key -> index into self.items of the first item with that key
+        self.by_id = {}
+        self.by_id_scrubbed = {}
+        self.by_name_scrubbed = {}
+        self.by_name_keyed = {}
+        for index, item in enumerate(self.items):
+            item_id = str(item.get("id", "") or "").lower()
+            name = item.get("item", "") or ""
+            if item_id:
+                self.by_id.setdefault(item_id, index)
+            if scrub(item_id):
+                self.by_id_scrubbed.setdefault(scrub(item_id), index)
+            if scrub(name):
+                self.by_name_scrubbed.setdefault(scrub(name), index)
+            if create_key(name):
+                self.by_name_keyed.setdefault(create_key(name), index)
+
+        self.collectible_types = {}
+        for row in collectibles:
+            ctype = row.get("collectibletype", "")
+            name = row.get("item", "") or ""
+            if ctype:
+                for key in (scrub(name), create_key(name)):
+                    if key:
+                        self.collectible_types.setdefault(key, ctype)
+
+    def resolve(self, label: str):
+        """Return (item, variant code or None) for an inventory column label."""
+        match = VARIANT_SUFFIX.search(label)
+        variant = match.group(1).lower() if match else None
+        base = label[:match.start()].strip() if match else label
+        if not base:
+            return None, variant
+        candidates = [
+            index for index in (
+                self.by_id.get(base.lower()),
+                self.by_id_scrubbed.get(scrub(base)),
+                self.by_name_scrubbed.get(scrub(base)),
+                self.by_name_keyed.get(create_key(base)),
+            )
+            if index is not None
+        ]
+        return (self.items[min(candidates)] if candidates else None), variant
+
+    def item_record(self, item: dict) -> dict:
+        record = {key: value for key, value in item.items() if value not in ("", None)}
+        if str(item.get("type", "")).lower() == "collectible":
+            ctype = (
+                self.collectible_types.get(scrub(item.get("item")))
+                or self.collectible_types.get(create_key(item.get("item")))
+            )
+            if ctype:
+                record["collectibletype"] = ctype
+        return record
+
+
+def item_key(item: dict) -> str:
+    return str(item.get("id", "") or "") or scrub(item.get("item"))
+
+
+# ---------------------- Build ----------------------
+def build_shards(data: dict) -> dict:
+    """Return {username: shard dict} for every inventory row."""
+    resolver = ItemResolver(data["items"], data["collectibles"])
+    column_cache = {}
+    shards = {}
+    for row in data["inventory"]:
+        username = str(row.get("username", "") or "").strip()
+        if not username:
+            continue
+        entries = []
+        items = {}
+        profile = {}
+        for column, value in row.items():
+            if column not in column_cache:
+                column_cache[column] = resolver.resolve(column)
+            item, variant = column_cache[column]
+            if item is None:
+                if column != "hide" and value not in ("", None):
+                    profile[column] = value
+                continue
+            if value in ("", None):
+                continue
+            key = item_key(item)
+            if key not in items:
+                items[key] = resolver.item_record(item)
+            name = item.get("item") or column
+            entry = {"item": key, "quantity": value, "column": column}
+            if variant:
+                entry["variant"] = variant
+                entry["label"] = f"{name} ({VARIANT_LABELS.get(variant, variant.upper())})"
+            entries.append(entry)
+        shards[username] = {
+            "version": SHARD_VERSION,
+            "username": username,
+            "profile": profile,
+            "entries": entries,
+            "items": items,
+        }
+    matched = sum(1 for item, _variant in column_cache.values() if item is not None)
+    log(f"Resolved {matched} of {len(column_cache)} inventory column(s) to items")
+    return shards
+
+
+def write_shards(shards: dict, out_dir: Path) -> Path:
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {}
+    used = set()
+    for username, shard in sorted(shards.items()):
+        stem = scrub(username) or "user"
+        candidate = stem
+        n = 1
+        while candidate in used:
+            n += 1
+            candidate = f"{stem}-{n}"
+        used.add(candidate)
+        files[username] = f"{candidate}.json"
+        (out_dir / files[username]).write_text(
+            json.dumps(shard, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+        )
+    index_path = out_dir / "index.json"
+    index_path.write_text(
+        json.dumps({"version": SHARD_VERSION, "users": files}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    return index_path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build prejoined per-user inventory shards.")
+    parser.add_argument("--snapshots", metavar="DIR", default=str(SNAPSHOT_DIR),
+                        help="folder with export_sheets snapshots (default: data/)")
+    parser.add_argument("--fake", metavar="DIR", help="read raw sheet files instead of snapshots")
+    parser.add_argument("--out", metavar="DIR", help="output folder (default: <snapshots>/inventories)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    snapshot_dir = Path(args.snapshots)
+    out_dir = Path(args.out) if args.out else snapshot_dir / OUTPUT_SUBDIR
+    log(f"Starting inventory build -> {out_dir}")
+    data = load_from_fake(Path(args.fake)) if args.fake else load_from_snapshots(snapshot_dir)
+    shards = build_shards(data)
+    index_path = write_shards(shards, out_dir)
+    log(f"Completed inventory build: {len(shards)} user shard(s), index at {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# tools/bulk_import.py
+"""
+Bulk-load pufflings, traits and items into the Charadex PostgreSQL schema.
+
+The per-row BEFORE INSERT triggers in `SQL/createDb.sql` (`gen_puffling_id`,
+`gen_traits_id`, `gen_items_id`) probe the table for every inserted row, which
+makes large loads quadratic and races under concurrent inserts. This loader
+instead:
+
+1. opens one transaction and disables just those id triggers on the target
+   tables (`ALTER TABLE ... DISABLE TRIGGER`, which also takes an exclusive lock
+   so nothing else can insert mid-load; foreign keys stay enforced),
+2. pre-assigns ids in memory with the same rules as the triggers:
+   - pufflings: `<prefix>-NNNN` numbered per `design_type.prefix`, continuing
+     after the highest id already present; an empty prefix uses the name,
+   - traits/items: `slugify(display_name)`, then `slug2`, `slug3`, ... on clashes,
+3. streams the rows in with `COPY ... FROM STDIN`,
+4. re-enables the triggers and commits, so a failure leaves nothing behind.
+
+Rows that already carry a `design`/`id` keep it (useful when migrating the
+existing masterlist). Unlike the trigger, numbers past 9999 are not truncated.
+
+Input files are CSVs whose headers are table column names, e.g.
+
+    python tools/bulk_import.py --dsn postgresql://localhost/pufflings_test \\
+        --traits traits.csv --items items.csv --pufflings pufflings.csv
+
+The DSN defaults to the DATABASE_URL environment variable. Requires psycopg2.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[bulk_import] {message}")
+
+# Table -> (id column, trigger that normally fills it)
+ID_TRIGGERS = {
+    "traits": ("id", "trg_gen_traits_id"),
+    "items": ("id", "trg_gen_items_id"),
+    "pufflings": ("design", "puffling_id_trigger"),
+}
+# Load order; lookup tables (design_type, species, rarity, ...) must already exist
+LOAD_ORDER = ("traits", "items", "pufflings")
+DESIGN_NUMBER_WIDTH = 4
+
+
+def slugify(text) -> str:
+    """Python twin of the SQL slugify(): drop non-alphanumerics, lowercase."""
+    if text is None:
+        return ""
+    return re.sub(r"[^a-zA-Z0-9]+", "", str(text)).lower()
+
+
+# ---------------------- Id allocation ----------------------
+class DesignIdAllocator:
+    """Assigns `<prefix>-NNNN` puffling designs without touching the database per row."""
+
+    def __init__(self, prefixes: dict, next_numbers: dict):
+        # design type name -> prefix ('' means "use the puffling name")
+        self.prefixes = prefixes
+        # prefix -> next free number
+        self.next_numbers = dict(next_numbers)
+
+    def reserve(self, design: str) -> None:
+        """Account for an explicitly supplied design so generated ids skip it."""
+        prefix, sep, number = (design or "").rpartition("-")
+        if sep and prefix in self.next_numbers and number.isdigit():
+            self.next_numbers[prefix] = max(self.next_numbers[prefix], int(number) + 1)
+
+    def assign(self, design_type: str, name: str) -> str:
+        if design_type not in self.prefixes:
+            raise ValueError(f"Unknown design type {design_type!r}")
+        prefix = self.prefixes[design_type]
+        if not prefix:
+            return name
+        number = self.next_numbers.get(prefix, 1)
+        self.next_numbers[prefix] = number + 1
+        return f"{prefix}-{str(number).zfill(DESIGN_NUMBER_WIDTH)}"
+
+
+class SlugIdAllocator:
+    """Assigns trait/item ids the way gen_traits_id/gen_items_id do."""
+
+    def __init__(self, existing_ids):
+        self.taken = set(existing_ids)
+
+    def reserve(self, row_id: str) -> None:
+        self.taken.add(row_id)
+
+    def assign(self, display_name: str) -> str:
+        base = slugify(display_name)
+        if not base:
+            raise ValueError(f"id is empty and display_name slug is empty ({display_name!r})")
+        probe = base
+        n = 1
+        while probe in self.taken:
+            n += 1
+            probe = f"{base}{n}"
+        self.taken.add(probe)
+        return probe
+
+
+# ---------------------- COPY streaming ----------------------
+class CopyStream(io.RawIOBase):
+    """File-like object that feeds CSV-encoded rows to copy_expert lazily."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = b""
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out, lineterminator="\n")
+
+    def readable(self):
+        return True
+
+    def _next_chunk(self) -> bytes:
+        for row in self._rows:
+            self._writer.writerow(row)
+            if self._out.tell() >= 65536:
+                break
+        data = self._out.getvalue().encode("utf-8")
+        self._out.seek(0)
+        self._out.truncate()
+        return data
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def read_csv_rows(path: Path):
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        yield from csv.DictReader(fh)
+
+
+def csv_columns(path: Path) -> list[str]:
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        return next(csv.reader(fh), [])
+
+
+def prepared_rows(table: str, path: Path, allocator, columns: list[str]):
+    """Yield CSV rows (as lists in `columns` order) with ids filled in."""
+    id_column = ID_TRIGGERS[table][0]
+    for row in read_csv_rows(path):
+        if not (row.get(id_column) or "").strip():
+            if table == "pufflings":
+                row[id_column] = allocator.assign(row.get("type"), row.get("name"))
+            else:
+                row[id_column] = allocator.assign(row.get("display_name"))
+        # Empty cells become NULL under COPY ... (FORMAT csv)
+        yield [row.get(col) if row.get(col) != "" else None for col in columns]
+
+
+# ---------------------- Database ----------------------
+def connect(dsn: str):
+    try:
+        import psycopg2
+    except ImportError as exc:
+        raise SystemExit("bulk_import needs psycopg2 (pip install psycopg2-binary)") from exc
+    return psycopg2.connect(dsn)
+
+
+def design_allocator(cur, path: Path | None) -> DesignIdAllocator:
+    cur.execute("SELECT name, COALESCE(prefix, '') FROM design_type")
+    prefixes = dict(cur.fetchall())
+    next_numbers = {}
+    for prefix in sorted({p for p in prefixes.values() if p}):
+        cur.execute(
+            """
+            SELECT COUNT(*),
+                   MAX(NULLIF(regexp_replace(substr(design, length(%s) + 2), '\\D', '', 'g'), '')::bigint)
+            FROM pufflings
+            WHERE design LIKE %s || '-%%'
+            """,
+            (prefix, prefix),
+        )
+        count, highest = cur.fetchone()
+        next_numbers[prefix] = max(count or 0, highest or 0) + 1
+    allocator = DesignIdAllocator(prefixes, next_numbers)
+    if path:
+        for row in read_csv_rows(path):
+            design = (row.get("design") or "").strip()
+            if design:
+                allocator.reserve(design)
+    return allocator
+
+
+def slug_allocator(cur, table: str, path: Path | None) -> SlugIdAllocator:
+    cur.execute(f"SELECT id FROM {table}")
+    allocator = SlugIdAllocator(row[0] for row in cur.fetchall())
+    if path:
+        for row in read_csv_rows(path):
+            row_id = (row.get("id") or "").strip()
+            if row_id:
+                allocator.reserve(row_id)
+    return allocator
+
+
+def bulk_load(conn, sources: dict) -> dict:
+    """Load every {table: csv path} in one transaction; return row counts."""
+    counts = {}
+    tables = [table for table in LOAD_ORDER if sources.get(table)]
+    with conn:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"ALTER TABLE {table} DISABLE TRIGGER {ID_TRIGGERS[table][1]}")
+            for table in tables:
+                path = sources[table]
+                started = time.perf_counter()
+                if table == "pufflings":
+                    allocator = design_allocator(cur, path)
+                else:
+                    allocator = slug_allocator(cur, table, path)
+                columns = csv_columns(path)
+                id_column = ID_TRIGGERS[table][0]
+                if id_column not in columns:
+                    columns = [id_column, *columns]
+                cur.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    CopyStream(prepared_rows(table, path, allocator, columns)),
+                )
+                counts[table] = cur.rowcount
+                log(f"Loaded {cur.rowcount} {table} row(s) in {time.perf_counter() - started:.2f}s")
+            for table in tables:
+                cur.execute(f"ALTER TABLE {table} ENABLE TRIGGER {ID_TRIGGERS[table][1]}")
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load pufflings, traits and items via COPY.")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="PostgreSQL DSN (default: $DATABASE_URL)")
+    for table in LOAD_ORDER:
+        parser.add_argument(f"--{table}", metavar="CSV", type=Path, help=f"CSV of {table} rows")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sources = {table: getattr(args, table) for table in LOAD_ORDER}
+    if not args.dsn:
+        print("Provide a database via --dsn or DATABASE_URL.", file=sys.stderr)
+        sys.exit(1)
+    if not any(sources.values()):
+        print("Nothing to load: pass --pufflings, --traits and/or --items.", file=sys.stderr)
+        sys.exit(1)
+    log("Starting bulk import")
+    conn = connect(args.dsn)
+    try:
+        counts = bulk_load(conn, sources)
+    finally:
+        conn.close()
+    log(f"Completed bulk import: {', '.join(f'{t}={n}' for t, n in counts.items())}")
+
+
+if __name__ == "__main__":
+    main()
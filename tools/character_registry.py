@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# tools/character_registry.py
+"""
+Build the shared character registry (`prompts/characters.json`) from the
+`Characters:` blocks of every story source.
+
+Each character is keyed like the showcase `data-character` attribute
+(`"Poki Jr"` -> `"poki-jr"`). For every field (full body, portrait, profile,
+description) the value most stories agree on becomes the registry value; a
+story whose own line disagrees keeps its value as a per-story override and the
+disagreement is reported as a conflict.
+
+    {"version": 1, "hash": "...",
+     "characters": {"poki": {"name": "Poki", "portrait": "...", ...}, ...}}
+
+With a registry, story sources can list a character by name alone
+(`Poki` instead of `Poki | full | portrait`) and can use registry characters in
+dialogue without listing them at all. CYOA JSON entries whose portrait matches
+the registry carry `"character": "<key>"` instead of repeating the URL.
+
+    python tools/character_registry.py <story.txt or folder> ... [--out FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[character_registry] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+REGISTRY_FILE = ROOT / "prompts" / "characters.json"
+REGISTRY_VERSION = 1
+FIELDS = ("full_body", "portrait", "profile", "description")
+SECTION_HEADERS = ("Dialogue:", "Quest:", "Trivia:")
+
+
+def character_key(name: str) -> str:
+    return name.lower().replace(" ", "-")
+
+
+def parse_character_line(line: str):
+    """Return (name, fields) for a `name | full | portrait | profile | description` line.
+
+    A bare `name` line returns (name, None): a reference to the registry entry.
+    """
+    if not line.strip():
+        return None
+    parts = [p.strip() for p in line.split('|')]
+    if len(parts) == 1:
+        return parts[0], None
+    if len(parts) < 3:
+        return None
+    fields = {}
+    for index, field in enumerate(FIELDS, start=1):
+        value = parts[index] if len(parts) > index else ''
+        fields[field] = value if value and value != '-' else None
+    return parts[0], fields
+
+
+def read_character_lines(path: Path) -> list[str]:
+    """Lines of the `Characters:` block of a story source."""
+    lines = []
+    in_block = False
+    raw = Path(path).read_text(encoding='utf-8-sig')
+    for line in raw.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        s = line.strip()
+        if s == 'Characters:':
+            in_block = True
+            continue
+        if s.startswith(SECTION_HEADERS) or (s.lower().startswith('dialogue') and '|' in s):
+            in_block = False
+        if in_block:
+            lines.append(line)
+    return lines
+
+
+class CharacterRegistry:
+    """Canonical character definitions shared by every story."""
+
+    def __init__(self, characters=None):
+        # key -> {"name", "full_body", "portrait", ...}; missing fields omitted
+        self.characters = dict(characters or {})
+        self.conflicts = []
+
+    @classmethod
+    def from_sources(cls, paths) -> "CharacterRegistry":
+        # key -> field -> Counter(value) over every story that defines the character
+        votes = {}
+        names = {}
+        definitions = []
+        for path in sorted(Path(p) for p in paths):
+            for line in read_character_lines(path):
+                parsed = parse_character_line(line)
+                if not parsed or parsed[1] is None:
+                    continue
+                name, fields = parsed
+                key = character_key(name)
+                names.setdefault(key, name)
+                definitions.append((path.name, key, fields))
+                for field, value in fields.items():
+                    if value:
+                        votes.setdefault(key, {}).setdefault(field, Counter())[value] += 1
+
+        registry = cls()
+        for key, name in names.items():
+            entry = {'name': name}
+            for field in FIELDS:
+                counter = votes.get(key, {}).get(field)
+                if counter:
+                    # most_common keeps first-seen order on ties
+                    entry[field] = counter.most_common(1)[0][0]
+            registry.characters[key] = entry
+        for story, key, fields in definitions:
+            entry = registry.characters[key]
+            for field, value in fields.items():
+                if value and value != entry.get(field):
+                    registry.conflicts.append({
+                        'character': key,
+                        'field': field,
+                        'story': story,
+                        'value': value,
+                        'registry': entry.get(field),
+                    })
+        return registry
+
+    @classmethod
+    def load(cls, path: Path = REGISTRY_FILE) -> "CharacterRegistry":
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        return cls(data.get('characters'))
+
+    def get(self, name: str):
+        """Character fields for `name` in the generators' format, or None."""
+        entry = self.characters.get(character_key(name))
+        if not entry:
+            return None
+        fields = {field: entry.get(field) for field in FIELDS}
+        fields['include_in_showcase'] = bool(fields['full_body'])
+        return fields
+
+    def matches(self, name: str, field: str, value) -> bool:
+        """True when `value` is what the registry already holds for this field."""
+        entry = self.characters.get(character_key(name))
+        return bool(entry) and bool(value) and entry.get(field) == value
+
+    def portrait_reference(self, name: str, portrait):
+        """Registry key to emit instead of `portrait`, or None to keep it inline."""
+        return character_key(name) if self.matches(name, 'portrait', portrait) else None
+
+    def to_json(self) -> str:
+        characters = dict(sorted(self.characters.items()))
+        body = json.dumps(characters, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return json.dumps({
+            'version': REGISTRY_VERSION,
+            'hash': hashlib.sha256(body.encode('utf-8')).hexdigest()[:16],
+            'characters': characters,
+        }, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def write(self, path: Path = REGISTRY_FILE) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.to_json()
+        # Leave the file (and its mtime/ETag) alone when nothing changed
+        if not path.exists() or path.read_text(encoding='utf-8') != text:
+            path.write_text(text, encoding='utf-8')
+        return path
+
+    def report_conflicts(self) -> None:
+        for c in self.conflicts:
+            log(
+                f"Conflict: {c['character']} {c['field']} in {c['story']} is {c['value']!r}, "
+                f"registry has {c['registry']!r} (kept as a per-story override)"
+            )
+
+
+def build_registry(paths, out_path: Path = REGISTRY_FILE) -> CharacterRegistry:
+    registry = CharacterRegistry.from_sources(paths)
+    registry.report_conflicts()
+    path = registry.write(out_path)
+    log(f"Wrote {len(registry.characters)} character(s) to {path} ({len(registry.conflicts)} conflict(s))")
+    return registry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the shared character registry.")
+    parser.add_argument("sources", nargs="+", help="story .txt files or folders of them")
+    parser.add_argument("--out", default=str(REGISTRY_FILE), help="output file (default: prompts/characters.json)")
+    args = parser.parse_args(argv)
+    paths = []
+    for source in map(Path, args.sources):
+        paths.extend(sorted(source.glob("*.txt")) if source.is_dir() else [source])
+    log(f"Starting registry build from {len(paths)} story source(s)")
+    build_registry(paths, Path(args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Write precompressed `.gz` and `.br` siblings for every generated prompt artifact.
+
+Covers the story pages, dialogue segments, CYOA JSON and story bundles under `prompts/` plus
+`prompt-index.json`. Files whose content hash matches the previous run keep their
+existing siblings. After a sync swapped in a fresh `prompts/`, the siblings of
+files identical to the previously published ones are copied over from that set
+instead of being recompressed. A per-file size report is written next to the
+hash state.
+
+Brotli output needs the optional `brotli` package; without it only `.gz` files
+are produced. The sync workflow installs no optional packages, so with
+PRECOMPRESS_OUTPUTS enabled there it writes `.gz` siblings only; add
+`pip install brotli` to the job to publish `.br` as well.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def log(message: str) -> None:
+    print(f"[compress_prompts] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+PROMPTS_DIR = ROOT / "prompts"
+STATE_FILE = ROOT / ".cache" / "precompress-state.json"
+REPORT_FILE = ROOT / ".cache" / "precompress-report.json"
+COMPRESSIBLE_SUFFIXES = {".html", ".json", ".bin"}
+
+
+def compress_gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output byte-identical between runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+
+ENCODERS = {".gz": compress_gzip}
+if brotli is not None:
+    ENCODERS[".br"] = compress_brotli
+
+
+def collect_artifacts(base: Path = PROMPTS_DIR) -> list[Path]:
+    return sorted(
+        path for path in base.rglob("*")
+        if path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+    )
+
+
+def load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def remove_stale_siblings(base: Path, artifacts: list[Path]) -> int:
+    live = {str(path) for path in artifacts}
+    removed = 0
+    for suffix in (".gz", ".br"):
+        for sibling in base.rglob(f"*{suffix}"):
+            source = sibling.with_suffix("")
+            if str(source) not in live or suffix not in ENCODERS:
+                sibling.unlink()
+                removed += 1
+    return removed
+
+
+def carry_sibling(path: Path, data: bytes, sibling: Path, base: Path, previous: Path | None) -> bool:
+    """Copy `sibling` from the previous set when its source there has the same content."""
+    if previous is None:
+        return False
+    old_source = previous / path.relative_to(base)
+    old_sibling = previous / sibling.relative_to(base)
+    if not old_sibling.is_file() or not old_source.is_file() or old_source.read_bytes() != data:
+        return False
+    shutil.copy2(old_sibling, sibling)
+    return True
+
+
+def compress_artifacts(base: Path = PROMPTS_DIR, previous: Path | None = None) -> list[dict]:
+    """Compress every artifact under base and return one report row per file.
+
+    `previous` is the folder `base` replaced (the sync backup); unchanged
+    siblings are taken from there.
+    """
+    artifacts = collect_artifacts(base)
+    state = load_state()
+    new_state = {}
+    report = []
+    reused = 0
+
+    for path in artifacts:
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        key = path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else str(path)
+        new_state[key] = digest
+        row = {"file": key, "raw": len(data)}
+
+        unchanged = state.get(key) == digest
+        kept = 0
+        for suffix, encode in ENCODERS.items():
+            sibling = path.with_name(path.name + suffix)
+            if (unchanged and sibling.exists()) or carry_sibling(path, data, sibling, base, previous):
+                row[suffix.lstrip(".")] = sibling.stat().st_size
+                kept += 1
+                continue
+            payload = encode(data)
+            sibling.write_bytes(payload)
+            row[suffix.lstrip(".")] = len(payload)
+        # Reused only if no sibling had to be written
+        if kept == len(ENCODERS):
+            reused += 1
+        report.append(row)
+
+    removed = remove_stale_siblings(base, artifacts)
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps(new_state, indent=2, sort_keys=True), encoding="utf-8")
+    REPORT_FILE.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    log(
+        f"Compressed {len(artifacts) - reused} file(s), reused {reused}, "
+        f"removed {removed} stale sibling(s)"
+    )
+    return report
+
+
+def format_report(report: list[dict]) -> str:
+    encodings = [suffix.lstrip(".") for suffix in ENCODERS]
+    header = f"{'file':<50} {'raw':>9}" + "".join(f" {enc:>9} {enc + '%':>6}" for enc in encodings)
+    lines = [header]
+    totals = {"raw": 0, **{enc: 0 for enc in encodings}}
+    for row in sorted(report, key=lambda r: r["raw"], reverse=True):
+        line = f"{row['file']:<50} {row['raw']:>9}"
+        totals["raw"] += row["raw"]
+        for enc in encodings:
+            size = row.get(enc, 0)
+            totals[enc] += size
+            ratio = 100 * size / row["raw"] if row["raw"] else 0
+            line += f" {size:>9} {ratio:>5.1f}%"
+        lines.append(line)
+    line = f"{'TOTAL':<50} {totals['raw']:>9}"
+    for enc in encodings:
+        ratio = 100 * totals[enc] / totals["raw"] if totals["raw"] else 0
+        line += f" {totals[enc]:>9} {ratio:>5.1f}%"
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def main(previous: Path | None = None) -> None:
+    log(f"Starting precompression of {PROMPTS_DIR}")
+    if brotli is None:
+        log("brotli package not installed; writing .gz siblings only")
+    report = compress_artifacts(previous=previous)
+    print(format_report(report))
+    log(f"Completed precompression -> {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
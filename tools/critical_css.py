@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# tools/critical_css.py
+"""
+Inline the CSS a story page needs for its first screen and load the rest late.
+
+`inline_critical_css(html, page_dir)` looks at the local stylesheets a page
+links (`../styles/css/*.css`), keeps every rule whose selector matches an
+element above the fold, and writes those rules into one
+`<style data-critical-css>` block in `<head>`. The full stylesheets are then
+loaded with `media="print"` and switched to `all` once they arrive, with a
+`<noscript>` fallback.
+
+"Above the fold" is the markup before the end-of-story sections: the header
+(inlined or still a `load-html` placeholder), the title card and the first
+`FOLD_DIALOGUES` dialogue entries. Selector matching is deliberately generous:
+pseudo-classes are ignored and ancestor parts only need to match somewhere on
+the page, so a rule is never dropped from the critical block because the
+matcher could not follow it.
+
+Remote stylesheets (Bootstrap, Font Awesome, Google Fonts) stay render-blocking
+since they cannot be parsed here. Pages whose dialogue is drawn by a script
+from JSON (`data-story-file`) keep `cyoa-story.css` blocking as well, because
+none of that markup exists at build time.
+
+Parsed stylesheets (by path and mtime), compiled selectors and match results
+are cached on the `CriticalCss` instance, so a sync run parses each stylesheet
+once and mostly reuses match results between pages built from the same
+template.
+
+    python tools/critical_css.py prompts/*.html      # rewrite in place
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+def log(message: str) -> None:
+    print(f"[critical_css] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+FOLD_DIALOGUES = 3
+DIALOGUE_CLASSES = {"dialogue-container", "dialogue-container-right", "dialogue-simple"}
+# Sections prompt.js hides until the story is finished
+BELOW_FOLD_IDS = {"end-of-prologue", "quest-section", "footer"}
+# Stylesheets for markup a script renders later, keyed by the attribute that marks it
+SCRIPT_RENDERED = {"data-story-file": {"cyoa-story.css"}}
+GROUP_AT_RULES = ("@media", "@supports")
+MARKER = "data-critical-css"
+ASYNC_MARKER = "data-async-css"
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+}
+
+COMMENT_PATTERN = re.compile(r"/\*.*?\*/", re.S)
+WHITESPACE = re.compile(r"\s+")
+STYLESHEET_PATTERN = re.compile(r'<link\b[^>]*\brel="stylesheet"[^>]*>')
+HREF_PATTERN = re.compile(r'\bhref="([^"]*)"')
+CSS_URL_PATTERN = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+PSEUDO_PATTERN = re.compile(r"::?[\w-]+(?:\([^)]*\))?")
+COMBINATOR_PATTERN = re.compile(r"\s*[>+~]\s*|\s+")
+COMPOUND_PATTERN = re.compile(
+    r"(?P<tag>^(?:[\w-]+|\*))|#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*[\"']?(?P<value>[^\"'\]]*)[\"']?\s*)?\]"
+)
+ASYNC_LOADER = (
+    f"<script>document.querySelectorAll('link[{ASYNC_MARKER}]').forEach(function(l){{"
+    "function on(){l.media='all';}if(l.sheet)on();else l.addEventListener('load',on);});</script>"
+)
+
+
+# ---------------------- Stylesheets ----------------------
+class Rule:
+    __slots__ = ("kind", "prelude", "selectors", "body", "children")
+
+    def __init__(self, kind, prelude="", body="", children=None):
+        self.kind = kind        # "style", "group" (@media/@supports), "block" (other @rules), "statement"
+        self.prelude = prelude
+        self.selectors = [s.strip() for s in prelude.split(",")] if kind == "style" else []
+        self.body = body
+        self.children = children or []
+
+
+def _block_end(text: str, start: int) -> int:
+    """Index of the `}` closing the block whose body starts at `start`."""
+    depth = 1
+    pos = start
+    while pos < len(text):
+        if text[pos] == "{":
+            depth += 1
+        elif text[pos] == "}":
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    return len(text)
+
+
+def parse_rules(text: str, pos: int = 0, end: int | None = None) -> list[Rule]:
+    end = len(text) if end is None else end
+    rules = []
+    while pos < end:
+        brace = text.find("{", pos, end)
+        semi = text.find(";", pos, end)
+        if brace == -1 and semi == -1:
+            break
+        if semi != -1 and (brace == -1 or semi < brace) and text[pos:semi].strip().startswith("@"):
+            rules.append(Rule("statement", WHITESPACE.sub(" ", text[pos:semi]).strip()))
+            pos = semi + 1
+            continue
+        prelude = WHITESPACE.sub(" ", text[pos:brace]).strip()
+        close = _block_end(text, brace + 1)
+        if prelude.startswith(GROUP_AT_RULES):
+            rules.append(Rule("group", prelude, children=parse_rules(text, brace + 1, close)))
+        else:
+            body = WHITESPACE.sub(" ", text[brace + 1:close]).strip().rstrip(";").strip()
+            rules.append(Rule("block" if prelude.startswith("@") else "style", prelude, body))
+        pos = close + 1
+    return rules
+
+
+def parse_stylesheet(text: str) -> list[Rule]:
+    return parse_rules(COMMENT_PATTERN.sub("", text))
+
+
+@lru_cache(maxsize=None)
+def compile_selector(selector: str):
+    """Selector -> tuple of compound token sets (rightmost last), or None if not understood."""
+    if "\\" in selector:
+        return None
+    stripped = PSEUDO_PATTERN.sub("", selector).strip()
+    compounds = []
+    for part in COMBINATOR_PATTERN.split(stripped):
+        if not part:
+            continue
+        tokens = set()
+        consumed = 0
+        for match in COMPOUND_PATTERN.finditer(part):
+            if match.start() != consumed:
+                return None
+            consumed = match.end()
+            if match.group("tag"):
+                if match.group("tag") != "*":
+                    tokens.add(f"<{match.group('tag').lower()}")
+            elif match.group("id"):
+                tokens.add(f"#{match.group('id')}")
+            elif match.group("cls"):
+                tokens.add(f".{match.group('cls')}")
+            elif match.group("op") == "=":
+                tokens.add(f"[{match.group('attr')}={match.group('value')}")
+            else:
+                tokens.add(f"[{match.group('attr')}")
+        if consumed != len(part):
+            return None
+        compounds.append(frozenset(tokens))
+    return tuple(compounds)
+
+
+# ---------------------- Page scan ----------------------
+def element_signature(tag: str, attrs) -> frozenset:
+    tokens = {f"<{tag}"}
+    for key, value in attrs:
+        if key == "id" and value:
+            tokens.add(f"#{value}")
+        elif key == "class" and value:
+            tokens.update(f".{name}" for name in value.split())
+        elif key != "style":
+            tokens.add(f"[{key}")
+            if value is not None:
+                tokens.add(f"[{key}={value}")
+    return frozenset(tokens)
+
+
+class FoldScanner(HTMLParser):
+    """Collects element signatures for the whole page and for the part above the fold."""
+
+    def __init__(self, include_loader=None):
+        super().__init__()
+        self.include_loader = include_loader
+        self.page = set()
+        self.fold = set()
+        self.markers = set()
+        self.stack = []
+        self.hidden_depth = None
+        self.dialogues = 0
+
+    @property
+    def in_fold(self) -> bool:
+        return self.hidden_depth is None and self.dialogues <= FOLD_DIALOGUES
+
+    def handle_starttag(self, tag, attrs):
+        attr_map = dict(attrs)
+        self.markers.update(key for key in attr_map if key in SCRIPT_RENDERED)
+        if self.hidden_depth is None and attr_map.get("id") in BELOW_FOLD_IDS:
+            self.hidden_depth = len(self.stack)
+        if DIALOGUE_CLASSES & set((attr_map.get("class") or "").split()):
+            self.dialogues += 1
+        signature = element_signature(tag, attrs)
+        self.page.add(signature)
+        if self.in_fold:
+            self.fold.add(signature)
+        if self.include_loader and "load-html" in (attr_map.get("class") or "").split():
+            page, fold = self.include_loader(attr_map.get("data-source") or "")
+            self.page |= page
+            if self.in_fold:
+                self.fold |= fold
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth] == tag:
+                del self.stack[depth:]
+                break
+        if self.hidden_depth is not None and len(self.stack) <= self.hidden_depth:
+            self.hidden_depth = None
+
+
+# ---------------------- Extraction ----------------------
+def local_stylesheet(href: str, page_dir: Path):
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path.endswith(".css"):
+        return None
+    path = (page_dir / parts.path).resolve()
+    return path if path.is_file() else None
+
+
+def rebase_css_urls(css: str, sheet_dir: Path, page_dir: Path) -> str:
+    """Make relative url() references resolve from the page instead of the stylesheet."""
+
+    def rebase(match):
+        url = match.group(2)
+        if urlsplit(url).scheme or url.startswith(("/", "#", "data:")):
+            return match.group(0)
+        target = os.path.relpath(sheet_dir / url, page_dir)
+        return f"url({match.group(1)}{Path(target).as_posix()}{match.group(1)})"
+
+    return CSS_URL_PATTERN.sub(rebase, css)
+
+
+def _with_attrs(link: str, extra: str) -> str:
+    return link[:-2].rstrip() + f" {extra}>" if link.endswith("/>") else link[:-1] + f" {extra}>"
+
+
+class CriticalCss:
+    """Per-run caches: parsed stylesheets, include scans and selector matches."""
+
+    def __init__(self, root: Path = ROOT):
+        self.root = root
+        self._sheets = {}
+        self._includes = {}
+        self._matches = {}
+
+    def stylesheet(self, path: Path) -> list[Rule]:
+        mtime = path.stat().st_mtime_ns
+        cached = self._sheets.get(path)
+        if not cached or cached[0] != mtime:
+            cached = (mtime, parse_stylesheet(path.read_text(encoding="utf-8")))
+            self._sheets[path] = cached
+        return cached[1]
+
+    def include_signatures(self, page_dir: Path, source: str):
+        target = (page_dir / urlsplit(source).path).resolve() if source else None
+        if target is None or not target.is_file():
+            return set(), set()
+        if target not in self._includes:
+            scanner = FoldScanner()
+            scanner.feed(target.read_text(encoding="utf-8"))
+            scanner.close()
+            self._includes[target] = (scanner.page, scanner.fold)
+        return self._includes[target]
+
+    def scan(self, html: str, page_dir: Path) -> FoldScanner:
+        scanner = FoldScanner(lambda source: self.include_signatures(page_dir, source))
+        scanner.feed(html)
+        scanner.close()
+        return scanner
+
+    def is_critical(self, selector: str, fold: frozenset, page: frozenset) -> bool:
+        key = (selector, fold, page)
+        if key not in self._matches:
+            compounds = compile_selector(selector)
+            if compounds is None or not compounds:
+                result = True
+            else:
+                *ancestors, subject = compounds
+                result = any(subject <= sig for sig in fold) and all(
+                    any(compound <= sig for sig in page) for compound in ancestors
+                )
+            self._matches[key] = result
+        return self._matches[key]
+
+    def critical_text(self, rules: list[Rule], fold: frozenset, page: frozenset) -> str:
+        out = []
+        for rule in rules:
+            if rule.kind == "style":
+                keep = [s for s in rule.selectors if self.is_critical(s, fold, page)]
+                if keep and rule.body:
+                    out.append(f"{','.join(keep)}{{{rule.body}}}")
+            elif rule.kind == "group":
+                inner = self.critical_text(rule.children, fold, page)
+                if inner:
+                    out.append(f"{rule.prelude}{{{inner}}}")
+            elif rule.kind == "block":
+                out.append(f"{rule.prelude}{{{rule.body}}}")
+        return "".join(out)
+
+    def inline(self, html: str, page_dir: Path) -> str:
+        """Return `html` with critical CSS inlined and local stylesheets deferred."""
+        if MARKER in html or "</head>" not in html:
+            return html
+        head_end = html.index("</head>")
+        scanner = self.scan(html, page_dir)
+        blocking = set().union(*(SCRIPT_RENDERED[key] for key in scanner.markers))
+        links = []
+        for match in STYLESHEET_PATTERN.finditer(html, 0, head_end):
+            href = HREF_PATTERN.search(match.group(0))
+            path = local_stylesheet(href.group(1), page_dir) if href else None
+            if path and path.name not in blocking and "media=" not in match.group(0):
+                links.append((match, path))
+        if not links:
+            return html
+
+        fold, page = frozenset(scanner.fold), frozenset(scanner.page)
+        critical = "".join(
+            rebase_css_urls(self.critical_text(self.stylesheet(path), fold, page), path.parent, page_dir)
+            for _match, path in links
+        )
+        pieces = []
+        cursor = 0
+        for index, (match, _path) in enumerate(links):
+            pieces.append(html[cursor:match.start()])
+            if index == 0:
+                pieces.append(f"<style {MARKER}>{critical}</style>\n  ")
+            pieces.append(_with_attrs(match.group(0), f'media="print" {ASYNC_MARKER}'))
+            cursor = match.end()
+        fallback = "".join(match.group(0) for match, _path in links)
+        pieces.append(f"\n  {ASYNC_LOADER}<noscript>{fallback}</noscript>")
+        pieces.append(html[cursor:])
+        return "".join(pieces)
+
+
+_DEFAULT = None
+
+
+def inline_critical_css(html: str, page_dir: Path) -> str:
+    """Module-level entry point sharing one cache across calls."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = CriticalCss()
+    return _DEFAULT.inline(html, page_dir)
+
+
+def main(argv=None):
+    paths = [Path(arg) for arg in (argv if argv is not None else sys.argv[1:])]
+    if not paths:
+        print("Usage: python critical_css.py <page.html> ...", file=sys.stderr)
+        sys.exit(1)
+    for path in paths:
+        original = path.read_text(encoding="utf-8")
+        updated = inline_critical_css(original, path.resolve().parent)
+        if updated != original:
+            path.write_text(updated, encoding="utf-8")
+        critical = re.search(rf"<style {MARKER}>(.*?)</style>", updated, re.S)
+        size = len(critical.group(1).encode("utf-8")) if critical else 0
+        log(f"{path}: {size} bytes of critical CSS inlined")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# tools/event_log_maintenance.py
+"""
+Verify, rebuild and archive the `event_log` table.
+
+`inventory` is meant to equal the sum of the `inventory.add`/`inventory.remove`
+deltas in `event_log`. This job streams the log through a server-side cursor in
+`(user_id, occurred_at DESC)` order, which the `idx_log_user_time` index returns
+without a sort, next to a second cursor over `inventory` in `user_id` order. It
+folds one user at a time and compares, so memory stays bounded by a single
+user's items no matter how many rows the log holds.
+
+    python tools/event_log_maintenance.py verify
+    python tools/event_log_maintenance.py rebuild
+    python tools/event_log_maintenance.py archive --before 2025-01-01
+    python tools/event_log_maintenance.py archive --before 2025-01-01 --to-dir archive/
+
+- `verify` reports every (user, item) whose stored qty differs from the fold.
+- `rebuild` also writes the folded quantities back in batched upserts and
+  deletes rows whose fold is zero. Negative folds are reported, never written.
+- `archive` moves whole months older than `--before` out of `event_log`, one
+  transaction per month, either into `event_log_archive_YYYY_MM` tables or into
+  gzip-compressed COPY files (`event_log-YYYY-MM.tsv.gz`). Before a month's
+  inventory deltas leave the table, one `inventory.compact` row per
+  (user, item) carrying their sum is inserted at the start of that month, so
+  `verify` keeps working on the trimmed log.
+
+The DSN defaults to the DATABASE_URL environment variable. Requires psycopg2.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[event_log_maintenance] {message}")
+
+INVENTORY_ACTIONS = ("inventory.add", "inventory.remove")
+COMPACT_ACTION = "inventory.compact"
+FOLD_ACTIONS = (*INVENTORY_ACTIONS, COMPACT_ACTION)
+FETCH_SIZE = 10000
+UPSERT_BATCH = 5000
+MAX_REPORTED = 20
+
+# The fold is a sum, so only the grouping by user matters; DESC matches
+# idx_log_user_time (user_id, occurred_at DESC) and avoids a sort
+FOLD_QUERY = """
+    SELECT user_id, item_id, delta
+    FROM event_log
+    WHERE user_id IS NOT NULL AND item_id IS NOT NULL AND action IN %s
+    ORDER BY user_id, occurred_at DESC
+"""
+INVENTORY_QUERY = "SELECT user_id, item_id, qty FROM inventory ORDER BY user_id, item_id"
+
+
+# ---------------------- Database ----------------------
+def connect(dsn: str):
+    try:
+        import psycopg2
+    except ImportError as exc:
+        raise SystemExit("event_log_maintenance needs psycopg2 (pip install psycopg2-binary)") from exc
+    return psycopg2.connect(dsn)
+
+
+def stream(conn, name: str, query: str, params=None):
+    """Iterate a query through a named (server-side) cursor."""
+    with conn.cursor(name=name) as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(query, params)
+        yield from cur
+
+
+# ---------------------- Folding ----------------------
+def group_by_user(rows):
+    """Collapse (user_id, item_id, value) rows, sorted by user, into (user_id, {item: total})."""
+    current = None
+    totals = {}
+    for user_id, item_id, value in rows:
+        if user_id != current:
+            if current is not None:
+                yield current, totals
+            current, totals = user_id, {}
+        totals[item_id] = totals.get(item_id, 0) + (value or 0)
+    if current is not None:
+        yield current, totals
+
+
+def merge_users(folded, stored):
+    """Merge two user-sorted streams into (user_id, folded totals, stored totals)."""
+    folded, stored = iter(folded), iter(stored)
+    f = next(folded, None)
+    s = next(stored, None)
+    while f is not None or s is not None:
+        if s is None or (f is not None and f[0] < s[0]):
+            yield f[0], f[1], {}
+            f = next(folded, None)
+        elif f is None or s[0] < f[0]:
+            yield s[0], {}, s[1]
+            s = next(stored, None)
+        else:
+            yield f[0], f[1], s[1]
+            f, s = next(folded, None), next(stored, None)
+
+
+def diff_user(folded: dict, stored: dict):
+    """Yield (item_id, stored qty or None, folded qty) for every disagreement."""
+    for item_id in folded.keys() | stored.keys():
+        expected = folded.get(item_id, 0)
+        actual = stored.get(item_id)
+        if actual is None and expected == 0:
+            continue
+        if actual != expected:
+            yield item_id, actual, expected
+
+
+class InventoryWriter:
+    """Buffers inventory corrections and flushes them in batched statements."""
+
+    def __init__(self, conn, batch_size: int = UPSERT_BATCH):
+        from psycopg2.extras import execute_values
+
+        self.conn = conn
+        self.batch_size = batch_size
+        self.execute_values = execute_values
+        self.upserts = []
+        self.deletes = []
+
+    def set(self, user_id, item_id, qty) -> None:
+        if qty == 0:
+            self.deletes.append((user_id, item_id))
+        else:
+            self.upserts.append((user_id, item_id, qty))
+        if len(self.upserts) + len(self.deletes) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.conn.cursor() as cur:
+            if self.upserts:
+                self.execute_values(
+                    cur,
+                    """
+                    INSERT INTO inventory (user_id, item_id, qty) VALUES %s
+                    ON CONFLICT (user_id, item_id) DO UPDATE SET qty = EXCLUDED.qty
+                    """,
+                    self.upserts,
+                    page_size=self.batch_size,
+                )
+            if self.deletes:
+                self.execute_values(
+                    cur,
+                    """
+                    DELETE FROM inventory AS i USING (VALUES %s) AS d (user_id, item_id)
+                    WHERE i.user_id = d.user_id AND i.item_id = d.item_id
+                    """,
+                    self.deletes,
+                    page_size=self.batch_size,
+                )
+        self.conn.commit()
+        self.upserts, self.deletes = [], []
+
+
+def check_inventory(dsn: str, rebuild: bool = False) -> dict:
+    """Fold event_log per user and compare (and optionally fix) inventory."""
+    stats = {"users": 0, "mismatches": 0, "negative": 0, "written": 0}
+    read_conn = connect(dsn)
+    write_conn = connect(dsn) if rebuild else None
+    try:
+        read_conn.set_session(readonly=True)
+        writer = InventoryWriter(write_conn) if rebuild else None
+        folded = group_by_user(stream(read_conn, "event_fold", FOLD_QUERY, (FOLD_ACTIONS,)))
+        stored = group_by_user(stream(read_conn, "inventory_scan", INVENTORY_QUERY))
+        for user_id, totals, current in merge_users(folded, stored):
+            stats["users"] += 1
+            for item_id, actual, expected in diff_user(totals, current):
+                stats["mismatches"] += 1
+                if expected < 0:
+                    stats["negative"] += 1
+                if stats["mismatches"] <= MAX_REPORTED:
+                    log(f"user {user_id} item {item_id}: inventory={actual} events={expected}")
+                if writer and expected >= 0:
+                    writer.set(user_id, item_id, expected)
+                    stats["written"] += 1
+        if writer:
+            writer.flush()
+    finally:
+        read_conn.close()
+        if write_conn is not None:
+            write_conn.close()
+    if stats["mismatches"] > MAX_REPORTED:
+        log(f"... {stats['mismatches'] - MAX_REPORTED} more mismatch(es) not shown")
+    return stats
+
+
+# ---------------------- Archiving ----------------------
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+
+
+def months_to_archive(conn, before: date):
+    """Yield the first day of every month holding archivable events before `before`."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT MIN(occurred_at)::date FROM event_log WHERE occurred_at < %s AND action <> %s",
+            (before, COMPACT_ACTION),
+        )
+        (earliest,) = cur.fetchone()
+    if earliest is None:
+        return
+    month = month_start(earliest)
+    while month < before:
+        yield month
+        month = next_month(month)
+
+
+def compact_month(cur, start: date, end: date) -> int:
+    """Insert one inventory.compact row per (user, item) for the month's deltas."""
+    cur.execute(
+        """
+        INSERT INTO event_log (occurred_at, user_id, item_id, action, delta, details)
+        SELECT %s, user_id, item_id, %s, SUM(delta),
+               jsonb_build_object('events', COUNT(*), 'from', %s::text, 'to', %s::text)
+        FROM event_log
+        WHERE occurred_at >= %s AND occurred_at < %s
+          AND action IN %s AND user_id IS NOT NULL AND item_id IS NOT NULL
+        GROUP BY user_id, item_id
+        """,
+        (start, COMPACT_ACTION, start, end, start, end, INVENTORY_ACTIONS),
+    )
+    return cur.rowcount
+
+
+def archive_month_to_table(cur, start: date, end: date) -> int:
+    table = f"event_log_archive_{start:%Y_%m}"
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {table} (LIKE event_log INCLUDING DEFAULTS)")
+    cur.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM event_log
+            WHERE occurred_at >= %s AND occurred_at < %s AND action <> %s
+            RETURNING *
+        )
+        INSERT INTO {table} SELECT * FROM moved
+        """,
+        (start, end, COMPACT_ACTION),
+    )
+    return cur.rowcount
+
+
+def archive_month_to_file(cur, start: date, end: date, out_dir: Path) -> int:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"event_log-{start:%Y-%m}.tsv.gz"
+    where = cur.mogrify(
+        "occurred_at >= %s AND occurred_at < %s AND action <> %s", (start, end, COMPACT_ACTION)
+    ).decode("utf-8")
+    partial = path.with_suffix(".gz.partial")
+    with gzip.open(partial, "wb", compresslevel=6) as fh:
+        cur.copy_expert(f"COPY (SELECT * FROM event_log WHERE {where} ORDER BY id) TO STDOUT", fh)
+    cur.execute(f"DELETE FROM event_log WHERE {where}")
+    return cur.rowcount
+
+
+def publish_archive_file(start: date, out_dir: Path) -> None:
+    """Move a month's `.partial` file into place once its DELETE has committed."""
+    path = out_dir / f"event_log-{start:%Y-%m}.tsv.gz"
+    partial = path.with_suffix(".gz.partial")
+    if not path.exists():
+        partial.replace(path)
+        return
+    # Late events for an already archived month: gzip members concatenate
+    with path.open("ab") as dest, partial.open("rb") as src:
+        while chunk := src.read(1 << 20):
+            dest.write(chunk)
+    partial.unlink()
+
+
+def archive_events(dsn: str, before: date, out_dir: Path | None = None) -> dict:
+    """Move whole months before `before` out of event_log, one transaction per month."""
+    stats = {"months": 0, "archived": 0, "compacted": 0}
+    conn = connect(dsn)
+    try:
+        for start in list(months_to_archive(conn, month_start(before))):
+            end = next_month(start)
+            started = time.perf_counter()
+            with conn:
+                with conn.cursor() as cur:
+                    compacted = compact_month(cur, start, end)
+                    if out_dir is None:
+                        moved = archive_month_to_table(cur, start, end)
+                    else:
+                        moved = archive_month_to_file(cur, start, end, out_dir)
+            if out_dir is not None:
+                publish_archive_file(start, out_dir)
+            if moved:
+                stats["months"] += 1
+            stats["archived"] += moved
+            stats["compacted"] += compacted
+            log(
+                f"{start:%Y-%m}: archived {moved} event(s), {compacted} compact row(s) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+    finally:
+        conn.close()
+    return stats
+
+
+# ---------------------- Entry point ----------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verify, rebuild and archive event_log.")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="PostgreSQL DSN (default: $DATABASE_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("verify", help="compare inventory with the folded event_log")
+    commands.add_parser("rebuild", help="rewrite inventory rows that disagree with event_log")
+    archive = commands.add_parser("archive", help="move old months out of event_log")
+    archive.add_argument("--before", required=True, type=date.fromisoformat,
+                         help="archive whole months before this date (YYYY-MM-DD)")
+    archive.add_argument("--to-dir", metavar="DIR", type=Path,
+                         help="write gzip COPY files here instead of archive tables")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.dsn:
+        print("Provide a database via --dsn or DATABASE_URL.", file=sys.stderr)
+        sys.exit(1)
+    log(f"Starting {args.command}")
+    if args.command == "archive":
+        stats = archive_events(args.dsn, args.before, args.to_dir)
+    else:
+        stats = check_inventory(args.dsn, rebuild=args.command == "rebuild")
+    log(f"Completed {args.command}: {', '.join(f'{k}={v}' for k, v in stats.items())}")
+    if args.command == "verify" and stats["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# tools/export_sheets.py
+"""
+Snapshot the Charadex spreadsheet pages into static JSON files under `data/`.
+
+Each snapshot keeps only the columns the site uses for that page, drops rows
+marked `hide` (like `charadex.importSheet`), and is pre-sorted by the page's
+default sort key. Rows are stored as arrays next to a single column list:
+
+    {"version": 1, "page": "masterlist", "sheet": "Pufflings", "hash": "...",
+     "columns": ["id", "design", ...], "rows": [[...], ...]}
+
+`data/manifest.json` lists every snapshot with its content hash so clients can
+cache-bust on change. The filter/search indexes from `build_indexes.py` are
+rebuilt after every export unless `--no-index` is given.
+
+Live mode reads the sheet configured in `styles/js/config.js` through the
+Sheets API using the same GOOGLE_SERVICE_ACCOUNT credentials as
+`sync_prompts.py`. Pass `--fake DIR` to read `<sheet name>.json` (a list of rows,
+header first) or `<sheet name>.csv` files from DIR instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import re
+import sys
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[export_sheets] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = Path(__file__).resolve().parent
+CONFIG_JS = ROOT / "styles" / "js" / "config.js"
+SNAPSHOT_DIR = ROOT / "data"
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_VERSION = 1
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+
+# Page key (as in charadex.sheet.pages) -> columns kept and default sort.
+# `columns: None` keeps every column (inventory columns are item names).
+PAGES = {
+    "masterlist": {
+        "columns": [
+            "id", "design", "name", "image", "humanoidimage", "type", "designtype",
+            "species", "owner", "seeker", "designer", "artist", "value", "status",
+            "rarity", "traits", "relationship", "heartboundcrystal", "notes",
+        ],
+        "sort": ("id", "desc"),
+    },
+    "items": {
+        "columns": [
+            "id", "item", "image", "type", "rarity", "price", "description",
+            "tradeable", "limited", "stocked", "stock", "trait", "collectibletype",
+        ],
+        "sort": ("id", "asc"),
+    },
+    "traits": {
+        "columns": [
+            "id", "trait", "image", "type", "rarity", "price", "description",
+            "longdescription", "item",
+        ],
+        "sort": ("id", "asc"),
+    },
+    "collectibles": {
+        "columns": ["id", "item", "collectibletype"],
+        "sort": ("item", "asc"),
+    },
+    "inventory": {
+        "columns": None,
+        "sort": ("username", "asc"),
+    },
+    "options": {
+        "columns": ["optiontype", "values"],
+        "sort": None,
+    },
+}
+
+
+def load_module(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+# ---------------------- Config ----------------------
+def read_sheet_config(config_path: Path = CONFIG_JS):
+    """Return (sheet_id, {page key: sheet name}) from charadex.sheet in config.js."""
+    text = config_path.read_text(encoding="utf-8")
+    id_match = re.search(r'charadex\.sheet\s*=\s*\{.*?\bid:\s*"([^"]+)"', text, re.S)
+    pages_match = re.search(r"\bpages:\s*\{(.*?)\}", text, re.S)
+    if not id_match or not pages_match:
+        raise ValueError(f"Could not find charadex.sheet id/pages in {config_path}")
+    pages = dict(re.findall(r'(\w+):\s*"([^"]*)"', pages_match.group(1)))
+    return id_match.group(1), pages
+
+
+# ---------------------- Sources ----------------------
+class FakeSheetSource:
+    """Reads sheet pages from local files for testing and offline builds."""
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+
+    def fetch(self, sheet_name: str) -> list[list]:
+        json_path = self.folder / f"{sheet_name}.json"
+        csv_path = self.folder / f"{sheet_name}.csv"
+        if json_path.exists():
+            return json.loads(json_path.read_text(encoding="utf-8"))
+        if csv_path.exists():
+            with csv_path.open(newline="", encoding="utf-8-sig") as fh:
+                return list(csv.reader(fh))
+        raise FileNotFoundError(f"No fake sheet for {sheet_name!r} in {self.folder}")
+
+
+class SheetsApiSource:
+    """Reads sheet pages through the Google Sheets API."""
+
+    def __init__(self, sheet_id: str):
+        sync_module = load_module(TOOLS_DIR / "sync_prompts.py", "sync_prompts")
+        self.sheet_id = sheet_id
+        self.service = sync_module.service_client("sheets", "v4", SHEETS_SCOPES)
+
+    def fetch(self, sheet_name: str) -> list[list]:
+        response = (
+            self.service.spreadsheets()
+            .values()
+            .get(spreadsheetId=self.sheet_id, range=f"'{sheet_name}'")
+            .execute()
+        )
+        return response.get("values", [])
+
+
+# ---------------------- Shaping ----------------------
+def normalize_header(label) -> str:
+    # Same key normalization as charadex.importSheet
+    return re.sub(r"\s", "", str(label or "")).lower()
+
+
+def coerce_value(value):
+    if isinstance(value, str):
+        upper = value.strip().upper()
+        if upper == "TRUE":
+            return True
+        if upper == "FALSE":
+            return False
+    return "" if value is None else value
+
+
+def rows_to_records(values: list[list]) -> list[dict]:
+    """Turn a header-first 2D array into row dicts, dropping hidden/empty rows."""
+    if not values:
+        return []
+    header = [normalize_header(h) for h in values[0]]
+    records = []
+    for raw in values[1:]:
+        if not raw or raw[0] in ("", None):
+            # Mirrors the `WHERE A IS NOT NULL` filter used by the site
+            continue
+        row = {}
+        for index, key in enumerate(header):
+            if not key:
+                continue
+            row[key] = coerce_value(raw[index]) if index < len(raw) else ""
+        if row.get("hide"):
+            continue
+        records.append(row)
+    return records
+
+
+def natural_key(value):
+    """Sort key matching localeCompare(..., {numeric: true, sensitivity: 'base'})."""
+    text = str(value if value is not None else "").lower()
+    return [
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.split(r"(\d+)", text) if part
+    ]
+
+
+def build_snapshot(page: str, sheet_name: str, records: list[dict]) -> dict:
+    spec = PAGES[page]
+    if spec["columns"] is None:
+        columns = []
+        for row in records:
+            columns.extend(key for key in row if key not in columns and key != "hide")
+    else:
+        available = set().union(*(row.keys() for row in records)) if records else set()
+        columns = [col for col in spec["columns"] if col in available]
+        dropped = sorted(available - set(columns) - {"hide"})
+        if dropped:
+            log(f"{page}: dropping unused column(s) {', '.join(dropped)}")
+
+    if spec["sort"]:
+        key, order = spec["sort"]
+        records = sorted(records, key=lambda row: natural_key(row.get(key)), reverse=order == "desc")
+
+    rows = [[row.get(col, "") for col in columns] for row in records]
+    body = json.dumps({"columns": columns, "rows": rows}, ensure_ascii=False, separators=(",", ":"))
+    return {
+        "version": SNAPSHOT_VERSION,
+        "page": page,
+        "sheet": sheet_name,
+        "hash": hashlib.sha256(body.encode("utf-8")).hexdigest()[:16],
+        "columns": columns,
+        "rows": rows,
+    }
+
+
+def snapshot_records(snapshot: dict) -> list[dict]:
+    """Expand a snapshot back into row dicts (what importSheet would return)."""
+    columns = snapshot["columns"]
+    return [dict(zip(columns, row)) for row in snapshot["rows"]]
+
+
+# ---------------------- Output ----------------------
+def write_snapshot(snapshot: dict, out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{snapshot['page']}.json"
+    path.write_text(
+        json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+    return path
+
+
+def write_manifest(snapshots: list[dict], out_dir: Path) -> Path:
+    manifest_path = out_dir / MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    manifest["version"] = SNAPSHOT_VERSION
+    pages = manifest.setdefault("pages", {})
+    for snap in snapshots:
+        pages[snap["page"]] = {
+            "file": f"{snap['page']}.json",
+            "sheet": snap["sheet"],
+            "hash": snap["hash"],
+            "rows": len(snap["rows"]),
+        }
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return manifest_path
+
+
+def export_pages(source, sheet_pages: dict, pages, out_dir: Path) -> list[dict]:
+    snapshots = []
+    for page in pages:
+        sheet_name = sheet_pages.get(page)
+        if not sheet_name:
+            log(f"Skipping {page}: not listed in charadex.sheet.pages")
+            continue
+        records = rows_to_records(source.fetch(sheet_name))
+        snapshot = build_snapshot(page, sheet_name, records)
+        path = write_snapshot(snapshot, out_dir)
+        log(f"Wrote {len(snapshot['rows'])} row(s) x {len(snapshot['columns'])} column(s) to {path}")
+        snapshots.append(snapshot)
+    write_manifest(snapshots, out_dir)
+    return snapshots
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", nargs="*", help=f"page keys to export (default: {', '.join(PAGES)})")
+    parser.add_argument("--fake", metavar="DIR", help="read sheets from local files instead of the API")
+    parser.add_argument("--out", metavar="DIR", default=str(SNAPSHOT_DIR), help="output folder")
+    parser.add_argument("--no-index", action="store_true", help="skip rebuilding data/indexes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    unknown = [page for page in args.pages if page not in PAGES]
+    if unknown:
+        print(f"Unknown page(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    sheet_id, sheet_pages = read_sheet_config()
+    source = FakeSheetSource(Path(args.fake)) if args.fake else SheetsApiSource(sheet_id)
+    out_dir = Path(args.out)
+    log(f"Starting snapshot export -> {out_dir}")
+    snapshots = export_pages(source, sheet_pages, args.pages or list(PAGES), out_dir)
+    log(f"Completed snapshot export of {len(snapshots)} page(s)")
+    if not args.no_index:
+        index_module = load_module(TOOLS_DIR / "build_indexes.py", "build_indexes")
+        index_module.build_all(out_dir)
+    return snapshots
+
+
+if __name__ == "__main__":
+    main()
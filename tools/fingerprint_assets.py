@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# tools/fingerprint_assets.py
+"""
+Publish content-hashed copies of the artifacts story pages fetch at runtime.
+
+For every page in `prompts/` the files referenced by `data-story-file` (CYOA
+JSON) and `data-story-bundle` (its binary form), the `<link rel="preload">`
+hint for whichever of them is fetched, `data-characters-file` (the
+character registry) and `data-segment-base` (dialogue fragment folders) are copied to a name carrying a hash of their
+content, and the attribute is rewritten to point at that copy:
+
+    CYOA/slimeHunt.json        -> CYOA/slimeHunt.3f9c2a71be.json
+    characters.json            -> characters.0b1d44e9c2.json
+    segments/slimeHunt/        -> segments/slimeHunt.7aa01c3d55/
+
+A hashed name never changes content, so it can be cached as immutable. The
+stable names are kept for older pages and direct links. `prompts/asset-manifest.json`
+maps each logical name to its current hashed name. Hashed copies the previous
+manifest listed are kept for one more run, so a page cached before a deploy
+still finds its files, and are deleted after that. A sync publishes a freshly
+staged folder, so it passes the replaced one as `previous` and those copies
+are carried over from there.
+
+Run it after the pages are generated (sync_prompts does this when
+FINGERPRINT_ASSETS=1) or on its own; re-running over already rewritten pages
+is a no-op.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[fingerprint_assets] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+PROMPTS_DIR = ROOT / "prompts"
+MANIFEST_NAME = "asset-manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+
+REFERENCE_ATTRS = ("data-story-file", "data-story-bundle", "data-characters-file", "data-segment-base")
+REFERENCE_PATTERN = re.compile(rf'\b({"|".join(REFERENCE_ATTRS)})="([^"]*)"')
+# The CYOA JSON/bundle preload hint must name the same URL the script fetches
+PRELOAD_PATTERN = re.compile(r'(<link rel="preload" href)="([^"]*)"(?= as="fetch")')
+# <stem>.<hash>[.json|.bin] as produced by hashed_name()
+HASHED_PATTERN = re.compile(rf"^.+\.[0-9a-f]{{{HASH_LENGTH}}}(\.json|\.bin)?$")
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    if path.is_dir():
+        # Folder hash covers every file name and body, in a stable order
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode("utf-8") + b"\0")
+            digest.update(child.read_bytes())
+    else:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(logical: str, digest: str) -> str:
+    """Insert the hash before the suffix: `a/b.json` -> `a/b.<hash>.json`, `a/b/` -> `a/b.<hash>/`."""
+    if logical.endswith("/"):
+        return f"{logical.rstrip('/')}.{digest}/"
+    path = Path(logical)
+    return (path.parent / f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def load_manifest(base: Path = PROMPTS_DIR) -> dict:
+    try:
+        manifest = json.loads((base / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("assets", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def publish(logical: str, base: Path = PROMPTS_DIR):
+    """Write the hashed copy of a logical asset; return its hashed name or None."""
+    source = base / logical.rstrip("/")
+    if not source.exists():
+        return None
+    target_name = hashed_name(logical, content_hash(source))
+    target = base / target_name.rstrip("/")
+    if not target.exists():
+        if source.is_dir():
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+    return target_name
+
+
+def rewrite_page(page: Path, assets: dict, previous: dict, base: Path = PROMPTS_DIR) -> bool:
+    """Point a page's fetch attributes at hashed names; return True if it changed."""
+    # Undo an earlier run so logical names are resolved against fresh content
+    reverse = {hashed: logical for logical, hashed in previous.items()}
+    html = page.read_text(encoding="utf-8")
+
+    def swap(match):
+        attr, value = match.group(1), match.group(2)
+        logical = reverse.get(value, value)
+        if logical not in assets:
+            assets[logical] = publish(logical, base)
+        hashed = assets[logical]
+        return f'{attr}="{hashed or logical}"'
+
+    updated = PRELOAD_PATTERN.sub(swap, REFERENCE_PATTERN.sub(swap, html))
+    if updated == html:
+        return False
+    page.write_text(updated, encoding="utf-8")
+    return True
+
+
+def carry_forward(retained: dict, previous: Path, base: Path = PROMPTS_DIR) -> int:
+    """Copy the hashed copies of the replaced set into `base`; return how many."""
+    carried = 0
+    for hashed in retained.values():
+        source, target = previous / hashed.rstrip("/"), base / hashed.rstrip("/")
+        if target.exists() or not source.exists():
+            continue
+        if source.is_dir():
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+        carried += 1
+    return carried
+
+
+def collect_garbage(assets: dict, base: Path = PROMPTS_DIR, retained: dict | None = None) -> int:
+    """Delete hashed copies referenced by neither the manifest nor the previous one."""
+    live = {hashed.rstrip("/") for hashed in [*assets.values(), *(retained or {}).values()] if hashed}
+    removed = 0
+    candidates = [
+        *base.glob("*.json"), *base.glob("CYOA/*.json"), *base.glob("CYOA/*.bin"), *base.glob("segments/*")
+    ]
+    for path in candidates:
+        relative = path.relative_to(base).as_posix()
+        if not HASHED_PATTERN.match(path.name) or relative in live:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        removed += 1
+    return removed
+
+
+def fingerprint_prompts(base: Path = PROMPTS_DIR, previous: Path | None = None) -> dict:
+    """Fingerprint `base`; `previous` is the folder it replaced, if it was swapped in."""
+    earlier = load_manifest(base)
+    # Hashed copies of the last published set stay live for one more run
+    retained = load_manifest(previous) if previous is not None else earlier
+    carried = carry_forward(retained, previous, base) if previous is not None else 0
+    assets = {}
+    pages = sorted(base.glob("*.html"))
+    changed = sum(rewrite_page(page, assets, earlier, base) for page in pages)
+    assets = {logical: hashed for logical, hashed in sorted(assets.items()) if hashed}
+    (base / MANIFEST_NAME).write_text(
+        json.dumps({"version": MANIFEST_VERSION, "assets": assets}, indent=2), encoding="utf-8"
+    )
+    removed = collect_garbage(assets, base, retained)
+    log(
+        f"Fingerprinted {len(assets)} asset(s) across {len(pages)} page(s): "
+        f"{changed} page(s) rewritten, {carried} previous copy(ies) carried over, "
+        f"{removed} stale copy(ies) removed"
+    )
+    return assets
+
+
+def main() -> None:
+    log(f"Starting asset fingerprinting in {PROMPTS_DIR}")
+    fingerprint_prompts()
+    log(f"Completed asset fingerprinting -> {PROMPTS_DIR / MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+# tools/generate_dataset.py
+"""
+Generate referentially consistent synthetic data for the Charadex schema.
+
+Writes PostgreSQL COPY text-format files (one or more shards per table) plus a
+`load.sql` that `psql -f` can run against a database created from
+`SQL/createDb.sql`. Scale is set per table, e.g. for a production-sized run:
+
+    python tools/generate_dataset.py --out /tmp/charadex-data \\
+        --users 200000 --pufflings 1000000 --inventory 10000000 --events 100000000
+
+Properties:
+
+- Deterministic: the same `--seed` and sizes always produce the same files.
+- Bounded memory: rows are streamed straight to disk; the only per-run state is
+  the cumulative weight tables used for skewed sampling (one float per user and
+  per trait).
+- Parallel: each table is split into shards over its driving range and shards
+  are generated in a process pool (`--workers`).
+- Realistic skew: puffling owners, inventory sizes and trait popularity follow
+  Zipf distributions (`--owner-skew`, `--trait-skew`; 0 means uniform).
+- Exact scale: `inventory` and `event_log` get exactly `--inventory` and
+  `--events` rows. Users whose share exceeds `--items` hold every item and the
+  excess goes to the others by weight; the totals are only raised or lowered
+  when they cannot be met (more than `--users` x `--items` inventory rows, or
+  fewer events than inventory rows).
+- Consistent logs: `event_log` holds inventory.add/inventory.remove deltas that
+  fold exactly to the generated `inventory` quantities.
+
+`--sheets DIR` additionally writes the same data as fake spreadsheet exports
+(`Pufflings.csv`, `items.csv`, ...) for `export_sheets.py --fake` and the
+indexing/inventory tools. The inventory sheet is one column per item, so keep
+that to fixture scale.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import sys
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[generate_dataset] {message}")
+
+USER_ID_BASE = 100_000_000_000_000_000
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+ROWS_PER_SHARD = 1_000_000
+
+SPECIES = ["Puffling", "Avian", "Aquatic"]
+STATUSES = ["Active", "Dormant", "Trade", "Voided"]
+RARITIES = ["Common", "Uncommon", "Rare", "Super Rare", "Exclusive"]
+ITEM_TYPES = ["Currency", "Consumable", "Material", "Collectible", "Trait", "Misc"]
+TRAIT_TYPES = ["Ears", "Eyes", "Body", "Limbs", "Tails", "Misc", "Mutations"]
+# (name, prefix); every tenth generated puffling is a MYO
+DESIGN_TYPES = [("Official Design", "PUF"), ("MYO Design", "MYO"), ("Special Event", "")]
+COLLECTIBLE_TYPES = ["Pins", "Plushies", "Stickers"]
+
+
+# ---------------------- Helpers ----------------------
+def copy_value(value) -> str:
+    """Encode a Python value for COPY text format."""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def copy_line(values) -> str:
+    return "\t".join(copy_value(v) for v in values) + "\n"
+
+
+def rng_for(seed: int, *parts) -> random.Random:
+    # String seeds hash deterministically (unlike hash() on tuples)
+    return random.Random(f"{seed}:" + ":".join(str(p) for p in parts))
+
+
+class ZipfSampler:
+    """Samples 0..n-1 with P(k) proportional to 1/(k+1)**skew."""
+
+    def __init__(self, n: int, skew: float):
+        self.n = n
+        self.cumulative = array("d")
+        total = 0.0
+        for k in range(n):
+            total += 1.0 / ((k + 1) ** skew) if skew else 1.0
+            self.cumulative.append(total)
+        self.total = total
+
+    def prefix(self, k: int) -> float:
+        """Unnormalised weight of 0..k-1."""
+        return self.cumulative[k - 1] if k else 0.0
+
+    def weight(self, k: int) -> float:
+        return (self.cumulative[k] - self.prefix(k)) / self.total
+
+    def sample(self, rng: random.Random) -> int:
+        return min(bisect_right(self.cumulative, rng.random() * self.total), self.n - 1)
+
+
+def user_id(index: int) -> int:
+    return USER_ID_BASE + index
+
+
+def item_id(index: int) -> str:
+    return f"item{index:06d}"
+
+
+def item_name(index: int) -> str:
+    return f"Item {index:06d}"
+
+
+def trait_id(index: int) -> str:
+    return f"trait{index:05d}"
+
+
+def puffling_design(index: int) -> tuple[str, str]:
+    """Return (design, design type name) for the index-th generated puffling."""
+    if index % 10 == 0:
+        return f"MYO-{index // 10 + 1:04d}", DESIGN_TYPES[1][0]
+    return f"PUF-{index - index // 10:04d}", DESIGN_TYPES[0][0]
+
+
+# ---------------------- Per-row generators ----------------------
+class Dataset:
+    """Deterministic row generators shared by every worker process."""
+
+    def __init__(self, cfg: dict):
+        self.cfg = cfg
+        self.seed = cfg["seed"]
+        self._owner_sampler = None
+        self._trait_sampler = None
+        self._holding_sampler = None
+        self._inventory_plan = None
+
+    @property
+    def owners(self) -> ZipfSampler:
+        if self._owner_sampler is None:
+            self._owner_sampler = ZipfSampler(self.cfg["users"], self.cfg["owner_skew"])
+        return self._owner_sampler
+
+    @property
+    def traits(self) -> ZipfSampler:
+        if self._trait_sampler is None:
+            self._trait_sampler = ZipfSampler(self.cfg["traits"], self.cfg["trait_skew"])
+        return self._trait_sampler
+
+    @property
+    def holdings(self) -> ZipfSampler:
+        # Inventory sizes follow the same skew as ownership
+        if self._holding_sampler is None:
+            self._holding_sampler = ZipfSampler(self.cfg["users"], self.cfg["owner_skew"])
+        return self._holding_sampler
+
+    # -- lookups and catalogues
+    def lookup_rows(self, table: str):
+        values = {
+            "species": SPECIES, "status": STATUSES, "rarity": RARITIES,
+            "item_type": ITEM_TYPES, "trait_type": TRAIT_TYPES,
+        }
+        if table == "design_type":
+            for name, prefix in DESIGN_TYPES:
+                yield (name, f"{name} designs", prefix)
+            return
+        for name in values[table]:
+            yield (name, name)
+
+    def user_rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            yield (user_id(i), f"user{i}", False)
+
+    def item_row(self, i: int):
+        rng = rng_for(self.seed, "item", i)
+        return (
+            item_id(i), item_name(i), False, rng.random() < 0.2, rng.random() < 0.8,
+            f"https://example.com/items/{i}.png", ITEM_TYPES[i % len(ITEM_TYPES)],
+            RARITIES[min(int(rng.expovariate(1.5)), len(RARITIES) - 1)],
+            rng.randint(1, 500), f"Synthetic item {i}", rng.randint(0, 50),
+        )
+
+    def item_rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            yield self.item_row(i)
+
+    def trait_row(self, i: int):
+        rng = rng_for(self.seed, "trait", i)
+        return (
+            trait_id(i), f"Trait {i:05d}", False, f"https://example.com/traits/{i}.png",
+            TRAIT_TYPES[i % len(TRAIT_TYPES)],
+            RARITIES[min(int(rng.expovariate(1.5)), len(RARITIES) - 1)],
+            rng.randint(1, 200), f"Synthetic trait {i}",
+        )
+
+    def trait_rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            yield self.trait_row(i)
+
+    # -- pufflings and their traits
+    def puffling(self, i: int):
+        rng = rng_for(self.seed, "puffling", i)
+        design, dtype = puffling_design(i)
+        owner = self.owners.sample(rng)
+        traits = sorted({self.traits.sample(rng) for _ in range(rng.randint(1, 5))})
+        row = (
+            design, f"Puffling {i}", f"https://example.com/pufflings/{i}.png", None,
+            dtype, SPECIES[rng.randrange(len(SPECIES))], user_id(owner), None,
+            rng.randint(1, 100), False, rng.random() < 0.05, f"artist{rng.randrange(500)}",
+            f"designer{rng.randrange(500)}", rng.randint(0, 1000),
+            STATUSES[rng.randrange(len(STATUSES))],
+            RARITIES[min(int(rng.expovariate(1.5)), len(RARITIES) - 1)], None,
+        )
+        return row, traits
+
+    def puffling_rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            yield self.puffling(i)[0]
+
+    def puffling_trait_rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            row, traits = self.puffling(i)
+            for t in traits:
+                yield (row[0], trait_id(t), None)
+
+    # -- inventories and the events that produced them
+    def inventory_total(self) -> int:
+        return min(self.cfg["inventory"], self.cfg["users"] * self.cfg["items"])
+
+    def events_total(self) -> int:
+        # Every inventory row needs at least the event that created it
+        return max(self.cfg["events"], self.inventory_total())
+
+    @property
+    def inventory_plan(self) -> tuple[int, float]:
+        """(users holding every item, rows per unit of weight for everyone else).
+
+        Weights are Zipf-decreasing, so the capped users are the first ones;
+        the rows they cannot take are shared by the rest in proportion to weight.
+        """
+        if self._inventory_plan is None:
+            users, items = self.cfg["users"], self.cfg["items"]
+            total = self.inventory_total()
+            sampler = self.holdings
+            capped, scale = 0, 0.0
+            while capped < users:
+                scale = (total - capped * items) / (sampler.total - sampler.prefix(capped))
+                if scale * (sampler.cumulative[capped] - sampler.prefix(capped)) <= items:
+                    break
+                capped += 1
+            self._inventory_plan = (capped, scale)
+        return self._inventory_plan
+
+    def inventory_offset(self, u: int) -> int:
+        """Inventory rows held by users 0..u-1; the per-user counts add up to inventory_total()."""
+        capped, scale = self.inventory_plan
+        items = self.cfg["items"]
+        if u <= capped:
+            return u * items
+        return int(capped * items + scale * (self.holdings.prefix(u) - self.holdings.prefix(capped)) + 0.5)
+
+    def event_offset(self, row: int) -> int:
+        """Events for inventory rows 0..row-1 (at least one per row)."""
+        return int(row * self.events_total() / max(1, self.inventory_total()) + 0.5)
+
+    def user_inventory(self, u: int):
+        """Yield (item index, qty) pairs for user u; distinct items, qty >= 1."""
+        items = self.cfg["items"]
+        rng = rng_for(self.seed, "inventory", u)
+        count = min(self.inventory_offset(u + 1) - self.inventory_offset(u), items)
+        if count <= 0:
+            return
+        # Walk a per-user stride coprime with the item count: distinct, O(1) memory
+        start = rng.randrange(items)
+        step = rng.randrange(1, items) if items > 1 else 1
+        while _gcd(step, items) != 1:
+            step += 1
+        for j in range(count):
+            yield (start + j * step) % items, max(1, int(rng.paretovariate(1.2)))
+
+    def inventory_rows(self, start: int, stop: int):
+        for u in range(start, stop):
+            for item, qty in self.user_inventory(u):
+                yield (user_id(u), item_id(item), qty)
+
+    def event_rows(self, start: int, stop: int):
+        """Deltas per (user, item) that fold to the inventory qty, in time order."""
+        span = self.cfg["days"] * 86400
+        for u in range(start, stop):
+            rng = rng_for(self.seed, "events", u)
+            row = self.inventory_offset(u)
+            for item, qty in self.user_inventory(u):
+                n = self.event_offset(row + 1) - self.event_offset(row)
+                row += 1
+                moment = rng.uniform(0, span * 0.5)
+                balance = 0
+                for k in range(n):
+                    last = k == n - 1
+                    if last:
+                        delta = qty - balance
+                    elif balance > 0 and rng.random() < 0.3:
+                        delta = -rng.randint(1, balance)
+                    else:
+                        delta = rng.randint(1, qty)
+                    if not last and balance + delta == qty:
+                        # Reaching qty early would leave a zero delta for the last event
+                        delta += 1 if delta > 0 else -1
+                    moment += rng.uniform(0, (span - moment) / (n - k + 1))
+                    if delta == 0:
+                        continue
+                    balance += delta
+                    yield (
+                        (EPOCH + timedelta(seconds=moment)).isoformat(), user_id(u), user_id(u),
+                        item_id(item), None,
+                        "inventory.add" if delta > 0 else "inventory.remove", delta, None,
+                    )
+
+
+def _gcd(a: int, b: int) -> int:
+    while b:
+        a, b = b, a % b
+    return a
+
+
+# Table -> (columns, generator method, size key driving the shards)
+TABLES = {
+    "users": (["discord_id", "username", "hide"], "user_rows", "users"),
+    "items": ([
+        "id", "display_name", "hide", "stocked_in_shop", "tradeable", "image", "type",
+        "rarity", "price", "description", "stock_quantity",
+    ], "item_rows", "items"),
+    "traits": ([
+        "id", "display_name", "hide", "image", "type", "rarity", "price", "description",
+    ], "trait_rows", "traits"),
+    "pufflings": ([
+        "design", "name", "image", "humanoid_image", "type", "species", "owner_id",
+        "seeker_design", "relationship", "hide", "heartbound_crystal", "artist",
+        "designer", "value", "status", "rarity", "notes",
+    ], "puffling_rows", "pufflings"),
+    "puffling_traits": (["puffling_design", "trait_id", "note"], "puffling_trait_rows", "pufflings"),
+    "inventory": (["user_id", "item_id", "qty"], "inventory_rows", "users"),
+    "event_log": ([
+        "occurred_at", "actor_id", "user_id", "item_id", "puffling_design", "action",
+        "delta", "details",
+    ], "event_rows", "users"),
+}
+LOOKUP_TABLES = {
+    "species": ["name", "description"],
+    "status": ["name", "description"],
+    "rarity": ["name", "description"],
+    "item_type": ["name", "description"],
+    "trait_type": ["name", "description"],
+    "design_type": ["name", "description", "prefix"],
+}
+LOAD_ORDER = [*LOOKUP_TABLES, "users", "items", "traits", "pufflings", "puffling_traits", "inventory", "event_log"]
+ID_TRIGGERS = {
+    "items": "trg_gen_items_id",
+    "traits": "trg_gen_traits_id",
+    "pufflings": "puffling_id_trigger",
+}
+
+
+# ---------------------- Sharding ----------------------
+def plan_shards(cfg: dict) -> list[tuple[str, int, int, int]]:
+    """Split each table's driving range into (table, shard, start, stop) tasks."""
+    tasks = []
+    for table, (_cols, _method, size_key) in TABLES.items():
+        total = cfg[size_key]
+        # Rough rows per driving entity, so shards hold ~ROWS_PER_SHARD rows
+        fanout = {
+            "inventory": cfg["inventory"] / max(1, cfg["users"]),
+            "event_log": cfg["events"] / max(1, cfg["users"]),
+            "puffling_traits": 3,
+        }.get(table, 1)
+        step = max(1, int(ROWS_PER_SHARD / max(fanout, 1e-9)))
+        for shard, start in enumerate(range(0, total, step)):
+            tasks.append((table, shard, start, min(total, start + step)))
+    return tasks
+
+
+def shard_path(out_dir: Path, table: str, shard: int) -> Path:
+    return out_dir / f"{table}.{shard:03d}.copy"
+
+
+def write_shard(cfg: dict, out_dir: str, table: str, shard: int, start: int, stop: int):
+    dataset = Dataset(cfg)
+    method = getattr(dataset, TABLES[table][1])
+    path = shard_path(Path(out_dir), table, shard)
+    rows = 0
+    with path.open("w", encoding="utf-8", newline="") as fh:
+        for row in method(start, stop):
+            fh.write(copy_line(row))
+            rows += 1
+    return table, shard, rows
+
+
+def write_lookups(cfg: dict, out_dir: Path) -> None:
+    dataset = Dataset(cfg)
+    for table in LOOKUP_TABLES:
+        with shard_path(out_dir, table, 0).open("w", encoding="utf-8", newline="") as fh:
+            for row in dataset.lookup_rows(table):
+                fh.write(copy_line(row))
+
+
+def write_load_script(out_dir: Path, shards: dict) -> Path:
+    lines = ["-- Generated by tools/generate_dataset.py", "BEGIN;"]
+    lines += [f"ALTER TABLE {t} DISABLE TRIGGER {trg};" for t, trg in ID_TRIGGERS.items()]
+    for table in LOAD_ORDER:
+        columns = LOOKUP_TABLES.get(table) or TABLES[table][0]
+        for shard in sorted(shards.get(table, [])):
+            path = shard_path(out_dir, table, shard).resolve()
+            lines.append(f"\\copy {table} ({', '.join(columns)}) FROM '{path}'")
+    lines += [f"ALTER TABLE {t} ENABLE TRIGGER {trg};" for t, trg in ID_TRIGGERS.items()]
+    lines += ["COMMIT;", "ANALYZE;", ""]
+    script = out_dir / "load.sql"
+    script.write_text("\n".join(lines), encoding="utf-8")
+    return script
+
+
+# ---------------------- Fake sheets ----------------------
+def write_sheets(cfg: dict, sheet_dir: Path) -> None:
+    """Write the dataset as fake spreadsheet exports for the static-data tools."""
+    dataset = Dataset(cfg)
+    sheet_dir.mkdir(parents=True, exist_ok=True)
+
+    def writer(name):
+        fh = (sheet_dir / f"{name}.csv").open("w", newline="", encoding="utf-8")
+        return fh, csv.writer(fh)
+
+    fh, w = writer("items")
+    w.writerow(["ID", "Item", "Type", "Rarity", "Price", "Description", "Tradeable"])
+    for i in range(cfg["items"]):
+        row = dataset.item_row(i)
+        w.writerow([row[0], row[1], row[6], row[7], row[8], row[9], "TRUE" if row[4] else "FALSE"])
+    fh.close()
+
+    fh, w = writer("Collectibles")
+    w.writerow(["Item", "Collectible Type"])
+    for i in range(cfg["items"]):
+        if ITEM_TYPES[i % len(ITEM_TYPES)] == "Collectible":
+            w.writerow([item_name(i), COLLECTIBLE_TYPES[i % len(COLLECTIBLE_TYPES)]])
+    fh.close()
+
+    fh, w = writer("traits")
+    w.writerow(["ID", "Trait", "Type", "Rarity", "Price", "Description"])
+    for i in range(cfg["traits"]):
+        row = dataset.trait_row(i)
+        w.writerow([row[0], row[1], row[4], row[5], row[6], row[7]])
+    fh.close()
+
+    fh, w = writer("Pufflings")
+    w.writerow([
+        "ID", "Design", "Name", "Image", "Type", "Species", "Owner", "Traits",
+        "Designer", "Artist", "Value", "Status", "Rarity",
+    ])
+    for i in range(cfg["pufflings"]):
+        row, traits = dataset.puffling(i)
+        owner = row[6] - USER_ID_BASE
+        w.writerow([
+            i + 1, row[0], row[1], row[2], row[4], row[5], f"user{owner}",
+            ", ".join(f"Trait {t:05d}" for t in traits), row[12], row[11], row[13],
+            row[14], row[15],
+        ])
+    fh.close()
+
+    fh, w = writer("inventory")
+    w.writerow(["Username", *(item_name(i) for i in range(cfg["items"]))])
+    for u in range(cfg["users"]):
+        cells = [""] * cfg["items"]
+        for item, qty in dataset.user_inventory(u):
+            cells[item] = qty
+        w.writerow([f"user{u}", *cells])
+    fh.close()
+
+    fh, w = writer("OptionsSheet")
+    w.writerow(["Option Type", "Values"])
+    for option, values in (
+        ("species", SPECIES), ("statuses", STATUSES), ("rarity", RARITIES),
+        ("itemTypes", ITEM_TYPES), ("traitTypes", TRAIT_TYPES),
+        ("designTypes", [name for name, _prefix in DESIGN_TYPES]),
+        ("collectibleTypes", COLLECTIBLE_TYPES),
+    ):
+        w.writerow([option, ", ".join(values)])
+    fh.close()
+    log(f"Wrote fake sheet exports to {sheet_dir}")
+
+
+# ---------------------- Entry point ----------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Charadex data as COPY files.")
+    parser.add_argument("--out", required=True, help="output folder for COPY files and load.sql")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--pufflings", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--traits", type=int, default=200)
+    parser.add_argument("--inventory", type=int, default=20000, help="inventory rows (at most --users x --items)")
+    parser.add_argument("--events", type=int, default=100000, help="event_log rows (at least one per inventory row)")
+    parser.add_argument("--days", type=int, default=730, help="time span covered by events")
+    parser.add_argument("--owner-skew", type=float, default=1.1, help="Zipf exponent for owners (0 = uniform)")
+    parser.add_argument("--trait-skew", type=float, default=1.0, help="Zipf exponent for traits (0 = uniform)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--sheets", metavar="DIR", help="also write fake sheet CSVs to DIR")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cfg = {
+        key: getattr(args, key)
+        for key in (
+            "seed", "users", "pufflings", "items", "traits", "inventory", "events",
+            "days", "owner_skew", "trait_skew",
+        )
+    }
+    if min(cfg["users"], cfg["items"], cfg["traits"]) < 1:
+        print("--users, --items and --traits must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob("*.copy"):
+        stale.unlink()
+    log(f"Starting dataset generation -> {out_dir} ({json.dumps(cfg)})")
+    dataset = Dataset(cfg)
+    expected = {"inventory": dataset.inventory_total(), "event_log": dataset.events_total()}
+    if expected["inventory"] != cfg["inventory"]:
+        log(f"--inventory {cfg['inventory']} exceeds --users x --items; generating {expected['inventory']} row(s)")
+    if expected["event_log"] != cfg["events"]:
+        log(f"--events {cfg['events']} is below one per inventory row; generating {expected['event_log']} row(s)")
+
+    write_lookups(cfg, out_dir)
+    shards = {table: [0] for table in LOOKUP_TABLES}
+    totals = {}
+    tasks = plan_shards(cfg)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(write_shard, cfg, str(out_dir), *task) for task in tasks]
+        for future in futures:
+            table, shard, rows = future.result()
+            shards.setdefault(table, []).append(shard)
+            totals[table] = totals.get(table, 0) + rows
+    for table in TABLES:
+        log(f"{table}: {totals.get(table, 0)} row(s) in {len(shards.get(table, []))} shard(s)")
+        if table in expected and totals.get(table, 0) != expected[table]:
+            log(f"Warning: {table} has {totals.get(table, 0)} row(s), expected {expected[table]}")
+
+    script = write_load_script(out_dir, shards)
+    if args.sheets:
+        write_sheets(cfg, Path(args.sheets))
+    log(f"Completed dataset generation; load with: psql -f {script}")
+
+
+if __name__ == "__main__":
+    main()
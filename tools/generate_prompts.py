@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# tools/generate_prompts.py
+"""
+Regenerate story HTML/JSON from a local folder of exported `.txt` documents
+and publish them to `prompts/` and `prompts/CYOA/`.
+
+This is the generate + index half of sync_prompts, which calls it after the
+Drive download. It only uses the standard library (brotli is optional, as in
+compress_prompts), so runs on already exported sources, such as the
+`.cache/google_docs_txt` folder sync_prompts leaves behind, need neither the
+Google client packages nor Drive credentials:
+
+    python tools/generate_prompts.py                       # .cache/google_docs_txt
+    python tools/generate_prompts.py path/to/exported-docs
+
+Runs are checkpointed and published through the staging swap in
+sync_journal.py; the same PRECOMPRESS_OUTPUTS, OPTIMIZE_HTML, CRITICAL_CSS,
+FINGERPRINT_ASSETS, PRERENDER_INCLUDES, STORY_BUNDLES and STORY_BUDGETS_FILE
+settings apply.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[generate_prompts] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = Path(__file__).resolve().parent
+PROMPTS_DIR = ROOT / "prompts"
+CYOA_DIR = PROMPTS_DIR / "CYOA"
+SOURCE_DIR = ROOT / ".cache" / "google_docs_txt"
+# Simple stories with more dialogue entries than this are split into lazily
+# loaded fragments under prompts/segments/<story>/
+STORY_SEGMENT_SIZE = 40
+# Set PRECOMPRESS_OUTPUTS=1 to write .gz/.br siblings for every generated artifact
+PRECOMPRESS_OUTPUTS = os.environ.get("PRECOMPRESS_OUTPUTS", "").lower() in ("1", "true", "yes")
+# Minify story pages and hoist repeated inline styles/handlers; OPTIMIZE_HTML=0 disables
+OPTIMIZE_HTML = os.environ.get("OPTIMIZE_HTML", "1").lower() not in ("0", "false", "no")
+# Inline above-the-fold CSS and load local stylesheets late; CRITICAL_CSS=0 disables
+CRITICAL_CSS = os.environ.get("CRITICAL_CSS", "1").lower() not in ("0", "false", "no")
+# Set FINGERPRINT_ASSETS=1 to publish content-hashed copies of fetched artifacts
+FINGERPRINT_ASSETS = os.environ.get("FINGERPRINT_ASSETS", "").lower() in ("1", "true", "yes")
+# Inline the header/footer includes into story pages; PRERENDER_INCLUDES=0 disables
+PRERENDER_INCLUDES = os.environ.get("PRERENDER_INCLUDES", "1").lower() not in ("0", "false", "no")
+# Set STORY_BUNDLES=1 to also publish CYOA/<story>.bin, the binary form of the CYOA JSON
+STORY_BUNDLES = os.environ.get("STORY_BUNDLES", "").lower() in ("1", "true", "yes")
+
+
+def load_module(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+HTML_MODULE = load_module(TOOLS_DIR / "storyHtmlGenerator.py", "story_html_generator")
+JSON_MODULE = load_module(TOOLS_DIR / "storyJsonGenerator.py", "story_json_generator")
+PROMPT_INDEX_MODULE = load_module(
+    TOOLS_DIR / "update_prompt_index.py", "update_prompt_index"
+)
+COMPRESS_MODULE = load_module(TOOLS_DIR / "compress_prompts.py", "compress_prompts")
+REGISTRY_MODULE = load_module(TOOLS_DIR / "character_registry.py", "character_registry")
+OPTIMIZE_MODULE = load_module(TOOLS_DIR / "optimize_html.py", "optimize_html")
+FINGERPRINT_MODULE = load_module(TOOLS_DIR / "fingerprint_assets.py", "fingerprint_assets")
+CRITICAL_MODULE = load_module(TOOLS_DIR / "critical_css.py", "critical_css")
+PRERENDER_MODULE = load_module(TOOLS_DIR / "prerender_includes.py", "prerender_includes")
+QUEST_MODULE = load_module(TOOLS_DIR / "quest_catalog.py", "quest_catalog")
+JOURNAL_MODULE = load_module(TOOLS_DIR / "sync_journal.py", "sync_journal")
+METRICS_MODULE = load_module(TOOLS_DIR / "story_metrics.py", "story_metrics")
+BUNDLE_MODULE = load_module(TOOLS_DIR / "story_bundle.py", "story_bundle")
+# Size/complexity limits per story; STORY_BUDGETS_FILE points at overrides
+STORY_BUDGETS = METRICS_MODULE.load_budgets()
+
+
+def sanitize_filename(name: str, fallback: str) -> Path:
+    name = (name or "").strip()
+    if not name:
+        name = fallback
+    candidate = Path(name)
+    if candidate.is_absolute():
+        candidate = Path(candidate.name)
+    safe_parts = []
+    for part in candidate.parts:
+        if not part or part in (".", ".."):
+            continue
+        safe_parts.append(re.sub(r"[^\w.\- ]+", "_", part))
+    if not safe_parts:
+        safe_parts = [fallback]
+    return Path(*safe_parts)
+
+
+def ensure_suffix(path: Path, suffix: str) -> Path:
+    suffix = suffix if suffix.startswith(".") else f".{suffix}"
+    return path if path.suffix.lower() == suffix.lower() else path.with_suffix(suffix)
+
+
+# ---------------------- Generation ----------------------
+def write_segments(html_gen, page_dir: Path):
+    segment_dir = page_dir / html_gen.segment_dir()
+    if segment_dir.exists():
+        shutil.rmtree(segment_dir)
+    if not html_gen.segments:
+        return
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    for index, fragment in enumerate(html_gen.segments, start=1):
+        if OPTIMIZE_HTML:
+            fragment = OPTIMIZE_MODULE.minify_fragment(fragment)
+        (segment_dir / f"{index}.html").write_text(fragment, encoding="utf-8")
+    log(f"Wrote {len(html_gen.segments)} dialogue segment(s) to {segment_dir}")
+
+
+def generate_outputs(txt_path: Path, registry=None, out_dir: Path = PROMPTS_DIR):
+    """Write one story's outputs under `out_dir`; return (quest record, output paths, metrics)."""
+    log(f"Starting processing for {txt_path}")
+    html_gen = HTML_MODULE.StoryHTMLGenerator(
+        str(txt_path), segment_size=STORY_SEGMENT_SIZE, registry=registry, story_bundle=STORY_BUNDLES
+    )
+    html_text = html_gen.generate_html()
+    if OPTIMIZE_HTML:
+        html_text = OPTIMIZE_MODULE.optimize_html(html_text)
+    if CRITICAL_CSS:
+        # Stylesheet links resolve from where the page is published, not staged
+        html_text = CRITICAL_MODULE.inline_critical_css(html_text, PROMPTS_DIR)
+    declared_html = sanitize_filename(
+        html_gen.file_name or f"{txt_path.stem}.html", f"{txt_path.stem}.html"
+    )
+    target_html = ensure_suffix(out_dir / declared_html, ".html")
+
+    json_gen = JSON_MODULE.StoryJSONGenerator(str(txt_path), registry=registry)
+    json_gen.parse()
+    json_text = json_gen.to_json() if json_gen.story_type == "dice" else None
+    bundle = None
+    if STORY_BUNDLES and json_text is not None:
+        bundle = json_gen.to_bundle()
+        problems = BUNDLE_MODULE.verify_bundle(bundle, json_text)
+        if problems:
+            raise ValueError(f"story bundle does not round-trip ({'; '.join(problems)})")
+
+    # Over-budget stories are rejected before anything is written
+    metrics = METRICS_MODULE.story_metrics(
+        html_text, html_gen.segments, json_text, entries=len(html_gen.dialogue)
+    )
+    for warning in METRICS_MODULE.check_budgets(target_html.name, metrics, STORY_BUDGETS):
+        print(f"Warning: {warning}", file=sys.stderr)
+        log(f"Budget warning: {warning}")
+
+    staging_html = ensure_suffix(TOOLS_DIR / declared_html, ".html")
+    staging_html.write_text(html_text, encoding="utf-8")
+    target_html.parent.mkdir(parents=True, exist_ok=True)
+    if target_html.exists():
+        target_html.unlink()
+    shutil.move(str(staging_html), str(target_html))
+    log(f"Wrote HTML to {target_html}")
+    write_segments(html_gen, target_html.parent)
+    quest_record = QUEST_MODULE.story_record(target_html.name, html_gen.quest_data)
+    outputs = [target_html.relative_to(out_dir).as_posix()]
+    if html_gen.segments:
+        outputs.append((target_html.parent / html_gen.segment_dir()).relative_to(out_dir).as_posix())
+
+    if json_text is None:
+        log(f"Skipped JSON for {txt_path}: story type '{json_gen.story_type}' (expected 'dice')")
+        log(f"Completed processing for {txt_path}")
+        return quest_record, outputs, metrics
+    declared_json = sanitize_filename(
+        json_gen.file_name or txt_path.stem, txt_path.stem
+    )
+    declared_json = ensure_suffix(declared_json, ".json")
+    staging_json = ensure_suffix(TOOLS_DIR / declared_json, ".json")
+    staging_json.write_text(json_text, encoding="utf-8")
+    target_json = out_dir / CYOA_DIR.name / declared_json
+    target_json.parent.mkdir(parents=True, exist_ok=True)
+    if target_json.exists():
+        target_json.unlink()
+    shutil.move(str(staging_json), str(target_json))
+    log(f"Wrote JSON to {target_json}")
+    outputs.append(target_json.relative_to(out_dir).as_posix())
+    if bundle is not None:
+        target_bundle = target_json.with_suffix(BUNDLE_MODULE.BUNDLE_SUFFIX)
+        target_bundle.write_bytes(bundle)
+        log(f"Wrote story bundle to {target_bundle} ({len(bundle):,} bytes, JSON {len(json_text.encode('utf-8')):,})")
+        outputs.append(target_bundle.relative_to(out_dir).as_posix())
+    log(f"Completed processing for {txt_path}")
+    return quest_record, outputs, metrics
+
+
+def finish_published():
+    """Steps that run on the published folder, where page-relative links resolve."""
+    if PRERENDER_INCLUDES:
+        log("Inlining header/footer includes")
+        PRERENDER_MODULE.prerender_pages(sorted(PROMPTS_DIR.glob("*.html")))
+    if FINGERPRINT_ASSETS:
+        log("Fingerprinting fetched artifacts")
+        FINGERPRINT_MODULE.fingerprint_prompts(PROMPTS_DIR, previous=JOURNAL_MODULE.BACKUP_DIR)
+    log("Updating prompt index")
+    PROMPT_INDEX_MODULE.main()
+    log("Prompt index updated")
+    if PRECOMPRESS_OUTPUTS:
+        log("Precompressing generated artifacts")
+        # The replaced set is kept until confirm(); unchanged files reuse its siblings
+        COMPRESS_MODULE.main(previous=JOURNAL_MODULE.BACKUP_DIR)
+
+
+# ---------------------- Run ----------------------
+class GenerationFailed(RuntimeError):
+    """Stories crossed a hard budget; the run was published with their previous outputs."""
+
+
+def start_run(source: str):
+    """Recover from an interrupted swap and return the journal for `source`."""
+    JOURNAL_MODULE.recover(PROMPTS_DIR)
+    journal = JOURNAL_MODULE.SyncJournal(source)
+    if journal.resumed:
+        log(f"Resuming run started {journal.data['started']}")
+    return journal
+
+
+def generate_all(txt_files, journal) -> None:
+    """Generate every story into staging, then publish, index and confirm the new set.
+
+    A document that is not a story is skipped. A story that fails keeps its
+    previously published outputs; if any failure was a budget overrun the run
+    raises `GenerationFailed` once the set is published.
+    """
+    staging = JOURNAL_MODULE.prepare_staging(PROMPTS_DIR, journal.resumed)
+    registry_file = staging / REGISTRY_MODULE.REGISTRY_FILE.name
+    registry = REGISTRY_MODULE.build_registry(txt_files, registry_file)
+    registry_hash = JOURNAL_MODULE.text_hash(registry_file)
+    published = JOURNAL_MODULE.published_outputs(PROMPTS_DIR)
+    documents = {}
+    reused = 0
+    over_budget = []
+
+    def keep_published(txt, reason):
+        msg = f"{txt.name}: {reason}"
+        print(msg, file=sys.stderr)
+        previous = published.get(txt.name)
+        if previous and JOURNAL_MODULE.carry_forward(PROMPTS_DIR, staging, previous["outputs"]):
+            documents[txt.name] = previous
+            log(f"{msg}; keeping its published outputs")
+        else:
+            log(f"{msg}; nothing published to keep")
+
+    for txt in txt_files:
+        previous = journal.generated(txt, registry_hash)
+        if previous is not None:
+            reused += 1
+            documents[txt.name] = {key: previous[key] for key in ("outputs", "quest", "metrics")}
+            continue
+        try:
+            record, outputs, story_metrics = generate_outputs(txt, registry, staging)
+            documents[txt.name] = {"outputs": outputs, "quest": record, "metrics": story_metrics}
+            journal.record_generated(txt, registry_hash, outputs, record, story_metrics)
+        except HTML_MODULE.NotAStoryDocument as exc:
+            msg = f"Skipping {txt}: {exc}"
+            print(msg, file=sys.stderr)
+            log(msg)
+        except METRICS_MODULE.BudgetExceeded as exc:
+            keep_published(txt, exc)
+            over_budget.append(f"{txt.name}: {exc}")
+        except ValueError as exc:
+            keep_published(txt, exc)
+        except Exception as exc:
+            keep_published(txt, f"unexpected error: {exc}")
+    if reused:
+        log(f"Reused {reused} story output(s) generated by the interrupted run")
+    QUEST_MODULE.write_catalog(
+        [entry["quest"] for entry in documents.values()], staging / QUEST_MODULE.CATALOG_FILE.name
+    )
+    JOURNAL_MODULE.write_outputs(staging, documents)
+    # A resumed run replaces its own line, so a failed publish leaves no duplicate
+    METRICS_MODULE.record_run(
+        journal.data["started"], {entry["outputs"][0]: entry["metrics"] for entry in documents.values()}
+    )
+
+    JOURNAL_MODULE.publish(PROMPTS_DIR)
+    try:
+        finish_published()
+    except BaseException:
+        JOURNAL_MODULE.rollback(PROMPTS_DIR)
+        raise
+    JOURNAL_MODULE.confirm()
+    journal.discard()
+    if over_budget:
+        raise GenerationFailed(
+            f"{len(over_budget)} story(ies) over budget kept their previous outputs: {'; '.join(over_budget)}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate prompts/ from a folder of exported .txt docs.")
+    parser.add_argument(
+        "source", nargs="?", type=Path, default=SOURCE_DIR,
+        help="folder of .txt documents (default: .cache/google_docs_txt)",
+    )
+    args = parser.parse_args(argv)
+    source = args.source.resolve()
+    if not source.is_dir():
+        print(f"Source folder not found: {source}", file=sys.stderr)
+        sys.exit(1)
+
+    log(f"Starting generation run for {source}")
+    journal = start_run(f"local:{source}")
+    try:
+        txt_files = sorted(source.glob("*.txt"))
+        if not txt_files:
+            log("No documents found to process; keeping the published prompts.")
+            journal.discard()
+            return
+        generate_all(txt_files, journal)
+    except GenerationFailed as exc:
+        print(f"Generation failed: {exc}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        log("Generation run finished")
+
+
+if __name__ == "__main__":
+    main()
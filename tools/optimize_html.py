@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# tools/optimize_html.py
+"""
+Minify generated story HTML and hoist repeated inline attributes.
+
+`optimize_html(html)` does three things in one parse:
+
+- collapses whitespace in text (except inside `<pre>`, `<textarea>`, `<script>`,
+  `<style>` and `.cd-text-pre`), drops whitespace between block-level tags and
+  removes comments (conditional comments and the include markers written by
+  `prerender_includes.py` are kept),
+- moves every `style="..."` value used more than once into a class
+  (`.is-<hash>`) defined in one `<style>` block in `<head>`,
+- replaces every `onerror="..."` / `onload="..."` attribute used more than
+  once with `data-on<event>="<id>"` plus one delegated listener script in
+  `<head>`, registered before any image starts loading.
+
+Hoisted rules are ordinary class rules, so scripts that later set
+`element.style` still win exactly as they did over the inline attribute.
+
+The result is checked against the input with a DOM comparison (whitespace and
+comments normalized, hoisted attributes expanded back). If they differ the
+original HTML is returned unchanged. `minify_fragment()` applies only the
+whitespace/comment pass, for dialogue segments injected into a page.
+
+    python tools/optimize_html.py prompts/*.html      # rewrite in place
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sys
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[optimize_html] {message}")
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr",
+}
+RAW_TAGS = {"script", "style"}
+PRESERVE_TAGS = {"pre", "textarea", *RAW_TAGS}
+PRESERVE_CLASSES = {"cd-text-pre"}
+# Whitespace next to these tags never renders
+BLOCK_TAGS = {
+    "html", "head", "body", "title", "meta", "link", "script", "style", "div", "p",
+    "ul", "ol", "li", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article",
+    "header", "footer", "nav", "main", "aside", "table", "thead", "tbody", "tr", "td",
+    "th", "form", "blockquote", "figure", "figcaption", "br", "!doctype",
+}
+# Only events that fire on the element itself and cannot be cancelled by a
+# `return false`; click handlers stay inline (nested targets, preventDefault)
+HANDLER_ATTRS = {"onerror", "onload"}
+MIN_REPEATS = 2
+STYLE_MARKER = "data-hoisted-styles"
+SCRIPT_MARKER = "data-hoisted-handlers"
+WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+# Conditional comments and prerendered include markers survive minification
+KEEP_COMMENTS = ("[if", " include ", " /include ")
+
+
+# ---------------------- Parsing ----------------------
+class Node:
+    __slots__ = ("tag", "attrs", "children", "text", "kind")
+
+    def __init__(self, kind, tag=None, attrs=None, text=""):
+        self.kind = kind        # "element", "text", "raw", "comment", "decl"
+        self.tag = tag
+        self.attrs = attrs if attrs is not None else []
+        self.children = []
+        self.text = text
+
+
+class TreeBuilder(HTMLParser):
+    """Builds a lightweight tree that keeps text exactly as written."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = Node("element", "#root")
+        self.stack = [self.root]
+
+    def _append(self, node):
+        self.stack[-1].children.append(node)
+
+    def handle_decl(self, decl):
+        self._append(Node("decl", text=decl))
+
+    def handle_starttag(self, tag, attrs):
+        node = Node("element", tag, list(attrs))
+        self._append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._append(Node("element", tag, list(attrs)))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open tag; stray end tags are ignored
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        kind = "raw" if self.stack[-1].tag in RAW_TAGS else "text"
+        self._append(Node(kind, text=data))
+
+    def handle_entityref(self, name):
+        self._append(Node("text", text=f"&{name};"))
+
+    def handle_charref(self, name):
+        self._append(Node("text", text=f"&#{name};"))
+
+    def handle_comment(self, data):
+        self._append(Node("comment", text=data))
+
+
+def parse(html: str) -> Node:
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def iter_elements(node: Node):
+    for child in node.children:
+        if child.kind == "element":
+            yield child
+            yield from iter_elements(child)
+
+
+def find(node: Node, tag: str):
+    return next((el for el in iter_elements(node) if el.tag == tag), None)
+
+
+# ---------------------- Hoisting ----------------------
+def attr_get(node: Node, name: str):
+    return next((value for key, value in node.attrs if key == name), None)
+
+
+def attr_set(node: Node, name: str, value) -> None:
+    for index, (key, _old) in enumerate(node.attrs):
+        if key == name:
+            node.attrs[index] = (name, value)
+            return
+    node.attrs.append((name, value))
+
+
+def attr_del(node: Node, name: str) -> None:
+    node.attrs = [(key, value) for key, value in node.attrs if key != name]
+
+
+def short_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:6]
+
+
+def hoist(root: Node) -> tuple[dict, dict]:
+    """Replace repeated style/handler attributes; return (classes, handlers) tables."""
+    elements = list(iter_elements(root))
+    style_counts = {}
+    handler_counts = {}
+    for el in elements:
+        for key, value in el.attrs:
+            if value is None:
+                continue
+            if key == "style":
+                style_counts[value] = style_counts.get(value, 0) + 1
+            elif key in HANDLER_ATTRS:
+                handler_counts[(key, value)] = handler_counts.get((key, value), 0) + 1
+
+    classes = {
+        style: f"is-{short_hash(style)}"
+        for style, count in style_counts.items() if count >= MIN_REPEATS
+    }
+    handlers = {
+        pair: f"h{short_hash(pair[0] + pair[1])}"
+        for pair, count in handler_counts.items() if count >= MIN_REPEATS
+    }
+    for el in elements:
+        style = attr_get(el, "style")
+        if style in classes:
+            attr_del(el, "style")
+            existing = attr_get(el, "class")
+            attr_set(el, "class", f"{existing} {classes[style]}" if existing else classes[style])
+        for key in HANDLER_ATTRS:
+            value = attr_get(el, key)
+            if (key, value) in handlers:
+                attr_del(el, key)
+                attr_set(el, f"data-{key}", handlers[(key, value)])
+    return classes, handlers
+
+
+def style_block(classes: dict) -> str:
+    rules = "".join(f".{name}{{{style.strip().rstrip(';')}}}" for style, name in classes.items())
+    return f"<style {STYLE_MARKER}>{rules}</style>"
+
+
+def handler_script(handlers: dict) -> str:
+    table = ",".join(
+        f"{name}:function(event){{{code}}}" for (_attr, code), name in handlers.items()
+    )
+    events = sorted({attr[2:] for attr, _code in handlers})
+    listeners = "".join(
+        f"document.addEventListener('{event}',function(e){{var t=e.target,k=t&&t.getAttribute&&"
+        f"t.getAttribute('data-on{event}');if(k&&h[k])h[k].call(t,e);}},true);"
+        for event in events
+    )
+    return f"<script {SCRIPT_MARKER}>(function(){{var h={{{table}}};{listeners}}})();</script>"
+
+
+# ---------------------- Serializing ----------------------
+def render_attrs(attrs) -> str:
+    parts = []
+    for key, value in attrs:
+        if value is None:
+            parts.append(f" {key}")
+        else:
+            parts.append(f' {key}="{escape(value, quote=True)}"')
+    return "".join(parts)
+
+
+def preserves_space(node: Node) -> bool:
+    if node.tag in PRESERVE_TAGS:
+        return True
+    classes = (attr_get(node, "class") or "").split()
+    return any(name in PRESERVE_CLASSES for name in classes)
+
+
+def is_block(node) -> bool:
+    return node is None or node.kind in ("decl", "comment") or (
+        node.kind == "element" and node.tag in BLOCK_TAGS
+    )
+
+
+def serialize(node: Node, out: list, minify: bool, preserve: bool = False) -> None:
+    children = [
+        c for c in node.children
+        if not (minify and c.kind == "comment" and not c.text.startswith(KEEP_COMMENTS))
+    ]
+    for index, child in enumerate(children):
+        if child.kind == "decl":
+            out.append(f"<!{child.text}>")
+        elif child.kind == "comment":
+            out.append(f"<!--{child.text}-->")
+        elif child.kind == "raw":
+            out.append(child.text)
+        elif child.kind == "text":
+            text = child.text
+            if minify and not preserve:
+                text = WHITESPACE.sub(" ", text)
+                if text == " ":
+                    before = children[index - 1] if index else None
+                    after = children[index + 1] if index + 1 < len(children) else None
+                    if node.tag in ("#root", "html", "head") or (is_block(before) and is_block(after)):
+                        continue
+            out.append(text)
+        else:
+            out.append(f"<{child.tag}{render_attrs(child.attrs)}>")
+            if child.tag in VOID_TAGS:
+                continue
+            serialize(child, out, minify, preserve or preserves_space(child))
+            out.append(f"</{child.tag}>")
+
+
+def to_html(root: Node, minify: bool = True) -> str:
+    out = []
+    serialize(root, out, minify)
+    return "".join(out)
+
+
+# ---------------------- Equivalence ----------------------
+def canonical(node: Node, classes: dict | None = None, handlers: dict | None = None, preserve=False):
+    """Comparable form of a tree: whitespace/comments normalized, hoisting undone."""
+    by_class = {name: style for style, name in (classes or {}).items()}
+    by_handler = {name: pair for pair, name in (handlers or {}).items()}
+    # Comments and hoisting blocks are dropped, so the text around them merges
+    children = []
+    for child in node.children:
+        if child.kind in ("text", "raw"):
+            if children and isinstance(children[-1], str):
+                children[-1] += child.text
+            else:
+                children.append(child.text)
+        elif child.kind == "element" and not any(
+            key in (STYLE_MARKER, SCRIPT_MARKER) for key, _value in child.attrs
+        ):
+            children.append(child)
+    items = []
+    for index, child in enumerate(children):
+        if isinstance(child, str):
+            if preserve:
+                items.append(child)
+                continue
+            # Runs collapse but are not stripped: `<b>a</b> <i>b</i>` needs its space
+            text = WHITESPACE.sub(" ", child)
+            if text == " ":
+                before = children[index - 1] if index else None
+                after = children[index + 1] if index + 1 < len(children) else None
+                if node.tag in ("#root", "html", "head") or (is_block(before) and is_block(after)):
+                    continue
+            items.append(text)
+            continue
+        attrs = dict(child.attrs)
+        tokens = (attrs.get("class") or "").split()
+        hoisted = [token for token in tokens if token in by_class]
+        for token in hoisted:
+            tokens.remove(token)
+            attrs["style"] = by_class[token]
+        if hoisted:
+            if tokens:
+                attrs["class"] = " ".join(tokens)
+            else:
+                attrs.pop("class")
+        for key in [k for k in attrs if k.startswith("data-on") and attrs[k] in by_handler]:
+            attr, code = by_handler[attrs.pop(key)]
+            attrs[attr] = code
+        if "class" in attrs and attrs["class"] is not None:
+            attrs["class"] = " ".join(attrs["class"].split())
+        items.append((
+            child.tag,
+            tuple(sorted(attrs.items(), key=lambda kv: kv[0])),
+            canonical(child, classes, handlers, preserve or preserves_space(child)),
+        ))
+    return tuple(items)
+
+
+def equivalent(original: str, optimized: str, classes: dict, handlers: dict) -> bool:
+    return canonical(parse(original)) == canonical(parse(optimized), classes, handlers)
+
+
+# ---------------------- Entry points ----------------------
+def optimize_html(html: str, verify: bool = True) -> str:
+    root = parse(html)
+    classes, handlers = hoist(root)
+    head = find(root, "head")
+    if head is not None and (classes or handlers):
+        injected = (style_block(classes) if classes else "") + (handler_script(handlers) if handlers else "")
+        head.children.append(Node("raw", text=injected))
+    elif classes or handlers:
+        # Nowhere to define the hoisted rules; keep the attributes inline
+        root = parse(html)
+        classes, handlers = {}, {}
+    optimized = to_html(root)
+    if verify and not equivalent(html, optimized, classes, handlers):
+        log("DOM check failed; keeping unoptimized HTML")
+        return html
+    return optimized
+
+
+def minify_fragment(html: str, verify: bool = True) -> str:
+    optimized = to_html(parse(html))
+    if verify and not equivalent(html, optimized, {}, {}):
+        log("DOM check failed; keeping unminified fragment")
+        return html
+    return optimized
+
+
+def main(argv=None):
+    paths = [Path(arg) for arg in (argv if argv is not None else sys.argv[1:])]
+    if not paths:
+        print("Usage: python optimize_html.py <page.html> ...", file=sys.stderr)
+        sys.exit(1)
+    for path in paths:
+        original = path.read_text(encoding="utf-8")
+        optimized = optimize_html(original)
+        if optimized != original:
+            path.write_text(optimized, encoding="utf-8")
+        log(f"{path}: {len(original.encode('utf-8'))} -> {len(optimized.encode('utf-8'))} bytes")
+
+
+if __name__ == "__main__":
+    main()
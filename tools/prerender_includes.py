@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# tools/prerender_includes.py
+"""
+Inline the shared header and footer into pages at build time.
+
+Pages carry placeholders such as
+
+    <div class="load-html" id="header" data-source="../includes/header.html"></div>
+
+that `charadex.tools.loadIncludedFiles()` fetches after the page scripts run.
+This step replaces each header/footer placeholder with the include's markup,
+with relative `href`/`src` values rewritten the way `applyBasePath()` would
+for the page's folder (`index.html` -> `../index.html` under `prompts/`):
+
+    <!-- include ../includes/header.html 3f9c2a71be -->
+    <nav ... data-include="../includes/header.html"> ... </nav>
+    <!-- /include -->
+
+The comment pair records the source and a hash of what was inlined, so a later
+run can swap in a changed include; the `data-include` attribute lets the
+runtime loader announce the prerendered include instead of fetching it. Other
+includes (`masterlist-base.html`, ...) stay runtime-loaded because their page
+scripts read the placeholder's data attributes.
+
+Pages are only read again when their size/mtime or the includes changed
+(state in `.cache/prerender-state.json`) and only written when the output
+differs.
+
+    python tools/prerender_includes.py                 # top-level pages + prompts/
+    python tools/prerender_includes.py prompts/a.html  # selected pages
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[prerender_includes] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+PROMPTS_DIR = ROOT / "prompts"
+STATE_FILE = ROOT / ".cache" / "prerender-state.json"
+INCLUDES = ("includes/header.html", "includes/footer.html")
+HASH_LENGTH = 10
+
+_SOURCES = "|".join(re.escape(include) for include in INCLUDES)
+PLACEHOLDER_PATTERN = re.compile(
+    rf'<div\b[^>]*\bclass="load-html"[^>]*\bdata-source="((?:\.\./)*)({_SOURCES})"[^>]*>\s*</div>'
+)
+INLINED_PATTERN = re.compile(
+    rf"<!-- include ((?:\.\./)*)({_SOURCES}) ([0-9a-f]+) -->.*?<!-- /include -->", re.S
+)
+URL_ATTR_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+# Same exemptions as charadex.tools.resolveRelativeUrl
+ABSOLUTE_URL = re.compile(r"^(?:[a-z]+:|//|#|\?|mailto:|tel:|\.\./|\./|/)", re.I)
+FIRST_TAG_PATTERN = re.compile(r"<([a-zA-Z][\w-]*)")
+
+
+def collect_pages() -> list[Path]:
+    return sorted(ROOT.glob("*.html")) + sorted(PROMPTS_DIR.glob("*.html"))
+
+
+def rebase_urls(html: str, prefix: str) -> str:
+    """Prefix relative href/src values so they resolve from a page `prefix` deep."""
+    if not prefix:
+        return html
+
+    def rebase(match):
+        attr, url = match.group(1), match.group(2)
+        if not url or ABSOLUTE_URL.match(url):
+            return match.group(0)
+        return f'{attr}="{prefix}{url}"'
+
+    return URL_ATTR_PATTERN.sub(rebase, html)
+
+
+class IncludeSet:
+    """Include bodies read once per run, rendered per base prefix."""
+
+    def __init__(self, root: Path = ROOT):
+        self.bodies = {}
+        for include in INCLUDES:
+            path = root / include
+            self.bodies[include] = path.read_text(encoding="utf-8").strip() if path.exists() else None
+        self._rendered = {}
+
+    def digest(self) -> str:
+        joined = "\0".join(f"{name}\0{body or ''}" for name, body in sorted(self.bodies.items()))
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+    def render(self, prefix: str, include: str):
+        """Return (hash, markup) for an include seen from a page `prefix` deep, or None."""
+        key = (prefix, include)
+        if key not in self._rendered:
+            body = self.bodies.get(include)
+            if body is None:
+                self._rendered[key] = None
+            else:
+                source = f"{prefix}{include}"
+                markup = rebase_urls(body, prefix)
+                markup = FIRST_TAG_PATTERN.sub(
+                    lambda m: f'{m.group(0)} data-include="{source}"', markup, count=1
+                )
+                digest = hashlib.sha256(markup.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+                self._rendered[key] = (
+                    digest,
+                    f"<!-- include {source} {digest} -->\n{markup}\n<!-- /include -->",
+                )
+        return self._rendered[key]
+
+
+def prerender_html(html: str, includes: IncludeSet) -> str:
+    def inline(match):
+        rendered = includes.render(match.group(1), match.group(2))
+        return rendered[1] if rendered else match.group(0)
+
+    def refresh(match):
+        rendered = includes.render(match.group(1), match.group(2))
+        if not rendered or rendered[0] == match.group(3):
+            return match.group(0)
+        return rendered[1]
+
+    return PLACEHOLDER_PATTERN.sub(inline, INLINED_PATTERN.sub(refresh, html))
+
+
+class PrerenderState:
+    """Per-page (size, mtime) and include digest from the last run."""
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = path
+        try:
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(page: Path) -> str:
+        try:
+            return page.resolve().relative_to(ROOT).as_posix()
+        except ValueError:
+            return str(page.resolve())
+
+    @staticmethod
+    def stamp(page: Path) -> list[int]:
+        stat = page.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_current(self, page: Path, digest: str) -> bool:
+        entry = self.entries.get(self.key(page))
+        return bool(entry) and entry["includes"] == digest and entry["stamp"] == self.stamp(page)
+
+    def record(self, page: Path, digest: str) -> None:
+        self.entries[self.key(page)] = {"stamp": self.stamp(page), "includes": digest}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entries = {key: value for key, value in self.entries.items() if (ROOT / key).exists()}
+        self.path.write_text(json.dumps(entries, separators=(",", ":")), encoding="utf-8")
+
+
+def prerender_pages(pages=None, force: bool = False) -> int:
+    """Inline header/footer into `pages` (default: all); return how many were rewritten."""
+    pages = collect_pages() if pages is None else [Path(page) for page in pages]
+    includes = IncludeSet()
+    digest = includes.digest()
+    state = PrerenderState()
+    rewritten = skipped = 0
+    for page in pages:
+        if not force and state.is_current(page, digest):
+            skipped += 1
+            continue
+        html = page.read_text(encoding="utf-8")
+        updated = prerender_html(html, includes)
+        if updated != html:
+            page.write_text(updated, encoding="utf-8")
+            rewritten += 1
+        state.record(page, digest)
+    state.save()
+    log(f"Prerendered includes: {rewritten} page(s) rewritten, {skipped} unchanged page(s) skipped")
+    return rewritten
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Inline header/footer includes into pages.")
+    parser.add_argument("pages", nargs="*", type=Path, help="pages to process (default: all)")
+    parser.add_argument("--force", action="store_true", help="ignore the cached page state")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prerender_pages(args.pages or None, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
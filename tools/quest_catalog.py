@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# tools/quest_catalog.py
+"""
+Build `prompts/quest-catalog.json`: which story grants which reward.
+
+Quest bodies are free text (markdown from the doc, or the HTML it became).
+Each quest is reduced to its title, objective and reward lines:
+
+    Rewards (first time only):                   -> following rewards: when "first time only"
+    10 <img alt="coin">                          -> coin x10
+    Bonus <img alt="coin"> according to ...     -> coin, bonus, note "according to ..."
+    1 Lucky Potion<img ...>                      -> Lucky Potion x1
+    SR Jewel-Bite Potion (Limited ...)(...)      -> SR Jewel-Bite Potion, notes [...]
+    - 2x Apple                                   -> Apple x2
+
+The catalog holds every story's quests plus an index by reward item, keyed
+like `charadex.tools.scrub()` (lowercase, letters and digits only), so
+`catalog.items[scrub(name)].stories` answers "which stories give X" in one
+lookup after one fetch.
+
+sync_prompts adds a record for every story it generates; stories that were not
+regenerated this run keep their previous entry while their page still exists.
+Run standalone to rebuild the catalog from the pages in `prompts/`:
+
+    python tools/quest_catalog.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[quest_catalog] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+PROMPTS_DIR = ROOT / "prompts"
+CATALOG_FILE = PROMPTS_DIR / "quest-catalog.json"
+CATALOG_VERSION = 1
+# Pages that are not stories
+CATALOG_SKIP = {"example.html"}
+ITEM_ALIASES = {"coins": "coin"}
+
+BREAK_TAGS = {"p", "br", "div", "li", "ul", "ol", "h4", "h5", "h6", "hr", "button"}
+WHITESPACE = re.compile(r"\s+")
+MD_BULLET = re.compile(r"^\s*[-*•]\s+")
+IMAGE_TOKEN = re.compile(r"\{([^{}]+)\}")
+TRAILING_NOTE = re.compile(r"\s*\(([^()]*)\)\s*$")
+QUANTITY = re.compile(r"^(?:(\d+)\s*x?\b|x\s*(\d+)\b)\s*", re.I)
+BONUS = re.compile(r"^bonus\b\s*", re.I)
+REWARDS_HEADER = re.compile(r"^rewards?\b([^:]*):?\s*(.*)$", re.I)
+OBJECTIVE = re.compile(r"^objective\s*:\s*(.*)$", re.I)
+QUEST_TITLE = re.compile(r"^(?:🎯\s*)?(?:quest\s*:\s*)?", re.I)
+
+
+def item_key(name: str) -> str:
+    key = re.sub(r"[^a-z0-9]", "", name.lower())
+    return ITEM_ALIASES.get(key, key)
+
+
+# ---------------------- Parsing ----------------------
+class QuestTextParser(HTMLParser):
+    """Flattens quest markup into (text, is_bullet) lines; images become `{alt}`."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.current = []
+        self.bullet = False
+
+    def flush(self):
+        text = WHITESPACE.sub(" ", "".join(self.current)).replace("**", "").strip()
+        if text:
+            self.lines.append((text, self.bullet))
+        self.current = []
+        self.bullet = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BREAK_TAGS:
+            self.flush()
+        if tag == "li":
+            self.bullet = True
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            if alt:
+                self.current.append(f" {{{alt}}} ")
+
+    def handle_endtag(self, tag):
+        if tag in BREAK_TAGS:
+            self.flush()
+
+    def handle_data(self, data):
+        for index, part in enumerate(data.split("\n")):
+            if index:
+                self.flush()
+            if not "".join(self.current).strip() and MD_BULLET.match(part):
+                self.bullet = True
+                part = MD_BULLET.sub("", part, count=1)
+            self.current.append(part)
+
+
+def quest_lines(body: str) -> list[tuple[str, bool]]:
+    parser = QuestTextParser()
+    parser.feed(body)
+    parser.close()
+    parser.flush()
+    return parser.lines
+
+
+def parse_reward(text: str):
+    """Reward line -> {"item", "name", "qty", "bonus", "notes"} (empty fields omitted), or None."""
+    text = text.strip().lstrip("+-*• ").strip()
+    notes = []
+    while True:
+        match = TRAILING_NOTE.search(text)
+        if not match or not match.group(1).strip():
+            break
+        notes.insert(0, match.group(1).strip())
+        text = text[:match.start()]
+
+    before, image, after = text, None, ""
+    token = IMAGE_TOKEN.search(text)
+    if token:
+        before, image, after = text[:token.start()], token.group(1).strip(), text[token.end():]
+    before = before.strip().lstrip("+").strip()
+
+    bonus = bool(BONUS.match(before))
+    before = BONUS.sub("", before)
+    qty = None
+    match = QUANTITY.match(before)
+    if match:
+        qty = int(match.group(1) or match.group(2))
+        before = before[match.end():]
+    before = IMAGE_TOKEN.sub(" ", before).strip(" :-")
+    after = IMAGE_TOKEN.sub(" ", after).strip()
+
+    if before:
+        # Icon after a named item is decoration ("1 Lucky Potion<img alt="coin">")
+        name = WHITESPACE.sub(" ", before)
+    elif image:
+        name = image
+        if after:
+            notes.insert(0, WHITESPACE.sub(" ", after))
+    else:
+        return None
+
+    reward = {"item": item_key(name), "name": name}
+    if qty is not None:
+        reward["qty"] = qty
+    if bonus:
+        reward["bonus"] = True
+    if notes:
+        reward["notes"] = notes
+    return reward if reward["item"] else None
+
+
+def parse_quest(title: str, body: str) -> dict:
+    """Title, objective and rewards; each reward carries its block's qualifier as `when`."""
+    quest = {"title": QUEST_TITLE.sub("", (title or "").strip()).strip() or "Quest"}
+    rewards = []
+    when = None
+    in_rewards = False
+    objective_next = False
+
+    def add(text):
+        reward = parse_reward(text)
+        if reward:
+            if when:
+                reward["when"] = when
+            rewards.append(reward)
+
+    for text, bullet in quest_lines(body or ""):
+        if bullet and in_rewards:
+            add(text)
+            continue
+        in_rewards = False
+        if objective_next:
+            objective_next = False
+            if not bullet:
+                quest["objective"] = text
+                continue
+        objective = OBJECTIVE.match(text)
+        if objective and "objective" not in quest:
+            if objective.group(1).strip():
+                quest["objective"] = objective.group(1).strip()
+            else:
+                # "<strong>Objective:</strong></p><p>..." puts the text on the next line
+                objective_next = True
+            continue
+        header = REWARDS_HEADER.match(text)
+        if header:
+            in_rewards = True
+            # "Rewards (first time only):" -> "first time only"
+            when = header.group(1).strip(" ()").lower() or None
+            # "Rewards: 10 coins, 1x Apple" on one line
+            for part in filter(None, (p.strip() for p in header.group(2).split(","))):
+                add(part)
+    quest["rewards"] = rewards
+    return quest
+
+
+def story_record(story: str, quest_data: dict) -> dict:
+    """Catalog entry for a generated story from `StoryHTMLGenerator.quest_data`."""
+    quests = [parse_quest(quest_data["title"], quest_data.get("body", ""))] if quest_data else []
+    return {"story": story, "quests": quests}
+
+
+class QuestSectionParser(HTMLParser):
+    """Collects (title, inner HTML) for every `#quest-section` on a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.sections = []
+        self.depth = 0
+        self.title = None
+        self.in_title = False
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth == 0:
+            if dict(attrs).get("id") == "quest-section":
+                self.depth = 1
+                self.title, self.parts = "", []
+            return
+        if tag == "h4" and not self.title:
+            self.in_title = True
+            return
+        self.parts.append(self.get_starttag_text())
+        if tag not in ("img", "br", "hr", "input", "meta", "link"):
+            self.depth += 1
+
+    def handle_endtag(self, tag):
+        if self.depth == 0:
+            return
+        if self.in_title and tag == "h4":
+            self.in_title = False
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.sections.append((self.title, "".join(self.parts)))
+        else:
+            self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+        elif self.depth:
+            self.parts.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name):
+        self.handle_data(f"&#{name};")
+
+
+def page_record(page: Path) -> dict:
+    parser = QuestSectionParser()
+    parser.feed(page.read_text(encoding="utf-8"))
+    parser.close()
+    quests = [parse_quest(title, body) for title, body in parser.sections]
+    return {"story": page.name, "quests": [quest for quest in quests if quest["title"] != "[Placeholder Quest]"]}
+
+
+# ---------------------- Catalog ----------------------
+def build_catalog(stories: dict) -> dict:
+    """Stories plus the reward index: item -> {name, stories: {story: qty or null}}.
+
+    The indexed quantity is the one from the first reward block naming the item
+    (usually the first-time reward); amounts listed twice in that block, such
+    as "(Part 1)" and "(Part 2)", are added up.
+    """
+    items = {}
+    for story in sorted(stories):
+        first_block = {}
+        for quest in stories[story]["quests"]:
+            for reward in quest["rewards"]:
+                entry = items.setdefault(reward["item"], {"name": reward["name"], "stories": {}})
+                granted = entry["stories"]
+                qty = reward.get("qty")
+                block = (quest["title"], reward.get("when"))
+                if story not in granted:
+                    granted[story] = qty
+                    first_block[reward["item"]] = block
+                elif first_block[reward["item"]] == block and qty is not None:
+                    granted[story] = (granted[story] or 0) + qty
+    return {"version": CATALOG_VERSION, "stories": stories, "items": items}
+
+
+def load_stories(path: Path = CATALOG_FILE) -> dict:
+    try:
+        catalog = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return catalog.get("stories", {}) if catalog.get("version") == CATALOG_VERSION else {}
+
+
+def write_catalog(records, path: Path = CATALOG_FILE, keep_existing: bool = True) -> bool:
+    """Write the catalog for `records`; return True when the file changed."""
+    stories = {}
+    if keep_existing:
+        stories = {
+            story: entry for story, entry in load_stories(path).items()
+            if (path.parent / story).exists()
+        }
+    for record in records:
+        stories[record["story"]] = {"quests": record["quests"]}
+    catalog = build_catalog(dict(sorted(stories.items())))
+    text = json.dumps(catalog, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        log(f"Quest catalog unchanged ({len(catalog['stories'])} stories)")
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    log(f"Wrote quest catalog: {len(catalog['stories'])} stories, {len(catalog['items'])} reward item(s)")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the quest reward catalog from story pages.")
+    parser.add_argument("pages", nargs="*", type=Path, help="story pages (default: prompts/*.html)")
+    parser.add_argument("--out", type=Path, default=CATALOG_FILE, help="output file (default: prompts/quest-catalog.json)")
+    args = parser.parse_args(argv)
+    pages = args.pages or [
+        page for page in sorted(PROMPTS_DIR.glob("*.html")) if page.name not in CATALOG_SKIP
+    ]
+    log(f"Starting quest catalog rebuild from {len(pages)} page(s)")
+    write_catalog([page_record(page) for page in pages], args.out, keep_existing=bool(args.pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,55 @@
 import re
 import sys
 from pathlib import Path
+from urllib.parse import urlsplit
 
 
 
 def log(message: str) -> None:
     print(f"[storyHtmlGenerator] {message}")
 
+# First-screen asset manifest settings. Pass a partial dict as `asset_config`
+# to StoryHTMLGenerator to override any of these per run.
+DEFAULT_ASSET_CONFIG = {
+    'enabled': True,
+    # Dialogue entries (per start scene for dice stories) treated as first screen
+    'first_screen_entries': 3,
+    # Full-body showcase images sit at the end of the page; only preload on request
+    'preload_showcase': False,
+    # Upper bound on <link rel="preload"> image hints
+    'max_image_preloads': 6,
+    'preconnect': True,
+    # Intrinsic sizes (width, height) written on images of each kind; None skips
+    'dimensions': {
+        'portrait': (120, 120),
+        'showcase': (200, 250),
+        'image': None,
+    },
+}
+
+
+class NotAStoryDocument(ValueError):
+    """The input does not start with a 'File name' line, so it is not a story."""
+
+
 class StoryHTMLGenerator:
-    def __init__(self, input_file):
+    def __init__(self, input_file, asset_config=None, segment_size=None, registry=None, story_bundle=False):
         self.input_file = input_file
+        # Optional character_registry.CharacterRegistry shared across stories
+        self.registry = registry
+        # Dice pages also name the binary bundle (StoryJSONGenerator.to_bundle)
+        self.story_bundle = story_bundle
+        self.asset_config = {**DEFAULT_ASSET_CONFIG, **(asset_config or {})}
+        # Per-kind sizes merge key by key, so {'dimensions': {'image': (...)}}
+        # keeps the default portrait/showcase sizes
+        overrides = (asset_config or {}).get('dimensions')
+        if isinstance(overrides, dict):
+            self.asset_config['dimensions'] = {**DEFAULT_ASSET_CONFIG['dimensions'], **overrides}
+        self.asset_manifest = None
+        # Simple stories longer than segment_size entries inline only their first
+        # segment; the rest are exposed as HTML fragments in self.segments
+        self.segment_size = segment_size
+        self.segments = []
         self.file_name = ""
         self.chapter_title = ""
         self.scene = ""
@@ -18,6 +58,8 @@ class StoryHTMLGenerator:
         # Track dice dialogue section names
         self.dice_start_sections = set()
         self.dice_end_sections = set()
+        # Dice section name -> raw dialogue entries belonging to it
+        self.dice_dialogue = {}
         self.characters = {}
         self.dialogue = []
         self.quest_data = {}
@@ -34,11 +76,13 @@ class StoryHTMLGenerator:
 
         first_content_line = next((ln.strip() for ln in lines if ln.strip()), '')
         if not first_content_line.lower().startswith('file name'):
-            raise ValueError(
+            raise NotAStoryDocument(
                 f"Invalid format in {self.input_file!r}: expected to start with 'File name', found {first_content_line!r}."
             )
 
         section = None
+        dice_section = None
+        dice_lines = {}
         char_lines = []
         dialogue_lines = []
         quest_lines = []
@@ -75,14 +119,16 @@ class StoryHTMLGenerator:
             if s == 'Characters:':
                 section = 'characters'; continue
             if s == 'Dialogue:':
-                section = 'dialogue'; continue
+                section = 'dialogue'; dice_section = None; continue
             # Dice-style dialogue section header: Dialogue | sectionName | start/end (last part optional)
             if s.lower().startswith('dialogue') and '|' in s:
                 parts = [p.strip() for p in s.split('|')]
                 if parts and parts[0].lower().rstrip(':') == 'dialogue':
                     section_name = parts[1].rstrip(':') if len(parts) > 1 else ''
                     phase = parts[2].lower().rstrip(':') if len(parts) > 2 else ''
+                    dice_section = section_name or None
                     if section_name:
+                        dice_lines.setdefault(section_name, [])
                         if phase == 'start':
                             self.dice_start_sections.add(section_name)
                         elif phase == 'end':
@@ -98,6 +144,8 @@ class StoryHTMLGenerator:
                 char_lines.append(line)
             elif section == 'dialogue':
                 dialogue_lines.append(line)
+                if dice_section:
+                    dice_lines[dice_section].append(line)
             elif section == 'quest':
                 quest_lines.append(line)
             elif section == 'trivia':
@@ -105,6 +153,8 @@ class StoryHTMLGenerator:
         # Parse accumulated content
         self._parse_characters(char_lines)
         self._parse_dialogue('\n'.join(dialogue_lines))
+        for name, sec_lines in dice_lines.items():
+            self.dice_dialogue[name] = self._split_dialogue_entries('\n'.join(sec_lines))
         self._parse_quest(quest_lines)
         self._parse_trivia(trivia_lines)
 
@@ -126,6 +176,12 @@ class StoryHTMLGenerator:
             if not line.strip():
                 continue
             parts = [p.strip() for p in line.split('|')]
+            if len(parts) == 1 and self.registry:
+                # Bare name: use the shared registry definition
+                shared = self.registry.get(parts[0])
+                if shared:
+                    self.characters[parts[0]] = shared
+                continue
             if len(parts) >= 3:
                 name = parts[0]
                 full_body = parts[1] if parts[1] and parts[1] != '-' else None
@@ -142,20 +198,191 @@ class StoryHTMLGenerator:
                     'include_in_showcase': include_in_showcase
                 }
 
+    def _character(self, name):
+        """Story definition for `name`, falling back to the shared registry."""
+        if name in self.characters:
+            return self.characters[name]
+        return self.registry.get(name) if self.registry else None
+
     def _parse_dialogue(self, text):
+        self.dialogue.extend(self._split_dialogue_entries(text))
+
+    def _split_dialogue_entries(self, text):
         # Split into entries that begin with a '[' header line
+        entries = []
         lines = text.split('\n')
         current_entry = []
         for line in lines:
             if line.strip().startswith('['):
                 if current_entry:
-                    self.dialogue.append('\n'.join(current_entry))
+                    entries.append('\n'.join(current_entry))
                 current_entry = [line]
             else:
                 if current_entry:
                     current_entry.append(line)
         if current_entry:
-            self.dialogue.append('\n'.join(current_entry))
+            entries.append('\n'.join(current_entry))
+        return entries
+
+    def _split_entry(self, entry):
+        """Return (header_content, content) for a dialogue entry, or None."""
+        parts = entry.split('\n', 1)
+        header_line = parts[0]
+        trailing_block = parts[1] if len(parts) > 1 else ''
+
+        m = re.match(r'\[([^\]]+)\](.*)$', header_line)
+        if not m:
+            return None
+
+        header_content = m.group(1).strip()
+        inline_after = m.group(2).strip()
+
+        # Combine inline content after header with any following lines
+        content = inline_after
+        if trailing_block.strip():
+            content = (content + '\n' + trailing_block).strip()
+        return header_content, content
+
+    # ---------------------- Asset manifest ----------------------
+    def _entry_images(self, entry):
+        """Yield (url, kind) for every image a dialogue entry renders."""
+        split = self._split_entry(entry)
+        if not split:
+            return
+        header_content, content = split
+        lowered = header_content.lower()
+        if lowered in ('narration', 'scene break') or lowered.startswith('choices'):
+            return
+        if lowered == 'image':
+            if content.strip():
+                yield content.strip(), 'image'
+            return
+        char_name = header_content.split('|')[0].strip()
+        portrait = (self._character(char_name) or {}).get('portrait')
+        if portrait:
+            yield portrait, 'portrait'
+
+    def _first_screen_entries(self):
+        count = max(0, int(self.asset_config.get('first_screen_entries') or 0))
+        if self.story_type == 'dice':
+            entries = []
+            for name in sorted(self.dice_start_sections):
+                entries.extend(self.dice_dialogue.get(name, [])[:count])
+            return entries
+        return self.dialogue[:count]
+
+    def build_asset_manifest(self):
+        """Work out which images the first screen needs and which can wait.
+
+        Returns a dict with `preconnect` (image origins), `preload` (hint dicts with
+        href/as), `eager` (URLs rendered without lazy loading) and `deferred`
+        (every other image URL on the page).
+        """
+        cfg = self.asset_config
+        critical = []
+        for entry in self._first_screen_entries():
+            for url, _kind in self._entry_images(entry):
+                if url not in critical:
+                    critical.append(url)
+        showcase = [
+            data['full_body'] for data in self.characters.values()
+            if data.get('include_in_showcase', True) and data.get('full_body')
+        ]
+        if cfg.get('preload_showcase'):
+            critical.extend(url for url in showcase if url not in critical)
+
+        every_image = []
+        for entry in self.dialogue:
+            for url, _kind in self._entry_images(entry):
+                if url not in every_image:
+                    every_image.append(url)
+        every_image.extend(url for url in showcase if url not in every_image)
+
+        preload = [{'href': url, 'as': 'image'} for url in critical[:cfg.get('max_image_preloads') or 0]]
+        if self.story_type == 'dice' and self.file_name:
+            # The script fetches the bundle instead of the JSON when there is one
+            story_data = self._story_bundle_path() if self.story_bundle else self._story_json_path()
+            preload.insert(0, {'href': story_data, 'as': 'fetch'})
+
+        origins = []
+        if cfg.get('preconnect'):
+            for url in every_image:
+                parts = urlsplit(url)
+                if parts.scheme in ('http', 'https') and parts.netloc:
+                    origin = f'{parts.scheme}://{parts.netloc}'
+                    if origin not in origins:
+                        origins.append(origin)
+
+        return {
+            'preconnect': origins,
+            'preload': preload,
+            'eager': list(critical),
+            'deferred': [url for url in every_image if url not in critical],
+        }
+
+    def _asset_hints_html(self):
+        if not self.asset_manifest:
+            return ''
+        hints = []
+        # Image hosts only: <img> loads are no-cors, so a `crossorigin`
+        # preconnect would open a connection the images cannot use
+        for origin in self.asset_manifest['preconnect']:
+            hints.append(f'<link rel="preconnect" href="{origin}">')
+        for hint in self.asset_manifest['preload']:
+            extra = ' crossorigin="anonymous"' if hint['as'] == 'fetch' else ''
+            hints.append(f'<link rel="preload" href="{hint["href"]}" as="{hint["as"]}"{extra}>')
+        return ''.join(f'\n  {h}' for h in hints)
+
+    def _img_attrs(self, url, kind):
+        """Loading/decoding/size attributes for an <img> of the given kind."""
+        if not self.asset_manifest:
+            return ''
+        attrs = ''
+        if url not in self.asset_manifest['eager']:
+            attrs += ' loading="lazy" decoding="async"'
+        dims = (self.asset_config.get('dimensions') or {}).get(kind)
+        if dims:
+            attrs += f' width="{dims[0]}" height="{dims[1]}"'
+        return attrs
+
+    def _story_json_path(self):
+        return f"CYOA/{Path(self.file_name).stem}.json"
+
+    def _story_bundle_path(self):
+        return f"CYOA/{Path(self.file_name).stem}.bin"
+
+    def segment_dir(self):
+        """Folder (relative to the page) that holds the dialogue fragments."""
+        return f"segments/{Path(self.file_name).stem}"
+
+    # ---------------------- Segmentation ----------------------
+    def _segment_entries(self, entries):
+        """Group dialogue entries into segments of at most segment_size entries.
+
+        A segment is closed early at a [scene break] once it is at least half
+        full, so most segments end on a natural pause in the story.
+        """
+        size = max(1, int(self.segment_size))
+        groups = []
+        current = []
+        for entry in entries:
+            current.append(entry)
+            split = self._split_entry(entry)
+            is_break = bool(split) and split[0].lower() == 'scene break'
+            if len(current) >= size or (is_break and len(current) * 2 >= size):
+                groups.append(current)
+                current = []
+        if current:
+            groups.append(current)
+        return groups
+
+    def _render_dialogue(self, entries):
+        dialogue_html = ''
+        for entry in entries:
+            html = self._generate_dialogue_html(entry)
+            if html:
+                dialogue_html += html + '\n\n'
+        return dialogue_html
 
     def _parse_trivia(self, lines):
         # Keep raw. Markdown is applied during render.
@@ -179,21 +406,10 @@ class StoryHTMLGenerator:
         return text
 
     def _generate_dialogue_html(self, entry):
-        parts = entry.split('\n', 1)
-        header_line = parts[0]
-        trailing_block = parts[1] if len(parts) > 1 else ''
-
-        m = re.match(r'\[([^\]]+)\](.*)$', header_line)
-        if not m:
+        split = self._split_entry(entry)
+        if not split:
             return ''
-
-        header_content = m.group(1).strip()
-        inline_after = m.group(2).strip()
-
-        # Combine inline content after header with any following lines
-        content = inline_after
-        if trailing_block.strip():
-            content = (content + '\n' + trailing_block).strip()
+        header_content, content = split
 
         # narration
         if header_content.lower() == 'narration':
@@ -205,7 +421,7 @@ class StoryHTMLGenerator:
         if header_content.lower() == 'image':
             url = content.strip()
             return f'''<div class="dialogue-simple">
-    <img src="{url}">
+    <img src="{url}"{self._img_attrs(url, 'image')}>
 </div>'''
 
         if header_content.lower() == 'scene break':
@@ -225,15 +441,14 @@ class StoryHTMLGenerator:
         is_right = any('right' in m for m in modifiers)
         is_hidden = any('hidden' in m for m in modifiers)
 
-        portrait_url = ''
-        if char_name in self.characters:
-            portrait_url = self.characters[char_name]['portrait'] or ''
+        portrait_url = (self._character(char_name) or {}).get('portrait') or ''
+        portrait_attrs = self._img_attrs(portrait_url, 'portrait') if portrait_url else ''
 
         if is_right:
             return f'''<div class="dialogue-container-right">
     <div>
       <div class="character-portrait{' hidden-face' if is_hidden else ''}">
-        <img src="{portrait_url}" alt="{char_name}" onerror="this.style.display='none'">
+        <img src="{portrait_url}" alt="{char_name}"{portrait_attrs} onerror="this.style.display='none'">
       </div>
     </div>
     <div class="speech-bubble-right">
@@ -245,7 +460,7 @@ class StoryHTMLGenerator:
             return f'''<div class="dialogue-container">
     <div>
       <div class="character-portrait{' hidden-face' if is_hidden else ''}">
-        <img src="{portrait_url}" alt="{char_name}" onerror="this.style.display='none'">
+        <img src="{portrait_url}" alt="{char_name}"{portrait_attrs} onerror="this.style.display='none'">
       </div>
     </div>
     <div class="speech-bubble">
@@ -256,14 +471,19 @@ class StoryHTMLGenerator:
 
     def generate_html(self):
         self.parse_input_file()
+        if self.asset_config.get('enabled'):
+            self.asset_manifest = self.build_asset_manifest()
 
         # Dialogue HTML
         dialogue_html = ''
+        self.segments = []
         if self.story_type == 'simple':
-            for entry in self.dialogue:
-                html = self._generate_dialogue_html(entry)
-                if html:
-                    dialogue_html += html + '\n\n'
+            if self.segment_size and len(self.dialogue) > self.segment_size:
+                groups = self._segment_entries(self.dialogue)
+                dialogue_html = self._render_dialogue(groups[0])
+                self.segments = [self._render_dialogue(group) for group in groups[1:]]
+            else:
+                dialogue_html = self._render_dialogue(self.dialogue)
         else:
             # For 'dice' type, keep dialogue-stage empty for now
             dialogue_html = ''
@@ -283,12 +503,17 @@ class StoryHTMLGenerator:
         # Prepare dialogue container attributes/inner content
         dialogue_data_attrs = ''
         dialogue_inner = dialogue_html
+        if self.segments:
+            dialogue_data_attrs = f'data-segment-base="{self.segment_dir()}/" data-segment-count="{len(self.segments)}"'
         if self.story_type == 'dice':
-            story_json_name = Path(self.file_name).stem + '.json'
-            story_json_path = f"CYOA/{story_json_name}"
+            story_json_path = self._story_json_path()
             start_names = ', '.join(sorted(self.dice_start_sections))
             end_names = ', '.join(sorted(self.dice_end_sections))
             dialogue_data_attrs = f'data-story-file="{story_json_path}" data-start-scene="{start_names}" data-end-sections="{end_names}"'
+            if self.story_bundle:
+                dialogue_data_attrs += f' data-story-bundle="{self._story_bundle_path()}"'
+            if self.registry:
+                dialogue_data_attrs += ' data-characters-file="characters.json"'
             dialogue_inner = '            <!-- Dynamic content will be generated here -->\n'
 
         # Characters showcase: only those with full-body, link image and name if profile present
@@ -305,7 +530,8 @@ class StoryHTMLGenerator:
             has_desc = bool(desc_html)
 
             # image + name, link if profile present
-            img_block = f'<img src="{fb}" alt="{name}" onerror="this.style.display=\'none\'">'
+            fb_attrs = self._img_attrs(fb, 'showcase')
+            img_block = f'<img src="{fb}" alt="{name}"{fb_attrs} onerror="this.style.display=\'none\'">'
             if profile:
                 name_block = f'<a href="{profile}">{name}</a>'
             else:
@@ -417,7 +643,7 @@ class StoryHTMLGenerator:
   <meta name="type" content="website" />
   <meta name="url" content="https://pufflings.github.io/Masterlist/" />
   <meta name="image" content="../assets/meta.png" />
-  <meta name="description" content="Welcome to the Puffling ARPG! Pufflings are a mysterious, fluffy creature, believed to be descendants of legendary dragons.">
+  <meta name="description" content="Welcome to the Puffling ARPG! Pufflings are a mysterious, fluffy creature, believed to be descendants of legendary dragons.">{self._asset_hints_html()}
   <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@4.5.3/dist/css/bootstrap.min.css" crossorigin="anonymous">
   <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-select@1.13.14/dist/css/bootstrap-select.min.css">
   <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.7.2/css/all.min.css">
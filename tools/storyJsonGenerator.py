@@ -1,6 +1,7 @@
 import re
 import sys
 import json
+import struct
 from pathlib import Path
 
 
@@ -9,9 +10,37 @@ from pathlib import Path
 def log(message: str) -> None:
     print(f"[storyJsonGenerator] {message}")
 
+# Binary story bundle (see to_bundle and story_bundle.py), little-endian:
+#   header | scene records | entry records | choice records | string offsets | UTF-8 string data
+BUNDLE_MAGIC = b"CYOA"
+BUNDLE_VERSION = 1
+# magic, version, flags, scene/entry/choice/string counts, scene/entry/choice/string section offsets
+BUNDLE_HEADER = struct.Struct("<4sHHIIIIIIII")
+# id, first entry, entry count, flags
+BUNDLE_SCENE = struct.Struct("<IIII")
+# name, text, portrait, character, class, flags, first choice, choice count, dice choice count, dice-min, dice-max
+BUNDLE_ENTRY = struct.Struct("<IIIIIIIHHii")
+# plain choice: text, 0, next; dice choice: dice-min, dice-max, next
+BUNDLE_CHOICE = struct.Struct("<iiI")
+BUNDLE_NONE = 0xFFFFFFFF
+# Header flags
+BUNDLE_CHARACTER_REFS = 1
+# Scene flags
+SCENE_FINAL = 1
+# Entry flags
+ENTRY_MODIFIERS = 1
+ENTRY_HIDDEN = 2
+ENTRY_CHOICES = 4
+ENTRY_DICE = 8
+ENTRY_DICE_FIRST = 16
+ENTRY_DICE_MIN_NULL = 32
+ENTRY_DICE_MAX_NULL = 64
+
 class StoryJSONGenerator:
-    def __init__(self, input_file):
+    def __init__(self, input_file, registry=None):
         self.input_file = input_file
+        # Optional character_registry.CharacterRegistry shared across stories
+        self.registry = registry
         self.file_name = ""
         self.story_type = "simple"
         self.characters = {}
@@ -96,6 +125,12 @@ class StoryJSONGenerator:
         if not line.strip():
             return
         parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 1 and self.registry:
+            # Bare name: use the shared registry definition
+            shared = self.registry.get(parts[0])
+            if shared:
+                self.characters[parts[0]] = {field: shared[field] for field in ('full_body', 'portrait', 'profile', 'description')}
+            return
         if len(parts) >= 3:
             name = parts[0]
             full_body = parts[1] if parts[1] != '-' else None
@@ -239,12 +274,17 @@ class StoryJSONGenerator:
             portrait_url = ''
             if char_name in self.characters:
                 portrait_url = self.characters[char_name].get('portrait') or ''
-
-            entry = {
-                "name": display_name,
-                "portrait": portrait_url,
-                "modifiers": {"class": dialogue_class}
-            }
+            elif self.registry and self.registry.get(char_name):
+                portrait_url = self.registry.get(char_name).get('portrait') or ''
+
+            entry = {"name": display_name}
+            reference = self.registry.portrait_reference(char_name, portrait_url) if self.registry else None
+            if reference:
+                # Resolved client-side from characters.json
+                entry["character"] = reference
+            else:
+                entry["portrait"] = portrait_url
+            entry["modifiers"] = {"class": dialogue_class}
             if is_hidden:
                 entry["modifiers"]["hidden"] = True
             if content:
@@ -263,6 +303,99 @@ class StoryJSONGenerator:
         scenes_list = [self.scenes[sid] for sid in self.scenes_order]
         return json.dumps({"scenes": scenes_list}, ensure_ascii=False, indent=2)
 
+    def to_bundle(self):
+        # Same story as to_json(), laid out so one scene can be decoded without the rest
+        if self.story_type != 'dice':
+            raise ValueError("Aborted: Only Type: dice is supported for bundle output.")
+
+        return encode_bundle({"scenes": [self.scenes[sid] for sid in self.scenes_order]})
+
+
+def encode_bundle(story):
+    """Encode a story dict as produced by to_json(); raise ValueError on fields the format cannot hold."""
+    strings = {}
+
+    def ref(value):
+        if value is None:
+            return BUNDLE_NONE
+        if not isinstance(value, str):
+            raise ValueError(f"Bundle strings must be text, got {value!r}")
+        return strings.setdefault(value, len(strings))
+
+    scene_records = []
+    entry_records = []
+    choice_records = []
+    header_flags = 0
+    for scene in story["scenes"]:
+        if set(scene) - {"scene", "dialogue", "final"} or scene.get("final", True) is not True:
+            raise ValueError(f"Unsupported scene fields in {scene.get('scene')!r}")
+        scene_flags = SCENE_FINAL if scene.get("final") else 0
+        scene_records.append((ref(scene["scene"]), len(entry_records), len(scene["dialogue"]), scene_flags))
+        for entry in scene["dialogue"]:
+            if set(entry) - {"name", "character", "portrait", "modifiers", "text", "choices", "dice-choices"}:
+                raise ValueError(f"Unsupported entry fields in scene {scene['scene']!r}: {sorted(entry)}")
+            flags = 0
+            css_class = None
+            if "modifiers" in entry:
+                modifiers = entry["modifiers"]
+                if set(modifiers) - {"class", "hidden"} or modifiers.get("hidden", True) is not True:
+                    raise ValueError(f"Unsupported modifiers in scene {scene['scene']!r}: {modifiers}")
+                flags |= ENTRY_MODIFIERS
+                flags |= ENTRY_HIDDEN if modifiers.get("hidden") else 0
+                css_class = modifiers.get("class")
+            if "character" in entry:
+                header_flags |= BUNDLE_CHARACTER_REFS
+
+            first_choice = len(choice_records)
+            choices = entry.get("choices")
+            if choices is not None:
+                flags |= ENTRY_CHOICES
+                for choice in choices:
+                    choice_records.append((ref(choice["text"]), 0, ref(choice["next"])))
+            dice = entry.get("dice-choices")
+            dice_min = dice_max = 0
+            if dice is not None:
+                flags |= ENTRY_DICE
+                if choices is not None and list(entry).index("dice-choices") < list(entry).index("choices"):
+                    flags |= ENTRY_DICE_FIRST
+                dice_min, dice_max = dice["dice-min"], dice["dice-max"]
+                if dice_min is None:
+                    flags |= ENTRY_DICE_MIN_NULL
+                    dice_min = 0
+                if dice_max is None:
+                    flags |= ENTRY_DICE_MAX_NULL
+                    dice_max = 0
+                for choice in dice["choices"]:
+                    choice_records.append((choice["dice-min"], choice["dice-max"], ref(choice["next"])))
+            entry_records.append((
+                ref(entry.get("name")), ref(entry.get("text")), ref(entry.get("portrait")),
+                ref(entry.get("character")), ref(css_class), flags, first_choice,
+                len(choices or ()), len((dice or {}).get("choices") or ()), dice_min, dice_max,
+            ))
+
+    data = [value.encode("utf-8") for value in strings]
+    offsets = [0]
+    for blob in data:
+        offsets.append(offsets[-1] + len(blob))
+    scenes_offset = BUNDLE_HEADER.size
+    entries_offset = scenes_offset + BUNDLE_SCENE.size * len(scene_records)
+    choices_offset = entries_offset + BUNDLE_ENTRY.size * len(entry_records)
+    strings_offset = choices_offset + BUNDLE_CHOICE.size * len(choice_records)
+    try:
+        parts = [BUNDLE_HEADER.pack(
+            BUNDLE_MAGIC, BUNDLE_VERSION, header_flags,
+            len(scene_records), len(entry_records), len(choice_records), len(data),
+            scenes_offset, entries_offset, choices_offset, strings_offset,
+        )]
+        parts += [BUNDLE_SCENE.pack(*record) for record in scene_records]
+        parts += [BUNDLE_ENTRY.pack(*record) for record in entry_records]
+        parts += [BUNDLE_CHOICE.pack(*record) for record in choice_records]
+    except struct.error as exc:
+        raise ValueError(f"Story does not fit the bundle format: {exc}") from exc
+    parts.append(struct.pack(f"<{len(offsets)}I", *offsets))
+    parts += data
+    return b"".join(parts)
+
 
 def _to_int_safe(val, default=None):
     try:
@@ -272,11 +405,15 @@ def _to_int_safe(val, default=None):
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python storyJsonGenerator.py <input_file.txt>")
+    args = sys.argv[1:]
+    write_bundle = '--bundle' in args
+    if write_bundle:
+        args.remove('--bundle')
+    if len(args) != 1:
+        print("Usage: python storyJsonGenerator.py <input_file.txt> [--bundle]")
         sys.exit(1)
 
-    input_arg = sys.argv[1]
+    input_arg = args[0]
     input_path = Path(input_arg).resolve()
     log(f"Starting processing for {input_path}")
 
@@ -311,6 +448,10 @@ def main():
         f.write(gen.to_json())
 
     print(f"JSON generated successfully: {out_path}")
+    if write_bundle:
+        bundle_path = out_path.with_suffix('.bin')
+        bundle_path.write_bytes(gen.to_bundle())
+        print(f"Bundle generated successfully: {bundle_path}")
     log(f"Completed processing for {input_path} -> {out_path}")
 
 if __name__ == '__main__':
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# tools/story_bundle.py
+"""
+Read and verify the binary story bundles written by
+`StoryJSONGenerator.to_bundle()` (`prompts/CYOA/<story>.bin`).
+
+A bundle carries the same story as the CYOA JSON in fixed-width tables:
+
+    header     magic "CYOA", version, flags, record counts, section offsets
+    scenes     16 bytes each: id, first entry, entry count, flags (final)
+    entries    40 bytes each: name/text/portrait/character/class string refs,
+               flags, first choice, choice and dice-choice counts, dice range
+    choices    12 bytes each: (text, 0, next) or (dice-min, dice-max, next);
+               an entry's plain choices come first, then its dice choices
+    strings    count + 1 offsets, then the UTF-8 data of every distinct string
+
+`StoryBundle.scene()` decodes one scene and only the strings it uses, the way
+cyoa-story.js reads a scene from the fetched ArrayBuffer. `to_json()` rebuilds
+the full story with the generator's key order, so a lossless bundle gives back
+the CYOA JSON byte for byte.
+
+    python tools/story_bundle.py                 # verify every prompts/CYOA bundle and JSON
+    python tools/story_bundle.py a.bin b.json    # a.bin against a.json; b.json through a round trip
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import re
+import struct
+import sys
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[story_bundle] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = Path(__file__).resolve().parent
+CYOA_DIR = ROOT / "prompts" / "CYOA"
+BUNDLE_SUFFIX = ".bin"
+# Content-hashed copies written by fingerprint_assets.py (`<stem>.<hash>.bin`)
+HASHED_COPY = re.compile(r"\.[0-9a-f]{10}$")
+
+
+def load_module(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+# Format constants and the encoder live with the generator
+JSON_MODULE = load_module(TOOLS_DIR / "storyJsonGenerator.py", "story_json_generator")
+
+
+class StoryBundle:
+    """Random access to the scenes of one bundle."""
+
+    def __init__(self, data: bytes):
+        fmt = JSON_MODULE
+        if len(data) < fmt.BUNDLE_HEADER.size:
+            raise ValueError("Not a story bundle: file is too short")
+        (
+            magic, version, self.flags, self.scene_count, self.entry_count, self.choice_count,
+            self.string_count, self.scenes_offset, self.entries_offset, self.choices_offset,
+            self.strings_offset,
+        ) = fmt.BUNDLE_HEADER.unpack_from(data)
+        if magic != fmt.BUNDLE_MAGIC:
+            raise ValueError(f"Not a story bundle: magic {magic!r}")
+        if version != fmt.BUNDLE_VERSION:
+            raise ValueError(f"Unsupported story bundle version {version}")
+        self.data = memoryview(data)
+        self.string_data = self.strings_offset + 4 * (self.string_count + 1)
+        sections = (
+            (self.scenes_offset, self.scene_count * fmt.BUNDLE_SCENE.size),
+            (self.entries_offset, self.entry_count * fmt.BUNDLE_ENTRY.size),
+            (self.choices_offset, self.choice_count * fmt.BUNDLE_CHOICE.size),
+            (self.strings_offset, 4 * (self.string_count + 1)),
+        )
+        if any(offset + size > len(data) for offset, size in sections):
+            raise ValueError("Truncated story bundle")
+        if self.string_data + struct.unpack_from("<I", data, self.string_data - 4)[0] > len(data):
+            raise ValueError("Truncated story bundle: string data is cut short")
+        self.strings = {}
+        self.scene_index = {
+            self.scene_id(index): index for index in range(self.scene_count)
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "StoryBundle":
+        return cls(path.read_bytes())
+
+    @property
+    def has_character_refs(self) -> bool:
+        return bool(self.flags & JSON_MODULE.BUNDLE_CHARACTER_REFS)
+
+    def string(self, ref: int):
+        if ref == JSON_MODULE.BUNDLE_NONE:
+            return None
+        if ref not in self.strings:
+            if ref >= self.string_count:
+                raise ValueError(f"String ref {ref} out of range")
+            start, end = struct.unpack_from("<II", self.data, self.strings_offset + 4 * ref)
+            self.strings[ref] = bytes(self.data[self.string_data + start:self.string_data + end]).decode("utf-8")
+        return self.strings[ref]
+
+    def _scene_record(self, index: int):
+        return JSON_MODULE.BUNDLE_SCENE.unpack_from(self.data, self.scenes_offset + index * JSON_MODULE.BUNDLE_SCENE.size)
+
+    def scene_id(self, index: int) -> str:
+        return self.string(self._scene_record(index)[0])
+
+    def scene_ids(self) -> list[str]:
+        return list(self.scene_index)
+
+    # ---------------------- Decoding ----------------------
+    def _choices(self, first: int, count: int):
+        if first + count > self.choice_count:
+            raise ValueError(f"Choice records {first}..{first + count} out of range")
+        size = JSON_MODULE.BUNDLE_CHOICE.size
+        for index in range(first, first + count):
+            yield JSON_MODULE.BUNDLE_CHOICE.unpack_from(self.data, self.choices_offset + index * size)
+
+    def entry(self, index: int) -> dict:
+        fmt = JSON_MODULE
+        (
+            name, text, portrait, character, css_class, flags,
+            first_choice, choice_count, dice_count, dice_min, dice_max,
+        ) = fmt.BUNDLE_ENTRY.unpack_from(self.data, self.entries_offset + index * fmt.BUNDLE_ENTRY.size)
+        # Key order follows StoryJSONGenerator._parse_scene_dialogue
+        entry = {}
+        for key, ref in (("name", name), ("character", character), ("portrait", portrait)):
+            if ref != fmt.BUNDLE_NONE:
+                entry[key] = self.string(ref)
+        if flags & fmt.ENTRY_MODIFIERS:
+            modifiers = {}
+            if css_class != fmt.BUNDLE_NONE:
+                modifiers["class"] = self.string(css_class)
+            if flags & fmt.ENTRY_HIDDEN:
+                modifiers["hidden"] = True
+            entry["modifiers"] = modifiers
+        if text != fmt.BUNDLE_NONE:
+            entry["text"] = self.string(text)
+
+        choices = None
+        if flags & fmt.ENTRY_CHOICES:
+            choices = [
+                {"text": self.string(label), "next": self.string(nxt)}
+                for label, _, nxt in self._choices(first_choice, choice_count)
+            ]
+        dice = None
+        if flags & fmt.ENTRY_DICE:
+            dice = {
+                "dice-min": None if flags & fmt.ENTRY_DICE_MIN_NULL else dice_min,
+                "dice-max": None if flags & fmt.ENTRY_DICE_MAX_NULL else dice_max,
+                "choices": [
+                    {"dice-min": low, "dice-max": high, "next": self.string(nxt)}
+                    for low, high, nxt in self._choices(first_choice + choice_count, dice_count)
+                ],
+            }
+        if dice is not None and flags & fmt.ENTRY_DICE_FIRST:
+            entry["dice-choices"] = dice
+        if choices is not None:
+            entry["choices"] = choices
+        if dice is not None and "dice-choices" not in entry:
+            entry["dice-choices"] = dice
+        return entry
+
+    def scene(self, scene_id: str) -> dict:
+        if scene_id not in self.scene_index:
+            raise KeyError(scene_id)
+        return self._scene(self.scene_index[scene_id])
+
+    def _scene(self, index: int) -> dict:
+        ref, first_entry, entry_count, flags = self._scene_record(index)
+        if first_entry + entry_count > self.entry_count:
+            raise ValueError(f"Scene {index} entries {first_entry}..{first_entry + entry_count} out of range")
+        scene = {
+            "scene": self.string(ref),
+            "dialogue": [self.entry(entry) for entry in range(first_entry, first_entry + entry_count)],
+        }
+        if flags & JSON_MODULE.SCENE_FINAL:
+            scene["final"] = True
+        return scene
+
+    def to_story(self) -> dict:
+        return {"scenes": [self._scene(index) for index in range(self.scene_count)]}
+
+    def to_json(self) -> str:
+        # Same serialization as StoryJSONGenerator.to_json()
+        return json.dumps(self.to_story(), ensure_ascii=False, indent=2)
+
+
+# ---------------------- Verification ----------------------
+def first_difference(expected: dict, actual: dict) -> str:
+    expected_scenes, actual_scenes = expected.get("scenes", []), actual.get("scenes", [])
+    for index, (want, got) in enumerate(zip(expected_scenes, actual_scenes)):
+        if json.dumps(want) != json.dumps(got):
+            return f"scene {index} ({want.get('scene')!r}) differs"
+    if len(expected_scenes) != len(actual_scenes):
+        return f"{len(actual_scenes)} scene(s) instead of {len(expected_scenes)}"
+    return "formatting differs"
+
+
+def verify_bundle(bundle_data: bytes, json_text: str) -> list[str]:
+    """Problems found decoding `bundle_data` back into `json_text`; empty when lossless."""
+    try:
+        bundle = StoryBundle(bundle_data)
+        decoded = bundle.to_json()
+    except (ValueError, UnicodeDecodeError, struct.error) as exc:
+        return [f"unreadable bundle: {exc}"]
+    if decoded == json_text:
+        return []
+    return [first_difference(json.loads(json_text), json.loads(decoded))]
+
+
+def verify_path(path: Path) -> list[str]:
+    if path.suffix == BUNDLE_SUFFIX:
+        json_path = path.with_suffix(".json")
+        if not json_path.exists():
+            return [f"no {json_path.name} to compare with"]
+        return verify_bundle(path.read_bytes(), json_path.read_text(encoding="utf-8"))
+    json_text = path.read_text(encoding="utf-8")
+    try:
+        bundle_data = JSON_MODULE.encode_bundle(json.loads(json_text))
+    except (ValueError, KeyError, TypeError) as exc:
+        return [f"cannot encode: {exc}"]
+    return verify_bundle(bundle_data, json_text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify story bundles against their CYOA JSON.")
+    parser.add_argument(
+        "paths", nargs="*", type=Path,
+        help=".bin bundles (checked against the .json beside them) or .json stories (round-tripped); "
+        "default: everything in prompts/CYOA",
+    )
+    args = parser.parse_args(argv)
+    paths = args.paths or sorted(
+        path for path in [*CYOA_DIR.glob("*.json"), *CYOA_DIR.glob(f"*{BUNDLE_SUFFIX}")]
+        if not HASHED_COPY.search(path.stem)
+    )
+    failed = 0
+    for path in paths:
+        problems = verify_path(path)
+        if problems:
+            failed += 1
+            log(f"FAIL {path}: {'; '.join(problems)}")
+        else:
+            log(f"ok   {path}")
+    log(f"Verified {len(paths)} file(s), {failed} failure(s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# tools/story_metrics.py
+"""
+Per-story weight metrics, size budgets and a trend file across syncs.
+
+`story_metrics()` measures one generated story:
+
+    html_bytes / segment_bytes / json_bytes / total_bytes
+    entries      dialogue entries (all scenes for dice stories)
+    scenes       dice scenes
+    images       distinct image URLs in the page, segments and story JSON
+    max_fanout   most choices (plain or dice) offered by one entry
+    dom_nodes    elements in the page and segments, plus an estimate for
+                 what cyoa-story.js builds from the JSON
+
+`check_budgets()` compares them with `DEFAULT_BUDGETS`, overridden by the JSON
+file named in `STORY_BUDGETS_FILE` (`{"images": {"warn": 50, "fail": 200}}`;
+`null` turns a limit off). Warnings are returned; exceeding a `fail` limit
+raises `BudgetExceeded`: that story keeps its previously published outputs and
+the run exits non-zero after publishing the rest.
+
+Each sync appends one line to `.cache/story-metrics.jsonl` with every story's
+metrics, and `MetricsTrend.regressions()` reports stories that grew by more
+than `REGRESSION_RATIO` since the last run that had them. The trend lives with
+the other run state, not in `prompts/`, so a run that changed no story leaves
+the published folder untouched.
+
+    python tools/story_metrics.py             # show the latest run and regressions
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[story_metrics] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+TREND_FILE = ROOT / ".cache" / "story-metrics.jsonl"
+TREND_LIMIT = 200
+REGRESSION_RATIO = 1.25
+# Only flag growth that is also large in absolute terms
+REGRESSION_FLOOR = {"total_bytes": 50_000, "dom_nodes": 500, "images": 20}
+DEFAULT_BUDGETS = {
+    "total_bytes": {"warn": 1_000_000, "fail": 5_000_000},
+    "json_bytes": {"warn": 1_000_000, "fail": 5_000_000},
+    "dom_nodes": {"warn": 3_000, "fail": 10_000},
+    "images": {"warn": 100, "fail": 300},
+    "max_fanout": {"warn": 8, "fail": 20},
+}
+# Elements cyoa-story.js creates per dialogue entry and per choice button
+DICE_ENTRY_NODES = 6
+DICE_CHOICE_NODES = 1
+
+START_TAG_PATTERN = re.compile(r"<[a-zA-Z]")
+IMG_SRC_PATTERN = re.compile(r"""<img\b[^>]*?\bsrc\s*=\s*["']([^"']+)["']""", re.I)
+
+
+class BudgetExceeded(ValueError):
+    pass
+
+
+# ---------------------- Measuring ----------------------
+def _json_strings(node):
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _json_strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _json_strings(value)
+
+
+def story_metrics(html_text: str, segments=(), json_text: str | None = None, entries: int = 0) -> dict:
+    segments = list(segments)
+    documents = [html_text, *segments]
+    images = set()
+    for text in documents:
+        images.update(IMG_SRC_PATTERN.findall(text))
+    dom_nodes = sum(len(START_TAG_PATTERN.findall(text)) for text in documents)
+
+    scenes = 0
+    max_fanout = 0
+    if json_text:
+        story = json.loads(json_text)
+        entries = 0
+        for scene in story.get("scenes", []):
+            scenes += 1
+            for entry in scene.get("dialogue", []):
+                entries += 1
+                fanout = len(entry.get("choices") or []) + len((entry.get("dice-choices") or {}).get("choices") or [])
+                max_fanout = max(max_fanout, fanout)
+                dom_nodes += DICE_ENTRY_NODES + fanout * DICE_CHOICE_NODES
+                if entry.get("portrait"):
+                    images.add(entry["portrait"])
+        for text in _json_strings(story):
+            images.update(IMG_SRC_PATTERN.findall(text))
+
+    html_bytes = len(html_text.encode("utf-8"))
+    segment_bytes = sum(len(text.encode("utf-8")) for text in segments)
+    json_bytes = len(json_text.encode("utf-8")) if json_text else 0
+    return {
+        "html_bytes": html_bytes,
+        "segment_bytes": segment_bytes,
+        "json_bytes": json_bytes,
+        "total_bytes": html_bytes + segment_bytes + json_bytes,
+        "entries": entries,
+        "scenes": scenes,
+        "images": len(images),
+        "max_fanout": max_fanout,
+        "dom_nodes": dom_nodes,
+    }
+
+
+# ---------------------- Budgets ----------------------
+def load_budgets(path=None) -> dict:
+    budgets = {metric: dict(limits) for metric, limits in DEFAULT_BUDGETS.items()}
+    path = path or os.environ.get("STORY_BUDGETS_FILE")
+    if path:
+        overrides = json.loads(Path(path).read_text(encoding="utf-8"))
+        for metric, limits in overrides.items():
+            budgets.setdefault(metric, {}).update(limits or {"warn": None, "fail": None})
+    return budgets
+
+
+def check_budgets(story: str, metrics: dict, budgets: dict) -> list[str]:
+    """Return warning messages; raise BudgetExceeded if a hard limit is crossed."""
+    warnings = []
+    failures = []
+    for metric, limits in budgets.items():
+        value = metrics.get(metric)
+        if value is None:
+            continue
+        if limits.get("fail") is not None and value > limits["fail"]:
+            failures.append(f"{metric} {value:,} > {limits['fail']:,}")
+        elif limits.get("warn") is not None and value > limits["warn"]:
+            warnings.append(f"{story}: {metric} {value:,} over warning budget {limits['warn']:,}")
+    if failures:
+        raise BudgetExceeded(f"over budget ({', '.join(failures)})")
+    return warnings
+
+
+# ---------------------- Trend ----------------------
+class MetricsTrend:
+    """One JSON line per sync run: {"run", "stories": {page: metrics}, "totals"}."""
+
+    def __init__(self, path: Path = TREND_FILE):
+        self.runs = []
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            try:
+                self.runs.append(json.loads(line))
+            except ValueError:
+                continue
+
+    def latest(self, story: str, before: str | None = None):
+        for run in reversed(self.runs):
+            if run["run"] != before and story in run["stories"]:
+                return run["stories"][story]
+        return None
+
+    def record(self, run_id: str, stories: dict) -> dict:
+        totals = {}
+        for metrics in stories.values():
+            for metric in ("total_bytes", "dom_nodes", "images", "entries"):
+                totals[metric] = totals.get(metric, 0) + metrics.get(metric, 0)
+        entry = {"run": run_id, "stories": dict(sorted(stories.items())), "totals": totals}
+        # A resumed run replaces its own earlier line
+        self.runs = [run for run in self.runs if run["run"] != run_id] + [entry]
+        self.runs = self.runs[-TREND_LIMIT:]
+        return entry
+
+    def regressions(self, entry: dict) -> list[str]:
+        messages = []
+        for story, metrics in entry["stories"].items():
+            previous = self.latest(story, before=entry["run"])
+            if not previous:
+                continue
+            for metric, floor in REGRESSION_FLOOR.items():
+                old, new = previous.get(metric, 0), metrics.get(metric, 0)
+                if new - old >= floor and new > old * REGRESSION_RATIO:
+                    messages.append(f"{story}: {metric} grew {old:,} -> {new:,}")
+        return messages
+
+    def write(self, path: Path = TREND_FILE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            "".join(json.dumps(run, separators=(",", ":"), sort_keys=True) + "\n" for run in self.runs),
+            encoding="utf-8",
+        )
+
+
+def record_run(run_id: str, stories: dict, path: Path = TREND_FILE) -> None:
+    """Append this run to the trend in `path` and log regressions."""
+    trend = MetricsTrend(path)
+    entry = trend.record(run_id, stories)
+    for message in trend.regressions(entry):
+        log(f"Regression: {message}")
+    trend.write(path)
+    totals = entry["totals"]
+    log(
+        f"Recorded metrics for {len(stories)} story(ies): {totals.get('total_bytes', 0):,} bytes, "
+        f"{totals.get('dom_nodes', 0):,} DOM nodes, {totals.get('images', 0)} image(s)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show story metrics from the trend file.")
+    parser.add_argument("--trend", type=Path, default=TREND_FILE, help="trend file (default: .cache/story-metrics.jsonl)")
+    args = parser.parse_args(argv)
+    trend = MetricsTrend(args.trend)
+    if not trend.runs:
+        log(f"No runs recorded in {args.trend}")
+        return
+    entry = trend.runs[-1]
+    log(f"Run {entry['run']}: {len(entry['stories'])} story(ies)")
+    budgets = load_budgets()
+    for story, metrics in entry["stories"].items():
+        print(
+            f"  {story}: {metrics['total_bytes']:,} B, {metrics['dom_nodes']:,} nodes, "
+            f"{metrics['images']} img, fan-out {metrics['max_fanout']}"
+        )
+        try:
+            for warning in check_budgets(story, metrics, budgets):
+                print(f"    warning: {warning}")
+        except BudgetExceeded as exc:
+            print(f"    failure: {exc}")
+    for message in trend.regressions(entry):
+        print(f"  regression: {message}")
+
+
+if __name__ == "__main__":
+    main()
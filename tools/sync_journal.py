@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# tools/sync_journal.py
+"""
+Checkpoints and staged publishing for sync_prompts.
+
+`SyncJournal` records, in `.cache/sync-journal.json`, every document downloaded
+(keyed by Drive file id with its `modifiedTime`) and every story generated
+(keyed by source name with a hash of the text and of the character registry
+used). The journal is rewritten atomically after each step, so a run that
+dies halfway can be restarted and skips the work already done.
+
+Generated files go to a staging folder, not `prompts/`. `publish()` swaps the
+staging folder in with two renames (old `prompts/` to a backup, staging to
+`prompts/`), and `rollback()` undoes that if a later step fails. `recover()` runs
+at start-up and restores the backup left by a run killed mid-swap. Until a run
+completes, the previously published `prompts/` is what is on disk.
+
+Every published set carries `sync-outputs.json`, the outputs, quest record and
+metrics of each source document. When a document fails to generate,
+`carry_forward()` copies its outputs from the published folder into staging,
+so one bad document keeps its last good page instead of losing it.
+
+    python tools/sync_journal.py          # show the pending journal
+    python tools/sync_journal.py --reset  # discard the journal and staging folder
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+
+def log(message: str) -> None:
+    print(f"[sync_journal] {message}")
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / ".cache"
+JOURNAL_FILE = CACHE_DIR / "sync-journal.json"
+STAGING_DIR = CACHE_DIR / "prompts-staging"
+BACKUP_DIR = CACHE_DIR / "prompts-previous"
+JOURNAL_VERSION = 2
+# Hand-written files in prompts/ that every published set keeps
+PRESERVED_FILES = ("example.html",)
+# Per-document outputs of the published set, written into every staged set
+OUTPUTS_FILE = "sync-outputs.json"
+
+
+def text_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+class SyncJournal:
+    """Downloads and generated stories of the current (possibly resumed) run."""
+
+    def __init__(self, folder_id: str, path: Path = JOURNAL_FILE):
+        self.path = path
+        self.folder_id = folder_id
+        self.data = {
+            "version": JOURNAL_VERSION,
+            "folder": folder_id,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "downloads": {},
+            "generated": {},
+        }
+        self.resumed = False
+        try:
+            previous = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if previous.get("version") == JOURNAL_VERSION and previous.get("folder") == folder_id:
+            self.data = previous
+            self.resumed = True
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(self.path.name + ".partial")
+        partial.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(partial, self.path)
+
+    # ---------------------- Downloads ----------------------
+    def downloaded(self, meta: dict):
+        """Path of an earlier download of this exact revision, or None."""
+        entry = self.data["downloads"].get(meta["id"])
+        if not entry or entry.get("modified") != meta.get("modifiedTime"):
+            return None
+        path = Path(entry["path"])
+        return path if path.exists() else None
+
+    def record_download(self, meta: dict, path: Path) -> None:
+        self.data["downloads"][meta["id"]] = {
+            "name": meta["name"],
+            "modified": meta.get("modifiedTime"),
+            "path": str(path),
+        }
+        self.save()
+
+    # ---------------------- Generation ----------------------
+    def generated(self, txt_path: Path, registry_hash: str):
+        """Journal entry (outputs, quest, metrics) of an unchanged, still staged story, or None."""
+        entry = self.data["generated"].get(txt_path.name)
+        if not entry or entry["source"] != text_hash(txt_path) or entry["registry"] != registry_hash:
+            return None
+        if not all((STAGING_DIR / output).exists() for output in entry["outputs"]):
+            return None
+        return entry
+
+    def record_generated(self, txt_path: Path, registry_hash: str, outputs, quest, metrics) -> None:
+        self.data["generated"][txt_path.name] = {
+            "source": text_hash(txt_path),
+            "registry": registry_hash,
+            "outputs": list(outputs),
+            "quest": quest,
+            "metrics": metrics,
+        }
+        self.save()
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+# ---------------------- Staging ----------------------
+def prepare_staging(prompts_dir: Path, resume: bool) -> Path:
+    """Return the staging folder, fresh (seeded with PRESERVED_FILES) unless resuming."""
+    if resume and STAGING_DIR.exists():
+        log(f"Resuming into existing staging folder {STAGING_DIR}")
+        return STAGING_DIR
+    if STAGING_DIR.exists():
+        shutil.rmtree(STAGING_DIR)
+    STAGING_DIR.mkdir(parents=True)
+    for name in PRESERVED_FILES:
+        if (prompts_dir / name).exists():
+            shutil.copy2(prompts_dir / name, STAGING_DIR / name)
+    return STAGING_DIR
+
+
+def published_outputs(prompts_dir: Path) -> dict:
+    """Source name -> {outputs, quest, metrics} of the published set, or {}."""
+    try:
+        return json.loads((prompts_dir / OUTPUTS_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_outputs(staging: Path, documents: dict) -> None:
+    (staging / OUTPUTS_FILE).write_text(json.dumps(documents, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def carry_forward(prompts_dir: Path, staging: Path, outputs) -> bool:
+    """Copy published outputs into staging; False (nothing copied) if any is missing."""
+    if not outputs or not all((prompts_dir / output).exists() for output in outputs):
+        return False
+    for output in outputs:
+        source, target = prompts_dir / output, staging / output
+        if target.is_dir():
+            shutil.rmtree(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if source.is_dir():
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+    return True
+
+
+def recover(prompts_dir: Path) -> None:
+    """Restore the published folder if a previous run died between the two renames."""
+    if not BACKUP_DIR.exists():
+        return
+    if prompts_dir.exists():
+        # The new set made it into place but was never confirmed; stage it again
+        if STAGING_DIR.exists():
+            shutil.rmtree(prompts_dir)
+        else:
+            os.replace(prompts_dir, STAGING_DIR)
+    os.replace(BACKUP_DIR, prompts_dir)
+    log(f"Restored previously published {prompts_dir} from an interrupted run")
+
+
+def publish(prompts_dir: Path) -> None:
+    """Swap the staging folder in; the old folder is kept until `confirm()`."""
+    if BACKUP_DIR.exists():
+        shutil.rmtree(BACKUP_DIR)
+    if prompts_dir.exists():
+        os.replace(prompts_dir, BACKUP_DIR)
+    os.replace(STAGING_DIR, prompts_dir)
+    log(f"Published staged outputs to {prompts_dir}")
+
+
+def rollback(prompts_dir: Path) -> None:
+    """Undo `publish()`: the new set goes back to staging, the old one back in place."""
+    if STAGING_DIR.exists():
+        shutil.rmtree(STAGING_DIR)
+    if prompts_dir.exists():
+        os.replace(prompts_dir, STAGING_DIR)
+    if BACKUP_DIR.exists():
+        os.replace(BACKUP_DIR, prompts_dir)
+    log(f"Rolled back {prompts_dir} to the previously published outputs")
+
+
+def confirm() -> None:
+    shutil.rmtree(BACKUP_DIR, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or reset the sync_prompts journal.")
+    parser.add_argument("--reset", action="store_true", help="discard the journal and staging folder")
+    args = parser.parse_args(argv)
+    if args.reset:
+        JOURNAL_FILE.unlink(missing_ok=True)
+        shutil.rmtree(STAGING_DIR, ignore_errors=True)
+        log("Journal and staging folder discarded")
+        return
+    try:
+        data = json.loads(JOURNAL_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        log("No pending journal")
+        return
+    log(
+        f"Pending run for folder {data.get('folder')} started {data.get('started')}: "
+        f"{len(data.get('downloads', {}))} download(s), {len(data.get('generated', {}))} story(ies) generated"
+    )
+
+
+if __name__ == "__main__":
+    main()
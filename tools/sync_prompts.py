@@ -3,13 +3,18 @@
 """
 Pull all docs from a Google Drive folder, regenerate story HTML/JSON, and
 write results into `prompts/` and `prompts/CYOA/`.
+
+Generation and publishing are done by generate_prompts.py, which needs no
+third-party packages. Runs are checkpointed (see sync_journal.py): outputs are
+built in a staging folder and swapped into `prompts/` only when complete, and a
+failed run is resumed by the next one instead of starting over. The downloaded
+`.txt` files stay in `.cache/google_docs_txt` for generate_prompts.py to rerun.
 """
 
 import base64
 import io
 import json
 import os
-import re
 import shutil
 import sys
 import time
@@ -22,11 +27,7 @@ from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 
 
-ROOT = Path(__file__).resolve().parents[1]
 TOOLS_DIR = Path(__file__).resolve().parent
-PROMPTS_DIR = ROOT / "prompts"
-CYOA_DIR = PROMPTS_DIR / "CYOA"
-TMP_DIR = ROOT / ".cache" / "google_docs_txt"
 
 DOC_MIMETYPE = "application/vnd.google-apps.document"
 TXT_MIMETYPE = "text/plain"
@@ -41,11 +42,8 @@ def load_module(path, module_name):
     return module
 
 
-HTML_MODULE = load_module(TOOLS_DIR / "storyHtmlGenerator.py", "story_html_generator")
-JSON_MODULE = load_module(TOOLS_DIR / "storyJsonGenerator.py", "story_json_generator")
-PROMPT_INDEX_MODULE = load_module(
-    TOOLS_DIR / "update_prompt_index.py", "update_prompt_index"
-)
+GENERATE_MODULE = load_module(TOOLS_DIR / "generate_prompts.py", "generate_prompts")
+TMP_DIR = GENERATE_MODULE.SOURCE_DIR
 
 
 def log(message: str) -> None:
@@ -63,38 +61,22 @@ def decode_service_account():
         raise SystemExit(f"Failed to decode GOOGLE_SERVICE_ACCOUNT: {exc}") from exc
 
 
-def drive_client():
+def service_client(api: str, version: str, scopes):
     creds_info = decode_service_account()
     creds = service_account.Credentials.from_service_account_info(
         creds_info,
-        scopes=["https://www.googleapis.com/auth/drive.readonly"],
+        scopes=scopes,
     )
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
-
-
-def sanitize_filename(name: str, fallback: str) -> Path:
-    name = (name or "").strip()
-    if not name:
-        name = fallback
-    candidate = Path(name)
-    if candidate.is_absolute():
-        candidate = Path(candidate.name)
-    safe_parts = []
-    for part in candidate.parts:
-        if not part or part in (".", ".."):
-            continue
-        safe_parts.append(re.sub(r"[^\w.\- ]+", "_", part))
-    if not safe_parts:
-        safe_parts = [fallback]
-    return Path(*safe_parts)
+    return build(api, version, credentials=creds, cache_discovery=False)
 
 
-def ensure_suffix(path: Path, suffix: str) -> Path:
-    suffix = suffix if suffix.startswith(".") else f".{suffix}"
-    return path if path.suffix.lower() == suffix.lower() else path.with_suffix(suffix)
+def drive_client():
+    return service_client(
+        "drive", "v3", ["https://www.googleapis.com/auth/drive.readonly"]
+    )
 
 
-def download_docs(folder_id: str, out_dir: Path):
+def download_docs(folder_id: str, out_dir: Path, journal=None):
     out_dir.mkdir(parents=True, exist_ok=True)
     service = drive_client()
     q = (
@@ -109,7 +91,7 @@ def download_docs(folder_id: str, out_dir: Path):
             service.files()
             .list(
                 q=q,
-                fields="nextPageToken, files(id, name, mimeType)",
+                fields="nextPageToken, files(id, name, mimeType, modifiedTime)",
                 spaces="drive",
                 pageToken=page_token,
             )
@@ -117,13 +99,19 @@ def download_docs(folder_id: str, out_dir: Path):
         )
         for meta in response.get("files", []):
             file_id = meta["id"]
-            mime = meta["mimeType"]
-            base_name = sanitize_filename(meta["name"], f"{file_id}.txt")
-            txt_path = ensure_suffix(out_dir / base_name, ".txt")
-
+            base_name = GENERATE_MODULE.sanitize_filename(meta["name"], f"{file_id}.txt")
+            txt_path = GENERATE_MODULE.ensure_suffix(out_dir / base_name, ".txt")
+
+            previous = journal.downloaded(meta) if journal else None
+            if previous:
+                downloaded.append(previous)
+                print(f"Reusing {meta['name']} -> {previous} (unchanged since last attempt)")
+                continue
             content = download_with_retry(service, meta)
             txt_path.write_bytes(content)
             downloaded.append(txt_path)
+            if journal:
+                journal.record_download(meta, txt_path)
             print(f"Saved {meta['name']} -> {txt_path}")
         page_token = response.get("nextPageToken")
         if not page_token:
@@ -166,44 +154,6 @@ def download_with_retry(service, meta):
     raise RuntimeError(f"Failed to download {name} after {MAX_DOWNLOAD_RETRIES} attempts")
 
 
-def generate_outputs(txt_path: Path):
-    log(f"Starting processing for {txt_path}")
-    html_gen = HTML_MODULE.StoryHTMLGenerator(str(txt_path))
-    html_text = html_gen.generate_html()
-    declared_html = sanitize_filename(
-        html_gen.file_name or f"{txt_path.stem}.html", f"{txt_path.stem}.html"
-    )
-    staging_html = ensure_suffix(TOOLS_DIR / declared_html, ".html")
-    staging_html.write_text(html_text, encoding="utf-8")
-    target_html = ensure_suffix(PROMPTS_DIR / declared_html, ".html")
-    target_html.parent.mkdir(parents=True, exist_ok=True)
-    if target_html.exists():
-        target_html.unlink()
-    shutil.move(str(staging_html), str(target_html))
-    log(f"Wrote HTML to {target_html}")
-
-    json_gen = JSON_MODULE.StoryJSONGenerator(str(txt_path))
-    json_gen.parse()
-    if json_gen.story_type != "dice":
-        log(f"Skipped JSON for {txt_path}: story type '{json_gen.story_type}' (expected 'dice')")
-        log(f"Completed processing for {txt_path}")
-        return
-    json_text = json_gen.to_json()
-    declared_json = sanitize_filename(
-        json_gen.file_name or txt_path.stem, txt_path.stem
-    )
-    declared_json = ensure_suffix(declared_json, ".json")
-    staging_json = ensure_suffix(TOOLS_DIR / declared_json, ".json")
-    staging_json.write_text(json_text, encoding="utf-8")
-    target_json = CYOA_DIR / declared_json
-    target_json.parent.mkdir(parents=True, exist_ok=True)
-    if target_json.exists():
-        target_json.unlink()
-    shutil.move(str(staging_json), str(target_json))
-    log(f"Wrote JSON to {target_json}")
-    log(f"Completed processing for {txt_path}")
-
-
 def main():
     folder_id = os.environ.get("GOOGLE_DRIVE_FOLDER_ID") or (
         sys.argv[1] if len(sys.argv) > 1 else None
@@ -214,41 +164,27 @@ def main():
 
     log(f"Starting sync run for folder {folder_id}")
 
-    if TMP_DIR.exists():
+    # Downloads, staged outputs and the journal survive a failed run so the
+    # next one resumes; prompts/ is only replaced once a full set is staged
+    journal = GENERATE_MODULE.start_run(folder_id)
+    if not journal.resumed and TMP_DIR.exists():
         shutil.rmtree(TMP_DIR)
     TMP_DIR.mkdir(parents=True, exist_ok=True)
 
     try:
-        txt_files = download_docs(folder_id, TMP_DIR)
+        txt_files = download_docs(folder_id, TMP_DIR, journal)
         if not txt_files:
-            log("No documents found to process.")
-        else:
-            skipped = 0
-            for txt in txt_files:
-                try:
-                    generate_outputs(txt)
-                except ValueError as exc:
-                    skipped += 1
-                    msg = f"Skipping {txt}: {exc}"
-                    print(msg, file=sys.stderr)
-                    log(msg)
-                except Exception as exc:
-                    skipped += 1
-                    msg = f"Skipping {txt} because of unexpected error: {exc}"
-                    print(msg, file=sys.stderr)
-                    log(msg)
-            if skipped:
-                msg = f"Skipped {skipped} document(s) due to errors."
-                print(msg, file=sys.stderr)
-                log(msg)
-        log("Updating prompt index")
-        PROMPT_INDEX_MODULE.main()
-        log("Prompt index updated")
+            log("No documents found to process; keeping the published prompts.")
+            journal.discard()
+            return
+        # The downloads are kept as the source for generate_prompts.py reruns
+        GENERATE_MODULE.generate_all(txt_files, journal)
+    except GENERATE_MODULE.GenerationFailed as exc:
+        print(f"Sync failed: {exc}", file=sys.stderr)
+        sys.exit(1)
     finally:
-        shutil.rmtree(TMP_DIR, ignore_errors=True)
         log("Sync run finished")
 
 
 if __name__ == "__main__":
     main()
-
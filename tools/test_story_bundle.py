@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# tools/test_story_bundle.py
+"""
+Round-trip tests for the binary story bundle (storyJsonGenerator.encode_bundle,
+story_bundle.StoryBundle and the StoryBundle decoder in cyoa-story.js).
+
+    python -m unittest discover -s tools -p "test_*.py"
+
+The cyoa-story.js checks run the decoder under `node` and are skipped when it
+is not installed.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+TOOLS_DIR = Path(__file__).resolve().parent
+CYOA_DIR = ROOT / "prompts" / "CYOA"
+CYOA_SCRIPT = ROOT / "styles" / "js" / "cyoa-story.js"
+
+
+def load_module(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[attr-defined]
+    return module
+
+
+BUNDLE_MODULE = load_module(TOOLS_DIR / "story_bundle.py", "story_bundle")
+FORMAT = BUNDLE_MODULE.JSON_MODULE
+StoryBundle = BUNDLE_MODULE.StoryBundle
+
+# One entry of every shape the format distinguishes
+EDGE_STORY = {
+    "scenes": [
+        {
+            "scene": "start",
+            "dialogue": [
+                {
+                    "modifiers": {"class": "dialogue-simple"},
+                    "dice-choices": {
+                        "dice-min": None,
+                        "dice-max": None,
+                        "choices": [{"dice-min": 1, "dice-max": 10, "next": "café"}],
+                    },
+                    "choices": [],
+                },
+                {
+                    "name": "Kōhai 🐾",
+                    "character": "kohai",
+                    "modifiers": {"class": "dialogue-container-right", "hidden": True},
+                    "text": "« Bonjour » — 你好",
+                },
+                {"name": "Anon", "portrait": "", "modifiers": {"class": "dialogue-container"}},
+                {
+                    "modifiers": {"class": "dialogue-simple"},
+                    "text": "Pick one",
+                    "choices": [{"text": "", "next": "start"}, {"text": "Go", "next": "café"}],
+                    "dice-choices": {"dice-min": -3, "dice-max": 40, "choices": []},
+                },
+                {"modifiers": {}, "dice-choices": {"dice-min": None, "dice-max": 6, "choices": []}},
+            ],
+        },
+        {"scene": "café", "dialogue": [], "final": True},
+    ]
+}
+
+
+def story_json(story: dict) -> str:
+    # Same serialization as StoryJSONGenerator.to_json()
+    return json.dumps(story, ensure_ascii=False, indent=2)
+
+
+def committed_stories():
+    return sorted(CYOA_DIR.glob("*.json"))
+
+
+class RoundTripTests(unittest.TestCase):
+    def assertRoundTrips(self, story: dict):
+        text = story_json(story)
+        bundle = FORMAT.encode_bundle(json.loads(text))
+        self.assertEqual(StoryBundle(bundle).to_json(), text)
+        self.assertEqual(BUNDLE_MODULE.verify_bundle(bundle, text), [])
+
+    def test_committed_stories(self):
+        stories = committed_stories()
+        self.assertTrue(stories, "no CYOA JSON in prompts/CYOA")
+        for path in stories:
+            with self.subTest(story=path.name):
+                text = path.read_text(encoding="utf-8")
+                bundle = StoryBundle(FORMAT.encode_bundle(json.loads(text)))
+                self.assertEqual(bundle.to_json(), text)
+
+    def test_edge_cases(self):
+        self.assertRoundTrips(EDGE_STORY)
+
+    def test_null_dice_range(self):
+        entry = StoryBundle(FORMAT.encode_bundle(EDGE_STORY)).scene("start")["dialogue"][0]
+        self.assertIsNone(entry["dice-choices"]["dice-min"])
+        self.assertIsNone(entry["dice-choices"]["dice-max"])
+        entry = StoryBundle(FORMAT.encode_bundle(EDGE_STORY)).scene("start")["dialogue"][4]
+        self.assertEqual(entry["dice-choices"], {"dice-min": None, "dice-max": 6, "choices": []})
+
+    def test_dice_choices_before_choices_keep_their_order(self):
+        dialogue = StoryBundle(FORMAT.encode_bundle(EDGE_STORY)).scene("start")["dialogue"]
+        self.assertEqual(list(dialogue[0]), ["modifiers", "dice-choices", "choices"])
+        self.assertEqual(list(dialogue[3]), ["modifiers", "text", "choices", "dice-choices"])
+
+    def test_modifiers(self):
+        dialogue = StoryBundle(FORMAT.encode_bundle(EDGE_STORY)).scene("start")["dialogue"]
+        self.assertEqual(dialogue[1]["modifiers"], {"class": "dialogue-container-right", "hidden": True})
+        self.assertEqual(dialogue[2]["modifiers"], {"class": "dialogue-container"})
+        self.assertEqual(dialogue[4]["modifiers"], {})
+
+    def test_character_refs(self):
+        self.assertTrue(StoryBundle(FORMAT.encode_bundle(EDGE_STORY)).has_character_refs)
+        plain = {"scenes": [{"scene": "a", "dialogue": [{"name": "A", "portrait": "a.png"}]}]}
+        self.assertFalse(StoryBundle(FORMAT.encode_bundle(plain)).has_character_refs)
+
+    def test_non_ascii_strings(self):
+        bundle = StoryBundle(FORMAT.encode_bundle(EDGE_STORY))
+        self.assertEqual(bundle.scene_ids(), ["start", "café"])
+        entry = bundle.scene("start")["dialogue"][1]
+        self.assertEqual(entry["name"], "Kōhai 🐾")
+        self.assertEqual(entry["text"], "« Bonjour » — 你好")
+
+    def test_single_scene_matches_full_decode(self):
+        bundle = StoryBundle(FORMAT.encode_bundle(EDGE_STORY))
+        self.assertEqual(bundle.scene("café"), EDGE_STORY["scenes"][1])
+        with self.assertRaises(KeyError):
+            bundle.scene("missing")
+
+
+class MalformedInputTests(unittest.TestCase):
+    def setUp(self):
+        self.data = FORMAT.encode_bundle(EDGE_STORY)
+
+    def header(self):
+        return list(FORMAT.BUNDLE_HEADER.unpack_from(self.data))
+
+    def with_header(self, values) -> bytes:
+        return FORMAT.BUNDLE_HEADER.pack(*values) + self.data[FORMAT.BUNDLE_HEADER.size:]
+
+    def test_truncated_input(self):
+        for size in (0, 10, FORMAT.BUNDLE_HEADER.size, len(self.data) // 2, len(self.data) - 1):
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    StoryBundle(self.data[:size])
+                self.assertNotEqual(BUNDLE_MODULE.verify_bundle(self.data[:size], story_json(EDGE_STORY)), [])
+
+    def test_bad_magic_and_version(self):
+        values = self.header()
+        values[0] = b"JSON"
+        with self.assertRaises(ValueError):
+            StoryBundle(self.with_header(values))
+        values = self.header()
+        values[1] = FORMAT.BUNDLE_VERSION + 1
+        with self.assertRaises(ValueError):
+            StoryBundle(self.with_header(values))
+
+    def test_out_of_range_counts(self):
+        for field in (3, 4, 5, 6):  # scene, entry, choice, string counts
+            with self.subTest(field=field):
+                values = self.header()
+                values[field] += 1000
+                with self.assertRaises(ValueError):
+                    StoryBundle(self.with_header(values))
+
+    def test_out_of_range_records(self):
+        bundle = StoryBundle(self.data)
+        with self.assertRaises(ValueError):
+            bundle.string(bundle.string_count)
+        with self.assertRaises(ValueError):
+            list(bundle._choices(bundle.choice_count, 1))
+        data = bytearray(self.data)
+        scene = bundle.scenes_offset + FORMAT.BUNDLE_SCENE.size  # second scene record
+        struct.pack_into("<I", data, scene + 8, bundle.entry_count + 1)  # its entry count
+        with self.assertRaises(ValueError):
+            StoryBundle(bytes(data)).scene("café")
+
+    def test_unsupported_fields_are_rejected(self):
+        for story in (
+            {"scenes": [{"scene": "a", "dialogue": [{"sound": "x.mp3"}]}]},
+            {"scenes": [{"scene": "a", "dialogue": [{"modifiers": {"class": "c", "shake": True}}]}]},
+            {"scenes": [{"scene": "a", "dialogue": [], "final": False}]},
+            {"scenes": [{"scene": "a", "dialogue": [{"text": 3}]}]},
+        ):
+            with self.subTest(story=story):
+                with self.assertRaises(ValueError):
+                    FORMAT.encode_bundle(story)
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class JavaScriptDecoderTests(unittest.TestCase):
+    """The cyoa-story.js StoryBundle must read what encode_bundle writes."""
+
+    def decode_with_node(self, data: bytes, scene_ids) -> list:
+        script = CYOA_SCRIPT.read_text(encoding="utf-8")
+        decoder = script[:script.index("// Generic CYOA Story Engine")]
+        with tempfile.TemporaryDirectory() as tmp:
+            bundle_path = Path(tmp) / "story.bin"
+            bundle_path.write_bytes(data)
+            runner = Path(tmp) / "decode.js"
+            runner.write_text(
+                decoder
+                + "\nconst fs = require('fs');\n"
+                + f"const buf = fs.readFileSync({json.dumps(str(bundle_path))});\n"
+                + "const bundle = new StoryBundle(buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.length));\n"
+                + f"const ids = {json.dumps(list(scene_ids), ensure_ascii=False)};\n"
+                + "console.log(JSON.stringify({refs: bundle.hasCharacterRefs, scenes: ids.map(id => bundle.scene(id))}));\n",
+                encoding="utf-8",
+            )
+            result = subprocess.run(
+                ["node", str(runner)], capture_output=True, text=True, encoding="utf-8", check=True
+            )
+        return json.loads(result.stdout)
+
+    def assertDecodes(self, story: dict):
+        decoded = self.decode_with_node(FORMAT.encode_bundle(story), [scene["scene"] for scene in story["scenes"]])
+        # Key order is not significant to the script, so compare parsed objects
+        self.assertEqual(decoded["scenes"], story["scenes"])
+        return decoded
+
+    def test_committed_stories(self):
+        for path in committed_stories():
+            with self.subTest(story=path.name):
+                self.assertDecodes(json.loads(path.read_text(encoding="utf-8")))
+
+    def test_edge_cases(self):
+        self.assertTrue(self.assertDecodes(EDGE_STORY)["refs"])
+
+    def test_record_sizes_match(self):
+        script = CYOA_SCRIPT.read_text(encoding="utf-8")
+        for name, record in (("SCENE_SIZE", FORMAT.BUNDLE_SCENE), ("ENTRY_SIZE", FORMAT.BUNDLE_ENTRY), ("CHOICE_SIZE", FORMAT.BUNDLE_CHOICE)):
+            with self.subTest(record=name):
+                match = re.search(rf"static {name} = (\d+);", script)
+                self.assertIsNotNone(match)
+                self.assertEqual(int(match.group(1)), record.size)
+        self.assertIn(f"static VERSION = {FORMAT.BUNDLE_VERSION};", script)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,12 +4,24 @@ Generate prompts/prompt-index.json listing every HTML file in the prompts folder
 
 Run this after adding, renaming, or removing prompt pages to refresh the manifest
 used by prompts/example.html.
+
+The same run refreshes prompts/precache-manifest.json for the service worker
+(`sw.js`): every story page with the local files it needs (stylesheets,
+scripts and their module imports, header/footer includes, CYOA JSON or bundle, character
+registry, dialogue segments), each with a content hash. Pages are grouped by
+chapter series (`Act2-Chapter6` -> `Act2-Chapter`) with links to the previous
+and next page so the worker can prefetch neighbours. Hashes and page
+dependencies are cached by file size and mtime, so a run after one story
+changed only re-reads that story.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import re
 from pathlib import Path
+from urllib.parse import urlsplit
 
 
 def log(message: str) -> None:
@@ -18,6 +30,19 @@ def log(message: str) -> None:
 ROOT = Path(__file__).resolve().parents[1]
 PROMPTS_DIR = ROOT / "prompts"
 OUTPUT_FILE = PROMPTS_DIR / "prompt-index.json"
+PRECACHE_FILE = PROMPTS_DIR / "precache-manifest.json"
+PRECACHE_STATE_FILE = ROOT / ".cache" / "precache-state.json"
+PRECACHE_VERSION = 1
+# Pages that are not stories
+PRECACHE_SKIP = {"example.html"}
+
+ASSET_PATTERN = re.compile(
+    r'<(?:link[^>]*\bhref|script[^>]*\bsrc)="([^"]+)"'
+    r'|\bdata-(?:source|story-file|story-bundle|characters-file)="([^"]+)"'
+)
+SEGMENT_PATTERN = re.compile(r'data-segment-base="([^"]+)" data-segment-count="(\d+)"')
+IMPORT_PATTERN = re.compile(r'''\bimport\s[^'"]*?from\s*['"]([^'"]+)['"]|\bimport\s*['"]([^'"]+)['"]''')
+SERIES_PATTERN = re.compile(r"^(.*?)(\d+)$")
 
 
 def collect_prompt_files() -> list[str]:
@@ -34,11 +59,171 @@ def write_manifest(files: list[str]) -> None:
     OUTPUT_FILE.write_text(json.dumps(files, separators=(",", ":")), encoding="utf-8")
 
 
+# ---------------------- Precache manifest ----------------------
+def site_path(path: Path) -> str:
+    return path.resolve().relative_to(ROOT).as_posix()
+
+
+def local_target(ref: str, base_dir: Path):
+    """Resolve a page/script reference to a file inside the site, or None."""
+    parts = urlsplit(ref)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    target = (base_dir / parts.path).resolve()
+    if ROOT not in target.parents or not target.is_file():
+        return None
+    return target
+
+
+class PrecacheState:
+    """Content hashes and page dependencies cached by (size, mtime)."""
+
+    def __init__(self, path: Path = PRECACHE_STATE_FILE):
+        self.path = path
+        try:
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+        self.refreshed = 0
+        self.seen = set()
+
+    def _entry(self, path: Path) -> dict:
+        key = site_path(path)
+        self.seen.add(key)
+        stat = path.stat()
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = self.entries.get(key)
+        if not entry or entry.get("stamp") != stamp:
+            entry = {
+                "stamp": stamp,
+                "hash": hashlib.sha256(path.read_bytes()).hexdigest()[:16],
+            }
+            self.entries[key] = entry
+            self.refreshed += 1
+        return entry
+
+    def file_hash(self, path: Path) -> str:
+        return self._entry(path)["hash"]
+
+    def dependencies(self, path: Path, parse) -> list[str]:
+        entry = self._entry(path)
+        if "deps" not in entry:
+            entry["deps"] = [site_path(dep) for dep in parse(path)]
+        return entry["deps"]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Files no longer referenced drop out of the state
+        entries = {key: value for key, value in self.entries.items() if key in self.seen}
+        self.path.write_text(json.dumps(entries, separators=(",", ":")), encoding="utf-8")
+
+
+def script_imports(path: Path) -> list[Path]:
+    text = path.read_text(encoding="utf-8", errors="replace")
+    targets = []
+    for match in IMPORT_PATTERN.finditer(text):
+        target = local_target(match.group(1) or match.group(2), path.parent)
+        if target and target not in targets:
+            targets.append(target)
+    return targets
+
+
+def page_references(path: Path) -> list[Path]:
+    html = path.read_text(encoding="utf-8", errors="replace")
+    targets = []
+    for match in ASSET_PATTERN.finditer(html):
+        target = local_target(match.group(1) or match.group(2), path.parent)
+        if target and target not in targets:
+            targets.append(target)
+    for base, count in SEGMENT_PATTERN.findall(html):
+        for index in range(1, int(count) + 1):
+            target = local_target(f"{base}{index}.html", path.parent)
+            if target and target not in targets:
+                targets.append(target)
+    return targets
+
+
+def page_assets(page: Path, state: PrecacheState) -> list[str]:
+    """Every local file a page loads, following JS module imports."""
+    assets = []
+    pending = list(state.dependencies(page, page_references))
+    while pending:
+        url = pending.pop(0)
+        if url in assets:
+            continue
+        assets.append(url)
+        if url.endswith(".js"):
+            pending.extend(state.dependencies(ROOT / url, script_imports))
+    return assets
+
+
+def series_key(name: str) -> str:
+    match = SERIES_PATTERN.match(Path(name).stem)
+    return match.group(1).rstrip("-_ ") if match else Path(name).stem
+
+
+def series_order(name: str):
+    match = SERIES_PATTERN.match(Path(name).stem)
+    return (int(match.group(2)) if match else 0, name.lower())
+
+
+def build_precache_manifest(files: list[str], state: PrecacheState) -> dict:
+    pages = {}
+    usage = {}
+    for name in files:
+        if name in PRECACHE_SKIP:
+            continue
+        page = PROMPTS_DIR / name
+        assets = page_assets(page, state)
+        pages[name] = {"url": site_path(page), "assets": assets, "chapter": series_key(name)}
+        for url in assets:
+            usage[url] = usage.get(url, 0) + 1
+
+    # Files every story loads are precached once, up front
+    shared = sorted(url for url, count in usage.items() if pages and count == len(pages))
+    chapters = {}
+    for name in pages:
+        chapters.setdefault(pages[name]["chapter"], []).append(name)
+    for chapter, names in chapters.items():
+        names.sort(key=series_order)
+        for position, name in enumerate(names):
+            pages[name]["assets"] = [url for url in pages[name]["assets"] if url not in shared]
+            pages[name]["neighbours"] = [
+                names[i] for i in (position - 1, position + 1) if 0 <= i < len(names)
+            ]
+
+    urls = set(shared) | {entry["url"] for entry in pages.values()}
+    for entry in pages.values():
+        urls.update(entry["assets"])
+    return {
+        "version": PRECACHE_VERSION,
+        "shared": shared,
+        "chapters": {chapter: names for chapter, names in sorted(chapters.items())},
+        "pages": pages,
+        "hashes": {url: state.file_hash(ROOT / url) for url in sorted(urls)},
+    }
+
+
+def write_precache_manifest(files: list[str]) -> bool:
+    """Refresh the precache manifest; return True when its content changed."""
+    state = PrecacheState()
+    manifest = build_precache_manifest(files, state)
+    state.save()
+    text = json.dumps(manifest, indent=2, sort_keys=True)
+    if PRECACHE_FILE.exists() and PRECACHE_FILE.read_text(encoding="utf-8") == text:
+        log(f"Precache manifest unchanged ({state.refreshed} file(s) re-hashed)")
+        return False
+    PRECACHE_FILE.write_text(text, encoding="utf-8")
+    log(f"Wrote precache manifest for {len(manifest['pages'])} page(s) ({state.refreshed} file(s) re-hashed)")
+    return True
+
+
 def main() -> None:
     log(f"Starting prompt index rebuild from {PROMPTS_DIR}")
     files = collect_prompt_files()
     write_manifest(files)
     print(f"Wrote {len(files)} prompt entries to {OUTPUT_FILE}")
+    write_precache_manifest(files)
     log(f"Completed prompt index rebuild -> {OUTPUT_FILE}")
 
 